@@ -1,6 +1,9 @@
 # flake8: noqa
 from .api import APIClient
 from .client import DockerClient, from_env
+from .client_registry import (
+    ClientRegistry, shared_api_client, shared_client, shared_from_env
+)
 from .context import Context
 from .context import ContextAPI
 from .tls import TLSConfig
@@ -0,0 +1,794 @@
+"""
+An asyncio flavour of :py:class:`~docker.api.client.APIClient`.
+
+This module requires Python 3.6 or above and is not imported by default.
+"""
+import asyncio
+import functools
+import json
+import ssl
+import struct
+import threading
+import types
+
+import requests
+import requests.exceptions
+import six
+
+from .. import auth
+from ..constants import (DEFAULT_MAX_POOL_SIZE, DEFAULT_TIMEOUT_SECONDS,
+                         DEFAULT_USER_AGENT, IS_WINDOWS_PLATFORM,
+                         STREAM_HEADER_SIZE_BYTES)
+from ..errors import (DockerException, TLSParameterError,
+                      create_api_error_from_http_exception)
+from ..tls import TLSConfig
+from ..types import CancellableStream
+from ..utils import config, update_headers, utils, version_cache
+from ..utils.json_stream import JSONStreamDecoder
+from ..utils.proxy import ProxyConfig
+from ..utils.socket import consume_socket_output, demux_adaptor, STDOUT
+from .build import BuildApiMixin
+from .client import APIClient
+from .config import ConfigApiMixin
+from .container import ContainerApiMixin
+from .daemon import DaemonApiMixin
+from .exec_api import ExecApiMixin
+from .image import ImageApiMixin
+from .network import NetworkApiMixin
+from .plugin import PluginApiMixin
+from .secret import SecretApiMixin
+from .service import ServiceApiMixin
+from .swarm import SwarmApiMixin
+from .volume import VolumeApiMixin
+
+
+_READ_SIZE = 64 * 1024
+
+# The methods that run blocking code besides their requests, building a tar
+# archive, reading files or running a credential helper: they run on a
+# thread of the executor of the event loop
+_WORKER_METHODS = frozenset([
+    'build', 'create_plugin', 'create_service', 'import_image', 'login',
+    'plugin_privileges', 'pull', 'pull_plugin', 'push', 'push_plugin',
+    'update_service', 'upgrade_plugin',
+])
+
+
+class _Suspend(BaseException):
+    # Raised out of the mixin code of a call running on the event loop,
+    # for the loop to await a step of I/O. Like GeneratorExit, it isn't an
+    # Exception, so that it isn't caught by the mixins.
+    def __init__(self, coro):
+        self.coro = coro
+
+
+class _NeedsWorker(BaseException):
+    # Raised out of the mixin code of a call running on the event loop when
+    # it calls a method of _WORKER_METHODS
+    pass
+
+
+class _CallState(object):
+    """
+    The state of a call of a mixin method: the results of the steps of I/O
+    it already awaited, in order, and the event loop to await new ones on
+    if it runs on a worker thread.
+    """
+    def __init__(self, journal, loop=None):
+        self.journal = journal
+        self.position = 0
+        self.loop = loop
+
+
+class _Request(object):
+    """
+    A request prepared from the arguments the mixins pass to ``_post``,
+    ``_get``, ...
+    """
+    def __init__(self, client, method, url, params=None, data=None,
+                 headers=None, stream=False, timeout=None):
+        self.stream = stream
+        self.timeout = timeout
+        merged = dict(client.headers)
+        merged.update(headers or {})
+        self.prepared = requests.Request(
+            method, url, params=params, data=data, headers=merged
+        ).prepare()
+
+
+class _Connection(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    @property
+    def usable(self):
+        return not (self.reader.at_eof() or self.writer.transport.is_closing())
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHTTPResponse(object):
+    """
+    A minimal HTTP/1.1 response read from an asyncio stream.
+    """
+    def __init__(self, connection, status_code, reason, headers, url,
+                 release=None):
+        self.connection = connection
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.url = url
+        self._content = None
+        self._release = release
+
+        encoding = headers.get('Transfer-Encoding', '').lower()
+        self.chunked = 'chunked' in encoding
+        length = headers.get('Content-Length')
+        self.length = int(length) if length is not None else None
+        self.hijacked = status_code == 101 or (
+            self.length is None and not self.chunked
+        )
+        self.keep_alive = not self.hijacked and (
+            headers.get('Connection', '').lower() != 'close'
+        )
+
+    @classmethod
+    async def read_head(cls, connection, url, release=None):
+        line = await connection.reader.readline()
+        if not line:
+            raise requests.exceptions.ConnectionError(
+                'Connection closed by the Docker daemon'
+            )
+        parts = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        status_code = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ''
+        headers = requests.structures.CaseInsensitiveDict()
+        while True:
+            line = await connection.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip()] = value.strip()
+        if status_code in (204, 304):
+            headers['Content-Length'] = '0'
+        return cls(connection, status_code, reason, headers, url, release)
+
+    @property
+    def content(self):
+        return self._content
+
+    @property
+    def text(self):
+        return self._content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    async def read(self):
+        if self._content is None:
+            self._content = b''.join([c async for c in self.iter_chunks()])
+        return self._content
+
+    async def iter_chunks(self, chunk_size=_READ_SIZE):
+        """
+        Yield the body as it arrives. With chunked transfer encoding, each
+        HTTP chunk is yielded as-is.
+        """
+        reader = self.connection.reader
+        if self.chunked:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                size = int(line.split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # Skip trailers up to the terminating empty line
+                    while (await reader.readline()) not in (b'\r\n', b''):
+                        pass
+                    self._finish(True)
+                    return
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        elif self.length is not None:
+            remaining = self.length
+            while remaining > 0:
+                data = await reader.read(min(remaining, chunk_size))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+            if remaining == 0:
+                self._finish(True)
+                return
+        else:
+            while True:
+                data = await reader.read(chunk_size)
+                if not data:
+                    break
+                yield data
+        self._finish(False)
+
+    def _finish(self, complete):
+        release, self._release = self._release, None
+        if release is not None:
+            release(self.connection, complete and self.keep_alive)
+
+    def close(self):
+        self._finish(False)
+
+
+class AsyncAPIClient(
+        BuildApiMixin,
+        ConfigApiMixin,
+        ContainerApiMixin,
+        DaemonApiMixin,
+        ExecApiMixin,
+        ImageApiMixin,
+        NetworkApiMixin,
+        PluginApiMixin,
+        SecretApiMixin,
+        ServiceApiMixin,
+        SwarmApiMixin,
+        VolumeApiMixin):
+    """
+    An asyncio client for the Docker Engine API.
+
+    It exposes the same methods as :py:class:`~docker.api.client.APIClient`,
+    built from the same mixins, but every method is a coroutine function and
+    the I/O happens over asyncio streams. Streaming methods (``logs``,
+    ``stats``, ``events``, ``pull``, ``build``, ...) resolve to an
+    asynchronous generator.
+
+    Example:
+
+        >>> from docker.api.async_client import AsyncAPIClient
+        >>> async with AsyncAPIClient() as client:
+        ...     info = await client.inspect_container('my-container')
+        ...     async for line in await client.logs('my-container',
+        ...                                         stream=True):
+        ...         print(line)
+
+    Only the ``unix://`` and ``tcp://`` (optionally with TLS) protocols are
+    supported. With ``version='auto'`` the API version is negotiated lazily,
+    on the first call.
+
+    The mixin code of most calls runs on the event loop: when it sends a
+    request, it is interrupted while the loop awaits the response, then run
+    again from the start, the requests already sent returning their
+    recorded responses, until it completes. Calls that build a tar archive,
+    read files or run a credential helper (``build``, ``pull``, ``push``,
+    ``login``, ...) run once on a thread of the loop's default executor
+    instead.
+
+    Args:
+        base_url (str): URL to the Docker server. For example,
+            ``unix:///var/run/docker.sock`` or ``tcp://127.0.0.1:1234``.
+        version (str): The version of the API to use. Set to ``auto`` to
+            automatically detect the server's version.
+        timeout (int): Default timeout for API calls, in seconds.
+        tls (bool or :py:class:`~docker.tls.TLSConfig`): Enable TLS.
+        user_agent (str): Set a custom user agent for requests to the server.
+        credstore_env (dict): Override environment variables when calling the
+            credential store process.
+        max_pool_size (int): The maximum number of idle connections to keep.
+        persist_api_version (bool): With ``version='auto'``, also save the
+            detected version next to the Docker config file, for other
+            processes to reuse. See :py:class:`~docker.api.client.APIClient`.
+    """
+
+    def __init__(self, base_url=None, version=None,
+                 timeout=DEFAULT_TIMEOUT_SECONDS, tls=False,
+                 user_agent=DEFAULT_USER_AGENT, credstore_env=None,
+                 max_pool_size=DEFAULT_MAX_POOL_SIZE,
+                 persist_api_version=False):
+        if tls and not base_url:
+            raise TLSParameterError(
+                'If using TLS, the base_url argument must be provided.'
+            )
+
+        self.timeout = timeout
+        self.headers = {'User-Agent': user_agent}
+        self.max_pool_size = max_pool_size
+
+        self._general_configs = config.load_general_config()
+        self._config_headers = dict(
+            self._general_configs.get('HttpHeaders') or {}
+        )
+
+        proxy_config = self._general_configs.get('proxies', {})
+        try:
+            proxies = proxy_config[base_url]
+        except KeyError:
+            proxies = proxy_config.get('default', {})
+
+        self._proxy_configs = ProxyConfig.from_dict(proxies)
+
+        self._auth_configs = auth.load_config(
+            config_dict=self._general_configs, credstore_env=credstore_env,
+        )
+        self.credstore_env = credstore_env
+
+        base_url = utils.parse_host(
+            base_url, IS_WINDOWS_PLATFORM, tls=bool(tls)
+        )
+        self._socket_path = None
+        self._ssl_context = None
+        if base_url.startswith('http+unix://'):
+            socket_path = base_url.replace('http+unix://', '')
+            if not socket_path.startswith('/'):
+                socket_path = '/' + socket_path
+            self._socket_path = socket_path
+            self._host = 'localhost'
+            self.base_url = 'http+docker://localhost'
+        elif base_url.startswith(('http://', 'https://')):
+            parsed = six.moves.urllib.parse.urlparse(base_url)
+            self._host = parsed.netloc
+            self._address = (parsed.hostname, parsed.port)
+            if tls:
+                self._ssl_context = _create_ssl_context(tls)
+            self.base_url = base_url
+        else:
+            raise DockerException(
+                'AsyncAPIClient only supports the unix:// and tcp:// '
+                'protocols'
+            )
+
+        self._idle = []
+        self._url_templates = {}
+        # The state of the call whose mixin code runs on the current thread
+        self._local = threading.local()
+        self._version_lock = None
+        self._version_endpoint = base_url
+        self._version_cache_path = None
+        if version is None or (isinstance(
+                                version,
+                                six.string_types
+                                ) and version.lower() == 'auto'):
+            self._version = None
+            if persist_api_version:
+                self._version_cache_path = version_cache.default_cache_path()
+        else:
+            self._version = self._check_version(version)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Close all idle connections.
+        """
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    @property
+    def api_version(self):
+        return self._version
+
+    reload_config = APIClient.reload_config
+    _check_version = APIClient._check_version
+
+    async def _negotiate_version(self):
+        if self._version_lock is None:
+            self._version_lock = asyncio.Lock()
+        async with self._version_lock:
+            if self._version is None:
+                version = version_cache.get_api_version(
+                    self._version_endpoint, self._version_cache_path
+                )
+                if version is None:
+                    version = await self._call(
+                        APIClient._retrieve_server_version, (), {}
+                    )
+                    version_cache.set_api_version(
+                        self._version_endpoint, version,
+                        self._version_cache_path
+                    )
+                self._version = self._check_version(version)
+
+    # Driving the synchronous mixins
+
+    async def _invoke(self, f, args, kwargs):
+        if self._version is None:
+            await self._negotiate_version()
+        return await self._call(f, args, kwargs)
+
+    async def _call(self, f, args, kwargs):
+        journal = []
+        if f.__name__ not in _WORKER_METHODS:
+            while True:
+                self._local.call = _CallState(journal)
+                try:
+                    return _unwrap(f(self, *args, **kwargs))
+                except _Suspend as e:
+                    coro = e.coro
+                except _NeedsWorker:
+                    break
+                finally:
+                    self._local.call = None
+                try:
+                    journal.append((await coro, None))
+                except Exception as e:
+                    journal.append((None, e))
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, self._run, loop, journal, f, args, kwargs
+        )
+
+    def _run(self, loop, journal, f, args, kwargs):
+        # Runs on a worker thread, which blocks while the event loop does
+        # the I/O of the call
+        self._local.call = _CallState(journal, loop)
+        try:
+            return _unwrap(f(self, *args, **kwargs))
+        finally:
+            self._local.call = None
+
+    def _in_call(self):
+        return getattr(self._local, 'call', None) is not None
+
+    def _on_worker(self):
+        return self._local.call.loop is not None
+
+    def _step(self, coro, body=None):
+        """
+        Return the result of ``coro``, a step of I/O of the current call:
+        the one recorded if the mixin code is run again, or else the one
+        awaited on the event loop.
+        """
+        call = self._local.call
+        if call.position < len(call.journal):
+            coro.close()
+            if isinstance(body, types.GeneratorType):
+                # The body sent the first time was created by another run
+                body.close()
+            result, error = call.journal[call.position]
+            call.position += 1
+            if error is not None:
+                raise error
+            return result
+        if call.loop is None:
+            raise _Suspend(coro)
+        call.position += 1
+        return asyncio.run_coroutine_threadsafe(coro, call.loop).result()
+
+    # Request plumbing used by the mixins
+
+    def _request(self, method, url, **kwargs):
+        request = _Request(self, method, url, **kwargs)
+        return self._step(self._send(request), kwargs.get('data'))
+
+    _set_request_timeout = APIClient._set_request_timeout
+
+    @update_headers
+    def _post(self, url, **kwargs):
+        return self.post(url, **self._set_request_timeout(kwargs))
+
+    @update_headers
+    def _get(self, url, **kwargs):
+        return self.get(url, **self._set_request_timeout(kwargs))
+
+    @update_headers
+    def _put(self, url, **kwargs):
+        return self.put(url, **self._set_request_timeout(kwargs))
+
+    @update_headers
+    def _delete(self, url, **kwargs):
+        return self.delete(url, **self._set_request_timeout(kwargs))
+
+    def get(self, url, **kwargs):
+        return self._request('GET', url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self._request('POST', url, data=data, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self._request('PUT', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self._request('DELETE', url, **kwargs)
+
+    _url = APIClient._url
+    _post_json = APIClient._post_json
+    _attach_params = APIClient._attach_params
+    _check_is_tty = APIClient._check_is_tty
+    _get_result = APIClient._get_result
+    _get_result_tty = APIClient._get_result_tty
+    _multiplexed_buffer_helper = APIClient._multiplexed_buffer_helper
+
+    def _raise_for_status(self, response):
+        """Raises stored :class:`APIError`, if one occurred."""
+        _raise_for_status(response)
+
+    def _result(self, response, json=False, binary=False):
+        assert not (json and binary)
+        self._raise_for_status(response)
+        if response.content is None:
+            self._step(response.read())
+
+        if json:
+            return response.json()
+        if binary:
+            return response.content
+        return response.text
+
+    def _get_raw_response_socket(self, response):
+        self._raise_for_status(response)
+        connection = response.connection
+        return connection.reader, connection.writer
+
+    def _attach_websocket(self, container, params=None):
+        raise DockerException(
+            'Websocket attach is not supported by AsyncAPIClient'
+        )
+
+    def _stream_helper(self, response, decode=False):
+        return self._iter_stream(response, decode)
+
+    def _multiplexed_response_stream_helper(self, response):
+        return self._iter_data(self._iter_frames(response, tty=False))
+
+    def _stream_raw_result(self, response, chunk_size=1, decode=True):
+        self._raise_for_status(response)
+        return response.iter_chunks(max(chunk_size, _READ_SIZE))
+
+    def _read_from_socket(self, response, stream, tty=True, demux=False):
+        gen = self._iter_frames(response, tty)
+
+        if demux:
+            gen = self._iter_demuxed(gen)
+        else:
+            gen = self._iter_data(gen)
+
+        if stream:
+            return gen
+        return self._step(_consume(gen, demux=demux))
+
+    # Asynchronous I/O
+
+    async def _open_connection(self):
+        try:
+            if self._socket_path is not None:
+                reader, writer = await asyncio.open_unix_connection(
+                    self._socket_path, limit=_READ_SIZE
+                )
+            else:
+                host, port = self._address
+                reader, writer = await asyncio.open_connection(
+                    host, port, ssl=self._ssl_context, limit=_READ_SIZE
+                )
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(e)
+        return _Connection(reader, writer)
+
+    async def _acquire(self):
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.usable:
+                connection.reused = True
+                return connection
+            connection.close()
+        return await self._open_connection()
+
+    def _release(self, connection, reusable):
+        if reusable and connection.usable and \
+                len(self._idle) < self.max_pool_size:
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    async def _send(self, request):
+        timeout = request.timeout
+        while True:
+            connection = await self._acquire()
+            try:
+                response = await asyncio.wait_for(
+                    self._exchange(connection, request), timeout
+                )
+            except requests.exceptions.ConnectionError:
+                connection.close()
+                if connection.reused and isinstance(
+                        request.prepared.body, (six.binary_type, type(None))):
+                    # The daemon closed the idle connection; try a new one.
+                    # Streamed bodies can't be sent again.
+                    continue
+                raise
+            except asyncio.TimeoutError as e:
+                connection.close()
+                raise requests.exceptions.Timeout(e)
+            except Exception:
+                connection.close()
+                raise
+            break
+
+        if not request.stream or response.status_code >= 400:
+            try:
+                await asyncio.wait_for(response.read(), timeout)
+            except asyncio.TimeoutError as e:
+                response.close()
+                raise requests.exceptions.Timeout(e)
+        return response
+
+    async def _exchange(self, connection, request):
+        prepared = request.prepared
+        head = ['{0} {1} HTTP/1.1'.format(prepared.method, prepared.path_url)]
+        headers = requests.structures.CaseInsensitiveDict(prepared.headers)
+        headers.setdefault('Host', self._host)
+        headers.setdefault('Accept-Encoding', 'identity')
+        body = prepared.body
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        if body is None and prepared.method in ('POST', 'PUT'):
+            headers.setdefault('Content-Length', '0')
+        chunked = 'chunked' in headers.get('Transfer-Encoding', '').lower()
+        head.extend('{0}: {1}'.format(k, v) for k, v in headers.items())
+        writer = connection.writer
+        try:
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+            if isinstance(body, six.binary_type):
+                writer.write(body)
+            elif body is not None:
+                async for chunk in _iter_body(body):
+                    if chunked:
+                        chunk = b'%x\r\n' % len(chunk) + chunk + b'\r\n'
+                    writer.write(chunk)
+                    await writer.drain()
+                if chunked:
+                    writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(e)
+        return await AsyncHTTPResponse.read_head(
+            connection, prepared.url, release=self._release
+        )
+
+    async def _iter_stream(self, response, decode):
+        _raise_for_status(response)
+        if not response.chunked:
+            # Response isn't chunked, meaning we probably
+            # encountered an error immediately
+            await response.read()
+            yield response.json() if decode else response.text
+            return
+        if not decode:
+            async for chunk in response.iter_chunks():
+                yield chunk
+            return
+        decoder = JSONStreamDecoder()
+        async for chunk in response.iter_chunks():
+            for obj in decoder.feed(chunk):
+                yield obj
+        for obj in decoder.close():
+            yield obj
+
+    async def _iter_frames(self, response, tty):
+        _raise_for_status(response)
+        chunks = response.iter_chunks()
+        if tty:
+            async for chunk in chunks:
+                yield STDOUT, chunk
+            return
+        buf = bytearray()
+        async for chunk in chunks:
+            buf += chunk
+            while len(buf) >= STREAM_HEADER_SIZE_BYTES:
+                stream, length = struct.unpack_from('>BxxxL', buf)
+                end = STREAM_HEADER_SIZE_BYTES + length
+                if len(buf) < end:
+                    break
+                data = bytes(buf[STREAM_HEADER_SIZE_BYTES:end])
+                del buf[:end]
+                if data:
+                    yield stream, data
+
+    async def _iter_data(self, frames):
+        async for _, data in frames:
+            yield data
+
+    async def _iter_demuxed(self, frames):
+        async for frame in frames:
+            yield demux_adaptor(*frame)
+
+
+def _raise_for_status(response):
+    if response.status_code < 400:
+        return
+    res = requests.Response()
+    res.status_code = response.status_code
+    res.reason = response.reason
+    res.headers = response.headers
+    res.url = response.url
+    res.encoding = 'utf-8'
+    res._content = response.content or b''
+    try:
+        res.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        raise create_api_error_from_http_exception(e)
+
+
+async def _iter_body(body):
+    # Files and iterables are read on the default executor, so that reading
+    # a large file, or generating a build context, doesn't block the loop
+    loop = asyncio.get_event_loop()
+    if hasattr(body, 'read'):
+        def read():
+            return body.read(_READ_SIZE) or None
+    else:
+        chunks = iter(body)
+
+        def read():
+            return next(chunks, None)
+
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, read)
+            if chunk is None:
+                return
+            if isinstance(chunk, six.text_type):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield chunk
+    finally:
+        # The request owns generator bodies, such as streamed build
+        # contexts: they are closed once sent, or when the send fails
+        if isinstance(body, types.GeneratorType):
+            await loop.run_in_executor(None, body.close)
+
+
+def _unwrap(result):
+    if isinstance(result, CancellableStream):
+        return result._stream
+    return result
+
+
+async def _consume(gen, demux=False):
+    return consume_socket_output([frame async for frame in gen], demux=demux)
+
+
+def _create_ssl_context(tls):
+    if not isinstance(tls, TLSConfig):
+        return ssl.create_default_context()
+
+    verify = tls.verify
+    if verify and tls.ca_cert:
+        verify = tls.ca_cert
+    if verify is False:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif isinstance(verify, six.string_types):
+        context = ssl.create_default_context(cafile=verify)
+    else:
+        context = ssl.create_default_context()
+    if tls.assert_hostname is False:
+        context.check_hostname = False
+    if tls.cert:
+        context.load_cert_chain(*tls.cert)
+    return context
+
+
+def _coroutine_method(f):
+    @functools.wraps(f)
+    def wrapper(self, *args, **kwargs):
+        if self._in_call():
+            # Called from another mixin method
+            if f.__name__ in _WORKER_METHODS and not self._on_worker():
+                raise _NeedsWorker()
+            return f(self, *args, **kwargs)
+        return self._invoke(f, args, kwargs)
+    return wrapper
+
+
+for _mixin in AsyncAPIClient.__bases__:
+    for _name, _attr in vars(_mixin).items():
+        if _name.startswith('_') or not callable(_attr):
+            continue
+        setattr(AsyncAPIClient, _name, _coroutine_method(_attr))
@@ -20,7 +20,8 @@ class BuildApiMixin(object):
               decode=False, buildargs=None, gzip=False, shmsize=None,
               labels=None, cache_from=None, target=None, network_mode=None,
               squash=None, extra_hosts=None, platform=None, isolation=None,
-              use_config_proxy=True):
+              use_config_proxy=True, stream_context=False,
+              context_cache=None, gzip_level=9, gzip_workers=None):
         """
         Similar to the ``docker build`` command. Either ``path`` or ``fileobj``
         needs to be set. ``path`` can be a local path (to a directory
@@ -108,6 +109,20 @@ class BuildApiMixin(object):
                 configuration file (``~/.docker/config.json`` by default)
                 contains a proxy configuration, the corresponding environment
                 variables will be set in the container being built.
+            stream_context (bool): If ``True``, the build context is sent
+                while it is being archived, with chunked transfer encoding,
+                instead of being written to a temporary file first. Only
+                used when ``path`` is a local directory. Default: ``False``
+            context_cache (str): Path to a directory where the build context
+                is kept between builds. Files that haven't changed since the
+                previous build using the same directory are copied from the
+                cached archive instead of being read again. Only used when
+                ``path`` is a local directory and ``gzip`` is ``False``, and
+                takes precedence over ``stream_context``. Default: ``None``
+            gzip_level (int): Compression level used when ``gzip`` is
+                ``True``. Default: 9
+            gzip_workers (int): Number of threads compressing the context
+                when ``gzip`` is ``True``. Default: the number of CPUs
 
         Returns:
             A generator for the build output.
@@ -157,7 +172,9 @@ class BuildApiMixin(object):
                     ))
             dockerfile = process_dockerfile(dockerfile, path)
             context = utils.tar(
-                path, exclude=exclude, dockerfile=dockerfile, gzip=gzip
+                path, exclude=exclude, dockerfile=dockerfile, gzip=gzip,
+                stream=stream_context, cache_dir=context_cache,
+                gzip_level=gzip_level, gzip_workers=gzip_workers
             )
             encoding = 'gzip' if gzip else encoding
 
@@ -260,17 +277,18 @@ class BuildApiMixin(object):
 
         self._set_auth_headers(headers)
 
-        response = self._post(
-            u,
-            data=context,
-            params=params,
-            headers=headers,
-            stream=True,
-            timeout=timeout,
-        )
-
-        if context is not None and not custom_context:
-            context.close()
+        try:
+            response = self._post(
+                u,
+                data=context,
+                params=params,
+                headers=headers,
+                stream=True,
+                timeout=timeout,
+            )
+        finally:
+            if context is not None and not custom_context:
+                context.close()
 
         return self._stream_helper(response, decode=decode)
 
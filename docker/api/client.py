@@ -1,25 +1,32 @@
+import copy
 import json
 import struct
+import threading
 from functools import partial
 
 import requests
 import requests.exceptions
 import six
-import websocket
 
 from .. import auth
 from ..constants import (DEFAULT_NUM_POOLS, DEFAULT_NUM_POOLS_SSH,
                          DEFAULT_MAX_POOL_SIZE, DEFAULT_TIMEOUT_SECONDS,
+                         DEFAULT_FRAME_BUFFER_SIZE,
                          DEFAULT_USER_AGENT, IS_WINDOWS_PLATFORM,
                          MINIMUM_DOCKER_API_VERSION, STREAM_HEADER_SIZE_BYTES)
 from ..errors import (DockerException, InvalidVersion, TLSParameterError,
                       create_api_error_from_http_exception)
 from ..tls import TLSConfig
 from ..transport import SSLHTTPAdapter, UnixHTTPAdapter
-from ..utils import check_resource, config, update_headers, utils
+from ..transport.basehttpadapter import BaseHTTPAdapter
+from ..transport.backend import LightweightBackend, RequestsBackend
+from ..utils import (check_resource, config, fork, update_headers, utils,
+                     version_cache)
 from ..utils.json_stream import json_stream
 from ..utils.proxy import ProxyConfig
-from ..utils.socket import consume_socket_output, demux_adaptor, frames_iter
+from ..utils.singleflight import SingleFlight
+from ..utils.socket import (consume_socket_output, demux_adaptor, frames_iter,
+                            read_frames, readinto_from_chunks)
 from .build import BuildApiMixin
 from .config import ConfigApiMixin
 from .container import ContainerApiMixin
@@ -33,15 +40,14 @@ from .service import ServiceApiMixin
 from .swarm import SwarmApiMixin
 from .volume import VolumeApiMixin
 
-try:
-    from ..transport import NpipeHTTPAdapter
-except ImportError:
-    pass
+_quote = partial(six.moves.urllib.parse.quote, safe='/:')
 
-try:
-    from ..transport import SSHHTTPAdapter
-except ImportError:
-    pass
+
+def _copy_response(response):
+    # Copying a response reads its body, if it wasn't already
+    copied = copy.copy(response)
+    copied.headers = response.headers.copy()
+    return copied
 
 
 class APIClient(
@@ -80,7 +86,8 @@ class APIClient(
         base_url (str): URL to the Docker server. For example,
             ``unix:///var/run/docker.sock`` or ``tcp://127.0.0.1:1234``.
         version (str): The version of the API to use. Set to ``auto`` to
-            automatically detect the server's version. Default: ``1.35``
+            automatically detect the server's version, on the first request
+            to the server. Default: ``1.35``
         timeout (int): Default timeout for API calls, in seconds.
         tls (bool or :py:class:`~docker.tls.TLSConfig`): Enable TLS. Pass
             ``True`` to enable it with default options, or pass a
@@ -89,9 +96,39 @@ class APIClient(
         user_agent (str): Set a custom user agent for requests to the server.
         credstore_env (dict): Override environment variables when calling the
             credential store process.
+        fast_requests (bool): Send simple ``GET`` requests to ``unix://``,
+            ``npipe://`` and ``ssh://`` servers with a lightweight HTTP
+            client, rather than through ``requests``. This makes calls like
+            :py:meth:`inspect_container` much faster, but the session's
+            hooks, cookies, authentication and mounted adapters are ignored
+            for those requests. Shortcut for
+            ``backend=LightweightBackend()``.
+        backend (:py:class:`~docker.transport.backend.TransportBackend`):
+            The backend that sends the HTTP requests of the client.
+            Default: a :py:class:`~docker.transport.backend.RequestsBackend`
+        coalesce_requests (bool): Merge identical ``GET`` requests made at
+            the same time by several threads into a single request to the
+            server. Each caller gets its own copy of the response, or of
+            the error. Streamed responses are never shared. See
+            :py:meth:`coalescing_stats`.
+        persist_api_version (bool): With ``version='auto'``, also save the
+            detected version in a file next to the Docker config file, so
+            that clients of other processes can reuse it instead of asking
+            the server. Versions are reused for an hour, or until the
+            daemon restarts. In any case, the version is reused by the
+            clients of this process.
         use_ssh_client (bool): If set to `True`, an ssh connection is made
             via shelling out to the ssh client. Ensure the ssh client is
             installed and configured on the host.
+        ssh_multiplexing (bool): With ``use_ssh_client``, open connections
+            as channels of a single master SSH session (OpenSSH's
+            ``ControlMaster``), instead of performing a full SSH handshake
+            for each of them. Not supported on Windows.
+        max_ssh_transports (int): Without ``use_ssh_client``, the maximum
+            number of SSH connections to open to the host. Connections to
+            the daemon are spread across them, so that more of them can be
+            open at once than the server allows sessions per SSH
+            connection. Default: 1
         max_pool_size (int): The maximum number of connections
             to save in the pool.
     """
@@ -102,11 +139,27 @@ class APIClient(
                                               'base_url',
                                               'timeout']
 
+    # The configuration files are only read on first use
+    _loaded_general_configs = None
+    _loaded_auth_configs = None
+    _loaded_proxy_configs = None
+    _loaded_config_headers = None
+    _proxy_base_url = None
+    credstore_env = None
+    # With version='auto', the version is only detected on first use
+    _api_version = None
+    _version_endpoint = None
+    _version_cache_path = None
+    _single_flight = None
+
     def __init__(self, base_url=None, version=None,
                  timeout=DEFAULT_TIMEOUT_SECONDS, tls=False,
                  user_agent=DEFAULT_USER_AGENT, num_pools=None,
                  credstore_env=None, use_ssh_client=False,
-                 max_pool_size=DEFAULT_MAX_POOL_SIZE):
+                 max_pool_size=DEFAULT_MAX_POOL_SIZE,
+                 ssh_multiplexing=False, max_ssh_transports=1,
+                 persist_api_version=False, fast_requests=False,
+                 backend=None, coalesce_requests=False):
         super(APIClient, self).__init__()
 
         if tls and not base_url:
@@ -118,27 +171,16 @@ class APIClient(
         self.timeout = timeout
         self.headers['User-Agent'] = user_agent
 
-        self._general_configs = config.load_general_config()
-
-        proxy_config = self._general_configs.get('proxies', {})
-        try:
-            proxies = proxy_config[base_url]
-        except KeyError:
-            proxies = proxy_config.get('default', {})
-
-        self._proxy_configs = ProxyConfig.from_dict(proxies)
-
-        self._auth_configs = auth.load_config(
-            config_dict=self._general_configs, credstore_env=credstore_env,
-        )
+        self._proxy_base_url = base_url
         self.credstore_env = credstore_env
+        self._url_templates = {}
 
         base_url = utils.parse_host(
             base_url, IS_WINDOWS_PLATFORM, tls=bool(tls)
         )
         # SSH has a different default for num_pools to all other adapters
-        num_pools = num_pools or DEFAULT_NUM_POOLS_SSH if \
-            base_url.startswith('ssh://') else DEFAULT_NUM_POOLS
+        num_pools = num_pools or DEFAULT_NUM_POOLS_SSH * max_ssh_transports \
+            if base_url.startswith('ssh://') else DEFAULT_NUM_POOLS
 
         if base_url.startswith('http+unix://'):
             self._custom_adapter = UnixHTTPAdapter(
@@ -156,26 +198,25 @@ class APIClient(
                     'The npipe:// protocol is only supported on Windows'
                 )
             try:
-                self._custom_adapter = NpipeHTTPAdapter(
-                    base_url, timeout, pool_connections=num_pools,
-                    max_pool_size=max_pool_size
-                )
-            except NameError:
+                from ..transport.npipeconn import NpipeHTTPAdapter
+            except ImportError:
                 raise DockerException(
                     'Install pypiwin32 package to enable npipe:// support'
                 )
+            self._custom_adapter = NpipeHTTPAdapter(
+                base_url, timeout, pool_connections=num_pools,
+                max_pool_size=max_pool_size
+            )
             self.mount('http+docker://', self._custom_adapter)
             self.base_url = 'http+docker://localnpipe'
         elif base_url.startswith('ssh://'):
-            try:
-                self._custom_adapter = SSHHTTPAdapter(
-                    base_url, timeout, pool_connections=num_pools,
-                    max_pool_size=max_pool_size, shell_out=use_ssh_client
-                )
-            except NameError:
-                raise DockerException(
-                    'Install paramiko package to enable ssh:// support'
-                )
+            from ..transport.sshconn import SSHHTTPAdapter
+            self._custom_adapter = SSHHTTPAdapter(
+                base_url, timeout, pool_connections=num_pools,
+                max_pool_size=max_pool_size, shell_out=use_ssh_client,
+                multiplexing=ssh_multiplexing,
+                max_transports=max_ssh_transports
+            )
             self.mount('http+docker://ssh', self._custom_adapter)
             self._unmount('http://', 'https://')
             self.base_url = 'http+docker://ssh'
@@ -189,25 +230,74 @@ class APIClient(
                 self.mount('https://', self._custom_adapter)
             self.base_url = base_url
 
-        # version detection needs to be after unix adapter mounting
+        if backend is None:
+            backend = LightweightBackend() if fast_requests \
+                else RequestsBackend()
+        self._backend = backend
+        if coalesce_requests:
+            self._single_flight = SingleFlight()
+
+        self._version_lock = threading.Lock()
         if version is None or (isinstance(
                                 version,
                                 six.string_types
                                 ) and version.lower() == 'auto'):
-            self._version = self._retrieve_server_version()
+            self._version_endpoint = base_url
+            if persist_api_version:
+                self._version_cache_path = version_cache.default_cache_path()
         else:
-            self._version = version
-        if not isinstance(self._version, six.string_types):
+            self._version = self._check_version(version)
+        fork.register(self)
+
+    def _reset_after_fork(self):
+        # The connections of the parent process can't be shared with it,
+        # but the configuration is kept
+        self._version_lock = threading.Lock()
+        for adapter in set(self.adapters.values()):
+            if isinstance(adapter, BaseHTTPAdapter):
+                adapter.reset_after_fork()
+            else:
+                six.get_unbound_function(BaseHTTPAdapter.reset_after_fork)(
+                    adapter
+                )
+        self._backend.reset_after_fork(self)
+
+    @property
+    def _version(self):
+        if self._api_version is None:
+            with self._version_lock:
+                if self._api_version is None:
+                    self._api_version = self._negotiate_version()
+        return self._api_version
+
+    @_version.setter
+    def _version(self, value):
+        self._api_version = value
+
+    def _check_version(self, version):
+        if not isinstance(version, six.string_types):
             raise DockerException(
                 'Version parameter must be a string or None. Found {0}'.format(
                     type(version).__name__
                 )
             )
-        if utils.version_lt(self._version, MINIMUM_DOCKER_API_VERSION):
+        if utils.version_lt(version, MINIMUM_DOCKER_API_VERSION):
             raise InvalidVersion(
                 'API versions below {} are no longer supported by this '
                 'library.'.format(MINIMUM_DOCKER_API_VERSION)
             )
+        return version
+
+    def _negotiate_version(self):
+        version = version_cache.get_api_version(
+            self._version_endpoint, self._version_cache_path
+        )
+        if version is None:
+            version = self._retrieve_server_version()
+            version_cache.set_api_version(
+                self._version_endpoint, version, self._version_cache_path
+            )
+        return self._check_version(version)
 
     def _retrieve_server_version(self):
         try:
@@ -222,6 +312,53 @@ class APIClient(
                 'Error while fetching server API version: {0}'.format(e)
             )
 
+    @property
+    def _general_configs(self):
+        if self._loaded_general_configs is None:
+            self._loaded_general_configs = config.load_general_config()
+        return self._loaded_general_configs
+
+    @_general_configs.setter
+    def _general_configs(self, value):
+        self._loaded_general_configs = value
+        self._loaded_config_headers = None
+
+    @property
+    def _config_headers(self):
+        if self._loaded_config_headers is None:
+            self._loaded_config_headers = dict(
+                self._general_configs.get('HttpHeaders') or {}
+            )
+        return self._loaded_config_headers
+
+    @property
+    def _auth_configs(self):
+        if self._loaded_auth_configs is None:
+            self._loaded_auth_configs = auth.load_config(
+                config_dict=self._general_configs,
+                credstore_env=self.credstore_env,
+            )
+        return self._loaded_auth_configs
+
+    @_auth_configs.setter
+    def _auth_configs(self, value):
+        self._loaded_auth_configs = value
+
+    @property
+    def _proxy_configs(self):
+        if self._loaded_proxy_configs is None:
+            proxy_config = self._general_configs.get('proxies', {})
+            try:
+                proxies = proxy_config[self._proxy_base_url]
+            except KeyError:
+                proxies = proxy_config.get('default', {})
+            self._loaded_proxy_configs = ProxyConfig.from_dict(proxies)
+        return self._loaded_proxy_configs
+
+    @_proxy_configs.setter
+    def _proxy_configs(self, value):
+        self._loaded_proxy_configs = value
+
     def _set_request_timeout(self, kwargs):
         """Prepare the kwargs for an HTTP request by inserting the timeout
         parameter, if not already present."""
@@ -230,19 +367,39 @@ class APIClient(
 
     @update_headers
     def _post(self, url, **kwargs):
-        return self.post(url, **self._set_request_timeout(kwargs))
+        return self._backend.send(
+            self, 'POST', url, **self._set_request_timeout(kwargs)
+        )
 
     @update_headers
     def _get(self, url, **kwargs):
-        return self.get(url, **self._set_request_timeout(kwargs))
+        kwargs = self._set_request_timeout(kwargs)
+        if self._single_flight is None or kwargs.get('stream'):
+            return self._backend.send(self, 'GET', url, **kwargs)
+        # Only the checked and fully read response is shared: each caller
+        # gets its own copy of it, and decodes it itself.
+        key = (url, json.dumps(kwargs, sort_keys=True, default=repr))
+        response = self._single_flight.do(
+            key, partial(self._get_checked, url, kwargs)
+        )
+        return _copy_response(response)
+
+    def _get_checked(self, url, kwargs):
+        response = self._backend.send(self, 'GET', url, **kwargs)
+        self._raise_for_status(response)
+        return response
 
     @update_headers
     def _put(self, url, **kwargs):
-        return self.put(url, **self._set_request_timeout(kwargs))
+        return self._backend.send(
+            self, 'PUT', url, **self._set_request_timeout(kwargs)
+        )
 
     @update_headers
     def _delete(self, url, **kwargs):
-        return self.delete(url, **self._set_request_timeout(kwargs))
+        return self._backend.send(
+            self, 'DELETE', url, **self._set_request_timeout(kwargs)
+        )
 
     def _url(self, pathfmt, *args, **kwargs):
         for arg in args:
@@ -252,15 +409,21 @@ class APIClient(
                     'instead'.format(arg, type(arg))
                 )
 
-        quote_f = partial(six.moves.urllib.parse.quote, safe="/:")
-        args = map(quote_f, args)
-
         if kwargs.get('versioned_api', True):
-            return '{0}/v{1}{2}'.format(
-                self.base_url, self._version, pathfmt.format(*args)
-            )
+            key = (self.base_url, self._version, pathfmt)
         else:
-            return '{0}{1}'.format(self.base_url, pathfmt.format(*args))
+            key = (self.base_url, None, pathfmt)
+        try:
+            template = self._url_templates[key]
+        except KeyError:
+            if key[1] is None:
+                prefix = key[0]
+            else:
+                prefix = '{0}/v{1}'.format(key[0], key[1])
+            template = prefix.replace('{', '{{').replace('}', '}}') + pathfmt
+            self._url_templates[key] = template
+
+        return template.format(*[_quote(arg) for arg in args])
 
     def _raise_for_status(self, response):
         """Raises stored :class:`APIError`, if one occurred."""
@@ -312,20 +475,12 @@ class APIClient(
         return self._create_websocket_connection(full_url)
 
     def _create_websocket_connection(self, url):
+        import websocket
         return websocket.create_connection(url)
 
     def _get_raw_response_socket(self, response):
         self._raise_for_status(response)
-        if self.base_url == "http+docker://localnpipe":
-            sock = response.raw._fp.fp.raw.sock
-        elif self.base_url.startswith('http+docker://ssh'):
-            sock = response.raw._fp.fp.channel
-        elif six.PY3:
-            sock = response.raw._fp.fp.raw
-            if self.base_url.startswith("https://"):
-                sock = sock._sock
-        else:
-            sock = response.raw._fp.fp._sock
+        sock = self._backend.get_socket(self, response)
         try:
             # Keep a reference to the response to stop it being garbage
             # collected. If the response is garbage collected, it will
@@ -341,20 +496,18 @@ class APIClient(
     def _stream_helper(self, response, decode=False):
         """Generator for data coming from a chunked-encoded HTTP response."""
 
-        if response.raw._fp.chunked:
+        if self._backend.is_chunked(self, response):
             if decode:
-                for chunk in json_stream(self._stream_helper(response, False)):
+                # Chunk boundaries don't matter to the JSON decoder, so all
+                # the chunks returned by a read are decoded at once
+                chunks = self._backend.iter_chunks(
+                    self, response, coalesce=True
+                )
+                for chunk in json_stream(chunks):
                     yield chunk
             else:
-                reader = response.raw
-                while not reader.closed:
-                    # this read call will block until we get a chunk
-                    data = reader.read(1)
-                    if not data:
-                        break
-                    if reader._fp.chunk_left:
-                        data += reader.read(reader._fp.chunk_left)
-                    yield data
+                for chunk in self._backend.iter_chunks(self, response):
+                    yield chunk
         else:
             # Response isn't chunked, meaning we probably
             # encountered an error immediately
@@ -385,16 +538,10 @@ class APIClient(
         socket = self._get_raw_response_socket(response)
         self._disable_socket_timeout(socket)
 
-        while True:
-            header = response.raw.read(STREAM_HEADER_SIZE_BYTES)
-            if not header:
-                break
-            _, length = struct.unpack('>BxxxL', header)
-            if not length:
-                continue
-            data = response.raw.read(length)
-            if not data:
-                break
+        chunks = self._backend.iter_raw(
+            self, response, DEFAULT_FRAME_BUFFER_SIZE
+        )
+        for _, data in read_frames(readinto_from_chunks(chunks)):
             yield data
 
     def _stream_raw_result(self, response, chunk_size=1, decode=True):
@@ -477,6 +624,59 @@ class APIClient(
         for proto in args:
             self.adapters.pop(proto)
 
+    def close(self):
+        """
+        Close the connections of the client. They are opened again if the
+        client is used afterwards.
+        """
+        super(APIClient, self).close()
+        self._backend.close(self)
+
+    def coalescing_stats(self):
+        """
+        Return statistics about the ``GET`` requests merged with
+        ``coalesce_requests``.
+
+        Returns:
+            (dict): ``calls``, the number of requests sent to the server,
+            and ``coalesced``, the number of requests that were saved by
+            sharing the response of an identical request in progress.
+
+        Raises:
+            :py:class:`docker.errors.DockerException`
+                If the client doesn't coalesce requests.
+        """
+        if self._single_flight is None:
+            raise DockerException(
+                'The client was not created with coalesce_requests=True'
+            )
+        return self._single_flight.stats()
+
+    def prewarm(self, n):
+        """
+        Open connections to the server ahead of time, so that a burst of up
+        to ``n`` requests doesn't wait for new connections. ``n`` is capped
+        by the ``max_pool_size`` of the client. Only supported with the
+        ``unix://`` protocol.
+
+        Args:
+            n (int): The number of connections to keep open.
+
+        Returns:
+            (int): The number of connections opened.
+
+        Raises:
+            :py:class:`docker.errors.DockerException`
+                If the protocol doesn't support it.
+        """
+        adapter = getattr(self, '_custom_adapter', None)
+        if not hasattr(adapter, 'prewarm'):
+            raise DockerException(
+                'Pre-warming connections is only supported with the unix:// '
+                'protocol'
+            )
+        return adapter.prewarm(self.base_url, n)
+
     def get_adapter(self, url):
         try:
             return super(APIClient, self).get_adapter(url)
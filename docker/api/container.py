@@ -1,15 +1,27 @@
 from datetime import datetime
+from functools import partial
+import tempfile
+import threading
+import time
 
 import six
 
 from .. import errors
 from .. import utils
-from ..constants import DEFAULT_DATA_CHUNK_SIZE
+from ..constants import (
+    DEFAULT_DATA_CHUNK_SIZE, DEFAULT_FRAME_BUFFER_SIZE,
+    DEFAULT_MAX_LOG_LINE_LENGTH, DEFAULT_SINK_BUFFER_SIZE
+)
 from ..types import CancellableStream
 from ..types import ContainerConfig
 from ..types import EndpointConfig
 from ..types import HostConfig
 from ..types import NetworkingConfig
+from ..utils.logs import LogFollower, iter_lines, parse_timestamp
+from ..utils.stats import StatsDecoder, iter_stats
+from ..utils.socket import (
+    STDOUT, read_frames, readinto_from_chunks, write_frames
+)
 
 
 class ContainerApiMixin(object):
@@ -831,6 +843,20 @@ class ContainerApiMixin(object):
         """
         if follow is None:
             follow = stream
+        params = self._logs_params(
+            stdout, stderr, timestamps, tail, since, follow, until
+        )
+        url = self._url("/containers/{0}/logs", container)
+        res = self._get(url, params=params, stream=stream)
+        output = self._get_result(container, stream, res)
+
+        if stream:
+            return CancellableStream(output, res)
+        else:
+            return output
+
+    def _logs_params(self, stdout, stderr, timestamps, tail, since, follow,
+                     until):
         params = {'stderr': stderr and 1 or 0,
                   'stdout': stdout and 1 or 0,
                   'timestamps': timestamps and 1 or 0,
@@ -865,15 +891,314 @@ class ContainerApiMixin(object):
                     'until value should be datetime or positive int, '
                     'not {}'.format(type(until))
                 )
+        return params
+
+    @utils.check_resource('container')
+    def follow_logs(self, container, stdout=True, stderr=True, since=None,
+                    tail='all', checkpoint=None, checkpoint_path=None,
+                    checkpoint_interval=1, max_retries=None,
+                    backoff_factor=0.5, max_backoff=30):
+        """
+        Follow the logs of a container, line by line, reconnecting when the
+        connection to the server is lost, until the container stops.
+
+        Lines are requested with their timestamps, which are used to resume
+        from the last line delivered, without repeating the lines that were
+        already delivered. The position reached can be saved, to resume
+        from it in another process.
+
+        Args:
+            container (str): The container to get logs from
+            stdout (bool): Get ``STDOUT``. Default ``True``
+            stderr (bool): Get ``STDERR``. Default ``True``
+            since (datetime or int): Show logs since a given datetime or
+                integer epoch (in seconds), if there's no checkpoint
+            tail (str or int): Output specified number of lines at the end of
+                logs, if there's no checkpoint. Default ``all``
+            checkpoint (dict): Resume from the
+                :py:attr:`~docker.utils.logs.LogFollower.checkpoint` of
+                another follower.
+            checkpoint_path (str): Resume from the checkpoint saved in this
+                file, if it exists, and save the checkpoint to it as lines
+                are delivered, and when the follower stops.
+            checkpoint_interval (float): Save the checkpoint at most once
+                in this many seconds. ``0`` saves it after every line.
+                Default ``1``
+            max_retries (int): Give up after this many failed attempts in a
+                row to reconnect. Default: retry forever
+            backoff_factor (float): Wait this many seconds before the second
+                attempt to reconnect, then twice longer before each new
+                attempt. Default ``0.5``
+            max_backoff (float): The longest wait between two attempts, in
+                seconds. Default ``30``
+
+        Returns:
+            (:py:class:`~docker.utils.logs.LogFollower`): An iterable of
+            :py:class:`~docker.utils.logs.LogLine`, that can be closed from
+            another thread.
+
+        Raises:
+            :py:class:`docker.errors.APIError`
+                If the server returns an error other than a server error.
+        """
+        def is_running():
+            return self.inspect_container(container)['State']['Running']
+
+        return LogFollower(
+            partial(self._log_frames, container, stdout, stderr), is_running,
+            since=since, tail=tail, checkpoint=checkpoint,
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=checkpoint_interval, max_retries=max_retries,
+            backoff_factor=backoff_factor, max_backoff=max_backoff
+        )
+
+    @utils.check_resource('container')
+    def log_lines(self, container, stdout=True, stderr=True, timestamps=False,
+                  tail='all', since=None, follow=False, until=None,
+                  max_line_length=DEFAULT_MAX_LOG_LINE_LENGTH, slices=None):
+        """
+        Get the logs of a container line by line, as they are received,
+        along with the stream they were written to.
+
+        Args:
+            container (str): The container to get logs from
+            stdout (bool): Get ``STDOUT``. Default ``True``
+            stderr (bool): Get ``STDERR``. Default ``True``
+            timestamps (bool): Get the timestamps of the lines, as UNIX
+                times. Default ``False``
+            tail (str or int): Output specified number of lines at the end of
+                logs. Either an integer of number of lines or the string
+                ``all``. Default ``all``
+            since (datetime or int): Show logs since a given datetime or
+                integer epoch (in seconds)
+            follow (bool): Follow log output. Default ``False``
+            until (datetime or int): Show logs that occurred before the given
+                datetime or integer epoch (in seconds)
+            max_line_length (int): Split longer lines in several lines, to
+                bound the memory used. Default: 1MB
+            slices (int): Download the logs in this number of time slices,
+                concurrently, over separate connections. Only the download
+                is concurrent: the logs are still decoded in order, by the
+                calling thread. Incompatible with ``tail`` and ``follow``.
+                Requires API version 1.35 or later. Default ``None``: a
+                single request
+
+        Returns:
+            (generator): ``(stream, line)`` tuples, or
+            ``(stream, timestamp, line)`` tuples with ``timestamps``.
+            ``stream`` is ``1`` for ``STDOUT`` and ``2`` for ``STDERR``, and
+            lines are bytes that end with their line break, unless they were
+            split or were the last of the logs.
 
+        Raises:
+            :py:class:`docker.errors.APIError`
+                If the server returns an error.
+        """
+        frames = self._log_frames(
+            container, stdout, stderr, since, tail, follow,
+            timestamps=timestamps, until=until, slices=slices
+        )
+        return iter_lines(
+            frames, max_line_length=max_line_length,
+            parse_timestamps=timestamps
+        )
+
+    @utils.check_resource('container')
+    def logs_to(self, container, stdout_file, stderr_file, timestamps=False,
+                tail='all', since=None, follow=False, until=None,
+                buffer_size=DEFAULT_SINK_BUFFER_SIZE, slices=None):
+        """
+        Write the logs of a container to files, demultiplexing them as they
+        are read from the connection. Memory use doesn't depend on the size
+        of the logs, which never are in memory as a whole.
+
+        Args:
+            container (str): The container to get logs from
+            stdout_file: A file object opened in binary mode, to write
+                ``STDOUT`` to, or ``None`` to skip ``STDOUT``
+            stderr_file: A file object opened in binary mode, to write
+                ``STDERR`` to, or ``None`` to skip ``STDERR``. It may be the
+                same as ``stdout_file``. The logs of containers with a TTY
+                are all written to ``stdout_file``.
+            timestamps (bool): Show timestamps. Default ``False``
+            tail (str or int): Output specified number of lines at the end of
+                logs. Either an integer of number of lines or the string
+                ``all``. Default ``all``
+            since (datetime or int): Show logs since a given datetime or
+                integer epoch (in seconds)
+            follow (bool): Follow log output. Default ``False``
+            until (datetime or int): Show logs that occurred before the given
+                datetime or integer epoch (in seconds)
+            buffer_size (int): Size of the write buffer of each file, in
+                bytes. Default: 1MB
+            slices (int): Download the logs in this number of time slices,
+                concurrently, over separate connections. Only the download
+                is concurrent: the logs are still decoded in order, by the
+                calling thread. Incompatible with ``tail`` and ``follow``.
+                Requires API version 1.35 or later. Default ``None``: a
+                single request
+
+        Returns:
+            (tuple): The number of bytes written for ``STDOUT`` and
+            ``STDERR``.
+
+        Raises:
+            :py:class:`docker.errors.APIError`
+                If the server returns an error.
+        """
+        frames = self._log_frames(
+            container, stdout_file is not None, stderr_file is not None,
+            since, tail, follow, timestamps=timestamps, until=until,
+            copy=False, slices=slices
+        )
+        try:
+            return write_frames(
+                frames, stdout_file, stderr_file, buffer_size=buffer_size
+            )
+        finally:
+            frames.close()
+
+    def _log_frames(self, container, stdout, stderr, since, tail, follow,
+                    timestamps=True, until=None, copy=True, slices=None):
+        # The (stream, data) frames of the logs
+        params = self._logs_params(
+            stdout, stderr, timestamps, tail, since, follow, until
+        )
+        if slices is not None and slices > 1:
+            if follow or params['tail'] != 'all':
+                raise errors.InvalidArgument(
+                    'slices cannot be used with tail or follow'
+                )
+            return self._sliced_log_frames(container, params, slices, copy)
+        is_tty = self._check_is_tty(container)
         url = self._url("/containers/{0}/logs", container)
-        res = self._get(url, params=params, stream=stream)
-        output = self._get_result(container, stream, res)
+        res = self._get(url, params=params, stream=True)
+        self._raise_for_status(res)
+        return self._log_response_frames(res, is_tty, copy)
 
-        if stream:
-            return CancellableStream(output, res)
+    def _log_response_frames(self, res, is_tty, copy):
+        self._disable_socket_timeout(self._get_raw_response_socket(res))
+        chunks = self._backend.iter_raw(self, res, DEFAULT_FRAME_BUFFER_SIZE)
+        if is_tty:
+            frames = ((STDOUT, chunk) for chunk in chunks)
         else:
-            return output
+            frames = read_frames(readinto_from_chunks(chunks), copy=copy)
+        return CancellableStream(frames, res)
+
+    def _log_slices(self, params, created, slices):
+        # Split the time range of the logs in slices of whole seconds, with
+        # bounds that don't overlap: the Engine includes the logs written at
+        # both since and until
+        if utils.version_lt(self._version, '1.35'):
+            raise errors.InvalidVersion(
+                'slices are not supported for API version < 1.35'
+            )
+        start = params.get('since') or created
+        end = params.get('until') or int(time.time()) + 1
+        slices = max(1, min(slices, end - start))
+        bounds = [
+            start + (end - start) * i // slices for i in range(slices + 1)
+        ]
+        result = []
+        for i in range(slices):
+            slice_params = dict(params)
+            if i:
+                slice_params['since'] = bounds[i]
+            if i < slices - 1:
+                slice_params['until'] = '{0}.999999999'.format(
+                    bounds[i + 1] - 1
+                )
+            result.append(slice_params)
+        return result
+
+    def _sliced_log_frames(self, container, params, slices, copy):
+        # The slices after the first one are downloaded to temporary files
+        # by a pool of threads while the first one is read. The frames of
+        # all the slices are decoded by the caller's thread.
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            ThreadPoolExecutor = None
+        info = self.inspect_container(container)
+        is_tty = info['Config']['Tty']
+        created = parse_timestamp(info['Created'])[0]
+        url = self._url("/containers/{0}/logs", container)
+        slice_params = self._log_slices(params, created, slices)
+        stop = threading.Event()
+
+        def open_slice(params):
+            res = self._get(url, params=params, stream=True)
+            self._raise_for_status(res)
+            return res
+
+        def download(params):
+            res = open_slice(params)
+            fp = tempfile.TemporaryFile()
+            try:
+                chunks = self._backend.iter_raw(
+                    self, res, DEFAULT_SINK_BUFFER_SIZE
+                )
+                for chunk in chunks:
+                    if stop.is_set():
+                        break
+                    fp.write(chunk)
+                fp.seek(0)
+            except Exception:
+                fp.close()
+                raise
+            finally:
+                res.close()
+            return fp
+
+        def read_slice(fp):
+            with fp:
+                if is_tty:
+                    data = fp.read(DEFAULT_FRAME_BUFFER_SIZE)
+                    while data:
+                        yield STDOUT, data
+                        data = fp.read(DEFAULT_FRAME_BUFFER_SIZE)
+                else:
+                    for frame in read_frames(fp.readinto, copy=copy):
+                        yield frame
+
+        def read_stream(params):
+            stream = self._log_response_frames(
+                open_slice(params), is_tty, copy
+            )
+            try:
+                for frame in stream:
+                    yield frame
+            finally:
+                stream.close()
+
+        def iter_frames():
+            if ThreadPoolExecutor is None or len(slice_params) == 1:
+                for params in slice_params:
+                    for frame in read_stream(params):
+                        yield frame
+                return
+
+            executor = ThreadPoolExecutor(max_workers=len(slice_params) - 1)
+            futures = [
+                executor.submit(download, params)
+                for params in slice_params[1:]
+            ]
+            try:
+                for frame in read_stream(slice_params[0]):
+                    yield frame
+                for future in futures:
+                    for frame in read_slice(future.result()):
+                        yield frame
+            finally:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                executor.shutdown()
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None:
+                        future.result().close()
+
+        return iter_frames()
 
     @utils.check_resource('container')
     def pause(self, container):
@@ -942,7 +1267,8 @@ class ContainerApiMixin(object):
         return h_ports
 
     @utils.check_resource('container')
-    def put_archive(self, container, path, data):
+    def put_archive(self, container, path, data, gzip=False, gzip_level=9,
+                    gzip_workers=None):
         """
         Insert a file or folder in an existing container using a tar archive as
         source.
@@ -952,6 +1278,11 @@ class ContainerApiMixin(object):
             path (str): Path inside the container where the file(s) will be
                 extracted. Must exist.
             data (bytes): tar data to be extracted
+            gzip (bool): Compress the data with gzip before sending it.
+                Default: ``False``
+            gzip_level (int): gzip compression level. Default: 9
+            gzip_workers (int): Number of threads compressing the data.
+                Default: the number of CPUs
 
         Returns:
             (bool): True if the call succeeds.
@@ -962,6 +1293,8 @@ class ContainerApiMixin(object):
         """
         params = {'path': path}
         url = self._url('/containers/{0}/archive', container)
+        if gzip:
+            data = utils.gzip_compress(data, gzip_level, gzip_workers)
         res = self._put(url, params=params, data=data)
         self._raise_for_status(res)
         return res.status_code == 200
@@ -1111,7 +1444,7 @@ class ContainerApiMixin(object):
         self._raise_for_status(res)
 
     @utils.check_resource('container')
-    def stats(self, container, decode=None, stream=True):
+    def stats(self, container, decode=None, stream=True, compact=False):
         """
         Stream statistics for a specific container. Similar to the
         ``docker stats`` command.
@@ -1123,6 +1456,10 @@ class ContainerApiMixin(object):
                 False by default.
             stream (bool): If set to false, only the current stats will be
                 returned instead of a stream. True by default.
+            compact (bool): Reduce the stats to the numbers shown by
+                ``docker stats``, as
+                :py:class:`~docker.utils.stats.StatsSample` records, with
+                the I/O since the previous sample. False by default.
 
         Raises:
             :py:class:`docker.errors.APIError`
@@ -1130,6 +1467,14 @@ class ContainerApiMixin(object):
 
         """
         url = self._url("/containers/{0}/stats", container)
+        if compact:
+            if not stream:
+                return StatsDecoder().decode(self._result(
+                    self._get(url, params={'stream': False}), json=True
+                ))
+            return iter_stats(
+                self._stream_helper(self._get(url, stream=True), decode=True)
+            )
         if stream:
             return self._stream_helper(self._get(url, stream=True),
                                        decode=decode)
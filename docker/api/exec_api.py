@@ -2,6 +2,8 @@ import six
 
 from .. import errors
 from .. import utils
+from ..utils.logs import iter_lines
+from ..utils.socket import frames_iter, frames_iter_no_tty, write_frames
 
 
 class ExecApiMixin(object):
@@ -118,7 +120,7 @@ class ExecApiMixin(object):
 
     @utils.check_resource('exec_id')
     def exec_start(self, exec_id, detach=False, tty=False, stream=False,
-                   socket=False, demux=False):
+                   socket=False, demux=False, lines=False, sink=None):
         """
         Start a previously set up exec instance.
 
@@ -131,6 +133,15 @@ class ExecApiMixin(object):
             socket (bool): Return the connection socket to allow custom
                 read/write operations.
             demux (bool): Return stdout and stderr separately
+            lines (bool): With ``stream``, yield the output line by line, as
+                ``(stream, line)`` tuples, where ``stream`` is ``1`` for
+                stdout and ``2`` for stderr. Longer lines than
+                ``DEFAULT_MAX_LOG_LINE_LENGTH`` are split.
+            sink (file or tuple): Write the output to a file object opened
+                in binary mode, or stdout and stderr to the files of a
+                ``(stdout, stderr)`` tuple, either of which may be ``None``
+                to discard the stream. The output is demultiplexed as it is
+                read from the socket, and is never in memory as a whole.
 
         Returns:
 
@@ -138,7 +149,8 @@ class ExecApiMixin(object):
             yielding response chunks. If ``socket=True``, a socket object for
             the connection. A string containing response data otherwise. If
             ``demux=True``, a tuple with two elements of type byte: stdout and
-            stderr.
+            stderr. With ``sink``, a tuple with the number of bytes written
+            for stdout and stderr.
 
         Raises:
             :py:class:`docker.errors.APIError`
@@ -166,4 +178,19 @@ class ExecApiMixin(object):
             return self._result(res)
         if socket:
             return self._get_raw_response_socket(res)
+        if sink is not None:
+            stdout, stderr = sink if isinstance(sink, tuple) else (sink, sink)
+            sock = self._get_raw_response_socket(res)
+            if tty:
+                frames = frames_iter(sock, tty)
+            else:
+                frames = frames_iter_no_tty(sock, copy=False)
+            try:
+                return write_frames(frames, stdout, stderr)
+            finally:
+                res.close()
+        if stream and lines:
+            return iter_lines(
+                frames_iter(self._get_raw_response_socket(res), tty)
+            )
         return self._read_from_socket(res, stream, tty=tty, demux=demux)
@@ -1,15 +1,5 @@
 from .api.client import APIClient
 from .constants import (DEFAULT_TIMEOUT_SECONDS, DEFAULT_MAX_POOL_SIZE)
-from .models.configs import ConfigCollection
-from .models.containers import ContainerCollection
-from .models.images import ImageCollection
-from .models.networks import NetworkCollection
-from .models.nodes import NodeCollection
-from .models.plugins import PluginCollection
-from .models.secrets import SecretCollection
-from .models.services import ServiceCollection
-from .models.swarm import Swarm
-from .models.volumes import VolumeCollection
 from .utils import kwargs_from_env
 
 
@@ -26,7 +16,8 @@ class DockerClient(object):
         base_url (str): URL to the Docker server. For example,
             ``unix:///var/run/docker.sock`` or ``tcp://127.0.0.1:1234``.
         version (str): The version of the API to use. Set to ``auto`` to
-            automatically detect the server's version. Default: ``1.35``
+            automatically detect the server's version, on the first request
+            to the server. Default: ``1.35``
         timeout (int): Default timeout for API calls, in seconds.
         tls (bool or :py:class:`~docker.tls.TLSConfig`): Enable TLS. Pass
             ``True`` to enable it with default options, or pass a
@@ -35,9 +26,29 @@ class DockerClient(object):
         user_agent (str): Set a custom user agent for requests to the server.
         credstore_env (dict): Override environment variables when calling the
             credential store process.
+        persist_api_version (bool): With ``version='auto'``, also save the
+            detected version next to the Docker config file, so that
+            clients of other processes can reuse it instead of asking the
+            server.
+        fast_requests (bool): Send simple ``GET`` requests to ``unix://``,
+            ``npipe://`` and ``ssh://`` servers with a lightweight HTTP
+            client, rather than through ``requests``. Session hooks,
+            cookies and authentication are ignored for those requests.
+        coalesce_requests (bool): Merge identical ``GET`` requests made at
+            the same time by several threads into a single request to the
+            server.
         use_ssh_client (bool): If set to `True`, an ssh connection is made
             via shelling out to the ssh client. Ensure the ssh client is
             installed and configured on the host.
+        ssh_multiplexing (bool): With ``use_ssh_client``, open connections
+            as channels of a single master SSH session (OpenSSH's
+            ``ControlMaster``), instead of performing a full SSH handshake
+            for each of them. Not supported on Windows.
+        max_ssh_transports (int): Without ``use_ssh_client``, the maximum
+            number of SSH connections to open to the host. Connections to
+            the daemon are spread across them, so that more of them can be
+            open at once than the server allows sessions per SSH
+            connection. Default: 1
         max_pool_size (int): The maximum number of connections
             to save in the pool.
     """
@@ -77,9 +88,20 @@ class DockerClient(object):
                 from. Default: the value of ``os.environ``
             credstore_env (dict): Override environment variables when calling
                 the credential store process.
+            persist_api_version (bool): With ``version='auto'``, also save
+                the detected version next to the Docker config file, for
+                other processes to reuse.
+            fast_requests (bool): Send simple ``GET`` requests with a
+                lightweight HTTP client, rather than through ``requests``.
+            coalesce_requests (bool): Merge identical concurrent ``GET``
+                requests into a single request to the server.
             use_ssh_client (bool): If set to `True`, an ssh connection is
                 made via shelling out to the ssh client. Ensure the ssh
                 client is installed and configured on the host.
+            ssh_multiplexing (bool): With ``use_ssh_client``, open
+                connections as channels of a single master SSH session.
+            max_ssh_transports (int): Without ``use_ssh_client``, the
+                maximum number of SSH connections to open to the host.
 
         Example:
 
@@ -89,17 +111,7 @@ class DockerClient(object):
         .. _`SSL version`:
             https://docs.python.org/3.5/library/ssl.html#ssl.PROTOCOL_TLSv1
         """
-        timeout = kwargs.pop('timeout', DEFAULT_TIMEOUT_SECONDS)
-        max_pool_size = kwargs.pop('max_pool_size', DEFAULT_MAX_POOL_SIZE)
-        version = kwargs.pop('version', None)
-        use_ssh_client = kwargs.pop('use_ssh_client', False)
-        return cls(
-            timeout=timeout,
-            max_pool_size=max_pool_size,
-            version=version,
-            use_ssh_client=use_ssh_client,
-            **kwargs_from_env(**kwargs)
-        )
+        return cls(**_client_kwargs_from_env(kwargs))
 
     # Resources
     @property
@@ -108,6 +120,7 @@ class DockerClient(object):
         An object for managing configs on the server. See the
         :doc:`configs documentation <configs>` for full details.
         """
+        from .models.configs import ConfigCollection
         return ConfigCollection(client=self)
 
     @property
@@ -116,6 +129,7 @@ class DockerClient(object):
         An object for managing containers on the server. See the
         :doc:`containers documentation <containers>` for full details.
         """
+        from .models.containers import ContainerCollection
         return ContainerCollection(client=self)
 
     @property
@@ -124,6 +138,7 @@ class DockerClient(object):
         An object for managing images on the server. See the
         :doc:`images documentation <images>` for full details.
         """
+        from .models.images import ImageCollection
         return ImageCollection(client=self)
 
     @property
@@ -132,6 +147,7 @@ class DockerClient(object):
         An object for managing networks on the server. See the
         :doc:`networks documentation <networks>` for full details.
         """
+        from .models.networks import NetworkCollection
         return NetworkCollection(client=self)
 
     @property
@@ -140,6 +156,7 @@ class DockerClient(object):
         An object for managing nodes on the server. See the
         :doc:`nodes documentation <nodes>` for full details.
         """
+        from .models.nodes import NodeCollection
         return NodeCollection(client=self)
 
     @property
@@ -148,6 +165,7 @@ class DockerClient(object):
         An object for managing plugins on the server. See the
         :doc:`plugins documentation <plugins>` for full details.
         """
+        from .models.plugins import PluginCollection
         return PluginCollection(client=self)
 
     @property
@@ -156,6 +174,7 @@ class DockerClient(object):
         An object for managing secrets on the server. See the
         :doc:`secrets documentation <secrets>` for full details.
         """
+        from .models.secrets import SecretCollection
         return SecretCollection(client=self)
 
     @property
@@ -164,6 +183,7 @@ class DockerClient(object):
         An object for managing services on the server. See the
         :doc:`services documentation <services>` for full details.
         """
+        from .models.services import ServiceCollection
         return ServiceCollection(client=self)
 
     @property
@@ -172,6 +192,7 @@ class DockerClient(object):
         An object for managing a swarm on the server. See the
         :doc:`swarm documentation <swarm>` for full details.
         """
+        from .models.swarm import Swarm
         return Swarm(client=self)
 
     @property
@@ -180,6 +201,7 @@ class DockerClient(object):
         An object for managing volumes on the server. See the
         :doc:`volumes documentation <volumes>` for full details.
         """
+        from .models.volumes import VolumeCollection
         return VolumeCollection(client=self)
 
     # Top-level methods
@@ -222,3 +244,29 @@ class DockerClient(object):
 
 
 from_env = DockerClient.from_env
+
+
+def _client_kwargs_from_env(kwargs):
+    kwargs = dict(kwargs)
+    timeout = kwargs.pop('timeout', DEFAULT_TIMEOUT_SECONDS)
+    max_pool_size = kwargs.pop('max_pool_size', DEFAULT_MAX_POOL_SIZE)
+    version = kwargs.pop('version', None)
+    use_ssh_client = kwargs.pop('use_ssh_client', False)
+    ssh_multiplexing = kwargs.pop('ssh_multiplexing', False)
+    max_ssh_transports = kwargs.pop('max_ssh_transports', 1)
+    persist_api_version = kwargs.pop('persist_api_version', False)
+    fast_requests = kwargs.pop('fast_requests', False)
+    coalesce_requests = kwargs.pop('coalesce_requests', False)
+    params = kwargs_from_env(**kwargs)
+    params.update(
+        timeout=timeout,
+        max_pool_size=max_pool_size,
+        version=version,
+        use_ssh_client=use_ssh_client,
+        ssh_multiplexing=ssh_multiplexing,
+        max_ssh_transports=max_ssh_transports,
+        persist_api_version=persist_api_version,
+        fast_requests=fast_requests,
+        coalesce_requests=coalesce_requests,
+    )
+    return params
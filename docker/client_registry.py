@@ -0,0 +1,211 @@
+import threading
+
+import six
+
+try:
+    from inspect import getfullargspec as getargspec
+except ImportError:  # Python 2
+    from inspect import getargspec
+
+from . import errors
+from .api.client import APIClient
+from .client import DockerClient, _client_kwargs_from_env
+from .constants import IS_WINDOWS_PLATFORM
+from .context import ContextAPI
+from .tls import TLSConfig
+from .utils import fork, parse_host
+
+
+class ClientRegistry(object):
+    """
+    A registry of clients shared by all the code of a process.
+
+    Clients are keyed by the daemon they connect to, their TLS
+    configuration, API version and other options: asking twice for a client
+    with the same parameters returns the same :py:class:`DockerClient`,
+    sharing its connection pools. Configuration files are only read when
+    they are first needed, and ``version='auto'`` is only negotiated once
+    per client.
+
+    Shared clients are safe to use from several threads. Closing one closes
+    its connections, which are opened again on next use.
+
+    Example:
+
+        >>> from docker.client_registry import ClientRegistry
+        >>> registry = ClientRegistry()
+        >>> client = registry.client(version='1.41')
+        >>> client is registry.client(version='1.41')
+        True
+    """
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _reset_after_fork(self):
+        # The clients reset their own connections. The threads creating
+        # clients weren't forked, so their entries are dropped.
+        self._lock = threading.Lock()
+        self._clients = dict(
+            (key, entry) for key, entry in six.iteritems(self._clients)
+            if entry.client is not None
+        )
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def client(self, base_url=None, version=None, tls=False, context=None,
+               **kwargs):
+        """
+        Return the shared :py:class:`DockerClient` for these parameters,
+        creating it if needed.
+
+        Args:
+            base_url (str): URL to the Docker server.
+            version (str): The version of the API to use.
+            tls (bool or :py:class:`~docker.tls.TLSConfig`): TLS options.
+            context (str): The name of a Docker context to connect to,
+                instead of ``base_url`` and ``tls``.
+            **kwargs: Other arguments to :py:class:`DockerClient`.
+
+        Raises:
+            :py:class:`docker.errors.ContextNotFound`
+                If the context doesn't exist.
+        """
+        if context is not None:
+            ctx = ContextAPI.get_context(context)
+            if not ctx:
+                raise errors.ContextNotFound(context)
+            base_url = ctx.Host
+            tls = ctx.TLSConfig or False
+
+        kwargs.update(base_url=base_url, version=version, tls=tls)
+        key = _client_key(kwargs)
+        while True:
+            with self._lock:
+                entry = self._clients.get(key)
+                if entry is None:
+                    entry = self._clients[key] = _ClientEntry()
+                    break
+            # Another thread is creating the client
+            entry.ready.wait()
+            if entry.client is not None:
+                return entry.client
+
+        # Creating a client can connect to the daemon, so it's done outside
+        # the lock, while other threads wait on the entry for this key only
+        try:
+            entry.client = DockerClient(**kwargs)
+        finally:
+            if entry.client is None:
+                with self._lock:
+                    if self._clients.get(key) is entry:
+                        del self._clients[key]
+            entry.ready.set()
+        return entry.client
+
+    def api_client(self, *args, **kwargs):
+        """
+        Return the shared :py:class:`~docker.api.client.APIClient` for these
+        parameters. Takes the same arguments as :py:meth:`client`.
+        """
+        return self.client(*args, **kwargs).api
+
+    def from_env(self, **kwargs):
+        """
+        Return the shared client configured from environment variables.
+        Takes the same arguments as :py:func:`docker.from_env`.
+        """
+        return self.client(**_client_kwargs_from_env(kwargs))
+
+    def close(self):
+        """
+        Close all the clients of the registry, and forget about them.
+        """
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        for entry in entries:
+            if entry.client is not None:
+                entry.client.close()
+
+
+class _ClientEntry(object):
+    # The client of a key of the registry, set once it's created
+    def __init__(self):
+        self.client = None
+        self.ready = threading.Event()
+
+
+def _default_arguments(func):
+    spec = getargspec(func)
+    return dict(zip(reversed(spec.args), reversed(spec.defaults)))
+
+
+_DEFAULT_ARGUMENTS = _default_arguments(APIClient.__init__)
+
+
+def _client_key(kwargs):
+    # Arguments left to their default value don't change the client
+    kwargs = dict(
+        (k, v) for k, v in six.iteritems(kwargs)
+        if k not in _DEFAULT_ARGUMENTS or _DEFAULT_ARGUMENTS[k] != v
+    )
+    tls = kwargs.pop('tls', False)
+    kwargs['base_url'] = parse_host(
+        kwargs.get('base_url'), IS_WINDOWS_PLATFORM, tls=bool(tls)
+    )
+    version = kwargs.pop('version', None)
+    if version is None or (
+            isinstance(version, six.string_types) and
+            version.lower() == 'auto'):
+        version = 'auto'
+    kwargs['version'] = version
+    if isinstance(tls, TLSConfig):
+        tls = (
+            tls.cert, tls.ca_cert, tls.verify, tls.ssl_version,
+            tls.assert_hostname, tls.assert_fingerprint
+        )
+    kwargs['tls'] = tls
+    return _freeze(kwargs)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (k, _freeze(v)) for k, v in six.iteritems(value)
+        ))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+_registry = ClientRegistry()
+
+
+def shared_client(*args, **kwargs):
+    """
+    Return a :py:class:`DockerClient` shared with the rest of the process.
+    Takes the same arguments as :py:meth:`ClientRegistry.client`.
+    """
+    return _registry.client(*args, **kwargs)
+
+
+def shared_api_client(*args, **kwargs):
+    """
+    Return an :py:class:`~docker.api.client.APIClient` shared with the rest
+    of the process. Takes the same arguments as
+    :py:meth:`ClientRegistry.client`.
+    """
+    return _registry.api_client(*args, **kwargs)
+
+
+def shared_from_env(**kwargs):
+    """
+    Return a :py:class:`DockerClient` configured from environment variables,
+    shared with the rest of the process. Takes the same arguments as
+    :py:func:`docker.from_env`.
+    """
+    return _registry.from_env(**kwargs)
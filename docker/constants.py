@@ -36,9 +36,33 @@ DEFAULT_NUM_POOLS = 25
 # For more details see: https://github.com/docker/docker-py/issues/2246
 DEFAULT_NUM_POOLS_SSH = 9
 
+# Pooled SSH connections left unused for longer than this many seconds are
+# closed rather than reused, as idle sessions tend to be dropped by the network
+DEFAULT_SSH_IDLE_TIMEOUT = 5 * 60
+
+# Pooled unix socket connections left unused for longer than this many seconds
+# are closed rather than reused
+DEFAULT_UNIX_IDLE_TIMEOUT = 5 * 60
+
 DEFAULT_MAX_POOL_SIZE = 10
 
+# Number of seconds for which an API version negotiated with version='auto'
+# is reused, unless the daemon restarts
+DEFAULT_API_VERSION_CACHE_TTL = 60 * 60
+
+# Number of servers whose last TLS session is kept for resumption
+DEFAULT_TLS_SESSION_CACHE_SIZE = 256
+
 DEFAULT_DATA_CHUNK_SIZE = 1024 * 2048
 
+DEFAULT_FRAME_BUFFER_SIZE = 64 * 1024
+
+# Data written to files by logs_to and exec_start(sink=...) is buffered up
+# to this size, per file
+DEFAULT_SINK_BUFFER_SIZE = 1024 * 1024
+
+# Longer log lines are split in several lines
+DEFAULT_MAX_LOG_LINE_LENGTH = 1024 * 1024
+
 DEFAULT_SWARM_ADDR_POOL = ['10.0.0.0/8']
 DEFAULT_SWARM_SUBNET_SIZE = 24
@@ -1,4 +1,3 @@
-import distutils.spawn
 import os
 import sys
 
@@ -9,6 +8,8 @@ def find_executable(executable, path=None):
     every extension declared in PATHEXT instead of just `.exe`
     """
     if sys.platform != 'win32':
+        # distutils is slow to import, and only needed here
+        import distutils.spawn
         return distutils.spawn.find_executable(executable, path)
 
     if path is None:
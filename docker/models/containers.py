@@ -151,7 +151,8 @@ class Container(Model):
 
     def exec_run(self, cmd, stdout=True, stderr=True, stdin=False, tty=False,
                  privileged=False, user='', detach=False, stream=False,
-                 socket=False, environment=None, workdir=None, demux=False):
+                 socket=False, environment=None, workdir=None, demux=False,
+                 lines=False, sink=None):
         """
         Run a command inside this container. Similar to
         ``docker exec``.
@@ -174,6 +175,11 @@ class Container(Model):
                 ``{"PASSWORD": "xxx"}``.
             workdir (str): Path to working directory for this exec session
             demux (bool): Return stdout and stderr separately
+            lines (bool): With ``stream``, yield the output line by line, as
+                ``(stream, line)`` tuples. Default: False
+            sink (file or tuple): Write the output to a file object opened
+                in binary mode, or to the files of a ``(stdout, stderr)``
+                tuple, as it is read. Default: None
 
         Returns:
             (ExecResult): A tuple of (exit_code, output)
@@ -184,6 +190,8 @@ class Container(Model):
                     If ``stream=True``, a generator yielding response chunks.
                     If ``socket=True``, a socket object for the connection.
                     If ``demux=True``, a tuple of two bytes: stdout and stderr.
+                    If ``sink`` is set, a tuple of the number of bytes
+                    written for stdout and stderr.
                     A bytestring containing response data otherwise.
 
         Raises:
@@ -197,7 +205,7 @@ class Container(Model):
         )
         exec_output = self.client.api.exec_start(
             resp['Id'], detach=detach, tty=tty, stream=stream, socket=socket,
-            demux=demux
+            demux=demux, lines=lines, sink=sink
         )
         if socket or stream:
             return ExecResult(None, exec_output)
@@ -305,6 +313,107 @@ class Container(Model):
         """
         return self.client.api.logs(self.id, **kwargs)
 
+    def log_lines(self, **kwargs):
+        """
+        Get the logs of this container line by line, along with the stream
+        they were written to. See
+        :py:meth:`~docker.api.container.ContainerApiMixin.log_lines`.
+
+        Args:
+            stdout (bool): Get ``STDOUT``. Default ``True``
+            stderr (bool): Get ``STDERR``. Default ``True``
+            timestamps (bool): Get the timestamps of the lines, as UNIX
+                times. Default ``False``
+            tail (str or int): Output specified number of lines at the end of
+                logs. Either an integer of number of lines or the string
+                ``all``. Default ``all``
+            since (datetime or int): Show logs since a given datetime or
+                integer epoch (in seconds)
+            follow (bool): Follow log output. Default ``False``
+            until (datetime or int): Show logs that occurred before the given
+                datetime or integer epoch (in seconds)
+            max_line_length (int): Split longer lines in several lines.
+                Default: 1MB
+            slices (int): Download the logs in this number of time slices,
+                concurrently. Only the download is concurrent: the logs are
+                decoded by the calling thread. Default ``None``: a single
+                request
+
+        Returns:
+            (generator): ``(stream, line)`` tuples, or
+            ``(stream, timestamp, line)`` tuples with ``timestamps``.
+
+        Raises:
+            :py:class:`docker.errors.APIError`
+                If the server returns an error.
+        """
+        return self.client.api.log_lines(self.id, **kwargs)
+
+    def logs_to(self, stdout_file, stderr_file, **kwargs):
+        """
+        Write the logs of this container to files, as they are read. See
+        :py:meth:`~docker.api.container.ContainerApiMixin.logs_to`.
+
+        Args:
+            stdout_file: A file object opened in binary mode, to write
+                ``STDOUT`` to, or ``None`` to skip ``STDOUT``
+            stderr_file: A file object opened in binary mode, to write
+                ``STDERR`` to, or ``None`` to skip ``STDERR``. It may be the
+                same as ``stdout_file``.
+            timestamps (bool): Show timestamps. Default ``False``
+            tail (str or int): Output specified number of lines at the end of
+                logs. Either an integer of number of lines or the string
+                ``all``. Default ``all``
+            since (datetime or int): Show logs since a given datetime or
+                integer epoch (in seconds)
+            follow (bool): Follow log output. Default ``False``
+            until (datetime or int): Show logs that occurred before the given
+                datetime or integer epoch (in seconds)
+            slices (int): Download the logs in this number of time slices,
+                concurrently. Only the download is concurrent: the logs are
+                decoded by the calling thread. Default ``None``: a single
+                request
+
+        Returns:
+            (tuple): The number of bytes written for ``STDOUT`` and
+            ``STDERR``.
+
+        Raises:
+            :py:class:`docker.errors.APIError`
+                If the server returns an error.
+        """
+        return self.client.api.logs_to(
+            self.id, stdout_file, stderr_file, **kwargs
+        )
+
+    def follow_logs(self, **kwargs):
+        """
+        Follow the logs of this container, line by line, reconnecting when
+        the connection to the server is lost, until the container stops.
+        See :py:meth:`~docker.api.container.ContainerApiMixin.follow_logs`.
+
+        Args:
+            stdout (bool): Get ``STDOUT``. Default ``True``
+            stderr (bool): Get ``STDERR``. Default ``True``
+            since (datetime or int): Show logs since a given datetime or
+                integer epoch (in seconds), if there's no checkpoint
+            tail (str or int): Output specified number of lines at the end of
+                logs, if there's no checkpoint. Default ``all``
+            checkpoint (dict): Resume from the checkpoint of another
+                follower.
+            checkpoint_path (str): Resume from the checkpoint saved in this
+                file, if it exists, and keep it up to date.
+
+        Returns:
+            (:py:class:`~docker.utils.logs.LogFollower`): An iterable of
+            :py:class:`~docker.utils.logs.LogLine`.
+
+        Raises:
+            :py:class:`docker.errors.APIError`
+                If the server returns an error other than a server error.
+        """
+        return self.client.api.follow_logs(self.id, **kwargs)
+
     def pause(self):
         """
         Pauses all processes within this container.
@@ -315,7 +424,8 @@ class Container(Model):
         """
         return self.client.api.pause(self.id)
 
-    def put_archive(self, path, data):
+    def put_archive(self, path, data, gzip=False, gzip_level=9,
+                    gzip_workers=None):
         """
         Insert a file or folder in this container using a tar archive as
         source.
@@ -324,6 +434,11 @@ class Container(Model):
             path (str): Path inside the container where the file(s) will be
                 extracted. Must exist.
             data (bytes): tar data to be extracted
+            gzip (bool): Compress the data with gzip before sending it.
+                Default: ``False``
+            gzip_level (int): gzip compression level. Default: 9
+            gzip_workers (int): Number of threads compressing the data.
+                Default: the number of CPUs
 
         Returns:
             (bool): True if the call succeeds.
@@ -331,7 +446,10 @@ class Container(Model):
         Raises:
             :py:class:`~docker.errors.APIError` If an error occurs.
         """
-        return self.client.api.put_archive(self.id, path, data)
+        return self.client.api.put_archive(
+            self.id, path, data, gzip=gzip, gzip_level=gzip_level,
+            gzip_workers=gzip_workers
+        )
 
     def remove(self, **kwargs):
         """
@@ -414,6 +532,10 @@ class Container(Model):
                 False by default.
             stream (bool): If set to false, only the current stats will be
                 returned instead of a stream. True by default.
+            compact (bool): Reduce the stats to the numbers shown by
+                ``docker stats``, as
+                :py:class:`~docker.utils.stats.StatsSample` records.
+                False by default.
 
         Raises:
             :py:class:`docker.errors.APIError`
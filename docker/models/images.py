@@ -262,6 +262,20 @@ class ImageCollection(Collection):
                 configuration file (``~/.docker/config.json`` by default)
                 contains a proxy configuration, the corresponding environment
                 variables will be set in the container being built.
+            stream_context (bool): If ``True``, the build context is sent
+                while it is being archived, with chunked transfer encoding,
+                instead of being written to a temporary file first. Only
+                used when ``path`` is a local directory. Default: ``False``
+            context_cache (str): Path to a directory where the build context
+                is kept between builds. Files that haven't changed since the
+                previous build using the same directory are copied from the
+                cached archive instead of being read again. Only used when
+                ``path`` is a local directory and ``gzip`` is ``False``, and
+                takes precedence over ``stream_context``. Default: ``None``
+            gzip_level (int): Compression level used when ``gzip`` is
+                ``True``. Default: 9
+            gzip_workers (int): Number of threads compressing the context
+                when ``gzip`` is ``True``. Default: the number of CPUs
 
         Returns:
             (tuple): The first item is the :py:class:`Image` object for the
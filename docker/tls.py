@@ -1,8 +1,12 @@
 import os
 import ssl
 
+import six
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+
 from . import errors
 from .transport import SSLHTTPAdapter
+from .transport.ssladapter import ResumingSSLContext, urllib3
 
 
 class TLSConfig(object):
@@ -24,6 +28,7 @@ class TLSConfig(object):
     ca_cert = None
     verify = None
     ssl_version = None
+    _ssl_context = None
 
     def __init__(self, client_cert=None, ca_cert=None, verify=None,
                  ssl_version=None, assert_hostname=None,
@@ -109,4 +114,64 @@ class TLSConfig(object):
             ssl_version=self.ssl_version,
             assert_hostname=self.assert_hostname,
             assert_fingerprint=self.assert_fingerprint,
+            ssl_context=self.ssl_context,
         ))
+
+    @property
+    def ssl_context(self):
+        """
+        The SSL context shared by the clients configured with these TLS
+        options. Certificates are loaded into it once, before its first
+        connection, and the TLS sessions of its connections are resumed.
+        """
+        if self._ssl_context is None:
+            self._ssl_context = self._create_ssl_context()
+        return self._ssl_context
+
+    def handshake_stats(self):
+        """
+        Return statistics about the TLS handshakes of the clients configured
+        with these TLS options.
+
+        Returns:
+            (dict): ``handshakes``, the number of handshakes, and
+            ``handshake_time``, the time they took in seconds, as well as
+            ``resumed_handshakes`` and ``resumed_handshake_time`` for the
+            handshakes that resumed a previous TLS session.
+        """
+        return self.ssl_context.handshake_stats()
+
+    def _create_ssl_context(self):
+        # Same settings as urllib3's default context, except that session
+        # tickets are allowed
+        context = ResumingSSLContext(
+            self.ssl_version, initializer=self._load_certs
+        )
+        context.set_ciphers(urllib3.util.ssl_.DEFAULT_CIPHERS)
+        context.options |= (
+            getattr(ssl, 'OP_NO_SSLv2', 0) | getattr(ssl, 'OP_NO_SSLv3', 0) |
+            getattr(ssl, 'OP_NO_COMPRESSION', 0)
+        )
+        if getattr(context, 'post_handshake_auth', None) is not None:
+            context.post_handshake_auth = True
+        # urllib3 checks the hostname itself, against assert_hostname
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_REQUIRED if self.verify \
+            else ssl.CERT_NONE
+        return context
+
+    def _load_certs(self, context):
+        verify = self.ca_cert if self.verify and self.ca_cert else self.verify
+        if verify is True:
+            verify = (
+                os.environ.get('REQUESTS_CA_BUNDLE') or
+                os.environ.get('CURL_CA_BUNDLE') or
+                DEFAULT_CA_BUNDLE_PATH
+            )
+        if isinstance(verify, six.string_types):
+            if os.path.isdir(verify):
+                context.load_verify_locations(capath=verify)
+            else:
+                context.load_verify_locations(cafile=verify)
+        if self.cert:
+            context.load_cert_chain(*self.cert)
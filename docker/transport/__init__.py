@@ -1,13 +1,40 @@
 # flake8: noqa
+import importlib
+import sys
+
 from .unixconn import UnixHTTPAdapter
 from .ssladapter import SSLHTTPAdapter
-try:
-    from .npipeconn import NpipeHTTPAdapter
-    from .npipesocket import NpipeSocket
-except ImportError:
-    pass
-
-try:
-    from .sshconn import SSHHTTPAdapter
-except ImportError:
-    pass
+
+# The npipe and ssh transports are only imported when first accessed, as most
+# programs never use them.
+_lazy_attrs = {
+    'NpipeHTTPAdapter': '.npipeconn',
+    'NpipeSocket': '.npipesocket',
+    'SSHHTTPAdapter': '.sshconn',
+}
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name not in _lazy_attrs:
+            raise AttributeError(
+                'module {!r} has no attribute {!r}'.format(__name__, name)
+            )
+        try:
+            module = importlib.import_module(_lazy_attrs[name], __name__)
+        except ImportError:
+            raise AttributeError(
+                'module {!r} has no attribute {!r}'.format(__name__, name)
+            )
+        value = globals()[name] = getattr(module, name)
+        return value
+else:
+    try:
+        from .npipeconn import NpipeHTTPAdapter
+        from .npipesocket import NpipeSocket
+    except ImportError:
+        pass
+
+    try:
+        from .sshconn import SSHHTTPAdapter
+    except ImportError:
+        pass
@@ -0,0 +1,253 @@
+import socket
+import ssl
+
+import requests
+import requests.exceptions
+import six
+from requests.structures import CaseInsensitiveDict
+
+from .. import errors
+from ..utils.socket import read_chunked, readinto_from_file
+from . import lighthttp
+
+try:
+    import requests.packages.urllib3 as urllib3
+except ImportError:
+    import urllib3
+
+
+class TransportBackend(object):
+    """
+    Sends the HTTP requests of an :py:class:`~docker.api.client.APIClient`.
+
+    A backend returns :py:class:`requests.Response` objects, or objects with
+    the same interface (``status_code``, ``reason``, ``url``, ``headers``,
+    ``content``, ``text``, ``json()``, ``raise_for_status()``,
+    ``iter_content()`` and ``close()``), that the client reads through the
+    methods below. The client passed to each method is the one the request
+    is sent for, so a single backend can be shared by several clients.
+
+    To use another HTTP library, subclass this class and pass an instance to
+    the client with its ``backend`` argument.
+    """
+
+    def send(self, client, method, url, **kwargs):
+        """
+        Send a request and return its response.
+
+        Args:
+            client (APIClient): The client sending the request.
+            method (str): The HTTP method.
+            url (str): The URL of the request, built by the client from its
+                ``base_url``.
+            **kwargs: Arguments with the meaning they have for
+                :py:meth:`requests.Session.request`: ``params``, ``data``,
+                ``headers``, ``timeout`` and ``stream``. With ``stream``,
+                the body of the response must not be read beforehand.
+        """
+        raise NotImplementedError()
+
+    def is_chunked(self, client, response):
+        """
+        Return whether the body of a streamed response is chunked-encoded.
+        """
+        raise NotImplementedError()
+
+    def iter_chunks(self, client, response, coalesce=False):
+        """
+        Return a generator of the chunks of the body of a streamed, chunked
+        response, as sent by the server. With ``coalesce``, the chunks that
+        are already received may be joined.
+        """
+        raise NotImplementedError()
+
+    def iter_raw(self, client, response, chunk_size):
+        """
+        Return a generator of the body of a streamed response, not decoded,
+        in blocks of at most ``chunk_size`` bytes.
+        """
+        raise NotImplementedError()
+
+    def get_socket(self, client, response):
+        """
+        Return the socket of a streamed response, for the client to read and
+        write raw data once the server has hijacked the connection, as it
+        does when attaching to a container or an exec instance.
+        """
+        raise NotImplementedError()
+
+    def close(self, client):
+        """
+        Release the resources used for ``client``, when it is closed.
+        """
+
+    def reset_after_fork(self, client):
+        """
+        Forget the connections of ``client`` inherited from the parent
+        process, in a child process, without closing them for the parent.
+        The adapters of the client are already reset.
+        """
+
+
+class RequestsBackend(TransportBackend):
+    """
+    The default backend: requests are sent with the methods of the client,
+    which is a :py:class:`requests.Session`, using its mounted adapters.
+    """
+
+    def send(self, client, method, url, **kwargs):
+        return getattr(client, method.lower())(url, **kwargs)
+
+    def is_chunked(self, client, response):
+        return response.raw.chunked
+
+    def iter_chunks(self, client, response, coalesce=False):
+        raw = response.raw
+        fp, original_response = _response_file(raw)
+        if not hasattr(fp, 'readinto1'):
+            # Unknown urllib3 version, or a Python 2 socket file, which
+            # can't read into a buffer
+            for chunk in raw.stream(None, decode_content=False):
+                yield chunk
+            return
+
+        # Parse the chunks straight from the connection's buffered socket
+        # file, handling errors like urllib3 does
+        readinto = readinto_from_file(fp)
+        clean_exit = False
+        try:
+            try:
+                for chunk in read_chunked(readinto, coalesce=coalesce):
+                    yield chunk
+            except socket.timeout:
+                raise urllib3.exceptions.ReadTimeoutError(
+                    None, None, 'Read timed out.'
+                )
+            except socket.error as e:
+                raise urllib3.exceptions.ProtocolError(
+                    'Connection broken: {0!r}'.format(e), e
+                )
+            clean_exit = True
+        finally:
+            if original_response is not None:
+                original_response.close()
+            if not clean_exit and raw.connection is not None:
+                # The rest of the body is left on the connection, which
+                # can't be reused
+                raw.connection.close()
+            raw.release_conn()
+
+    def iter_raw(self, client, response, chunk_size):
+        return response.raw.stream(chunk_size, decode_content=False)
+
+    def get_socket(self, client, response):
+        # The connection of a streamed response isn't released to the pool
+        sock = getattr(response.raw.connection, 'sock', None)
+        if sock is not None:
+            return sock
+
+        # When the server said it would close the connection, http.client
+        # dropped the socket, only left in the file of the response
+        fp, _ = _response_file(response.raw)
+        sock = getattr(fp, 'channel', None)
+        if sock is None:
+            sock = getattr(fp, 'raw', None)
+            # Named pipes and TLS sockets are wrapped in another object
+            if hasattr(sock, 'sock'):
+                sock = sock.sock
+            elif isinstance(getattr(sock, '_sock', None), ssl.SSLSocket):
+                sock = sock._sock
+        if sock is None:
+            raise errors.DockerException(
+                'The socket of the response can\'t be found'
+            )
+        return sock
+
+
+# The major versions of urllib3 whose private attributes _response_file
+# relies on
+_URLLIB3_INTERNALS = urllib3.__version__.split('.')[0] in ('1', '2')
+
+
+def _response_file(raw):
+    """
+    Return the buffered file of the connection a urllib3 response reads its
+    body from, and the http.client response to close once the body is read
+    in full, or ``None`` for those that can't be found.
+
+    urllib3 has no public API for them: they are the private ``_fp.fp`` and
+    ``_original_response`` attributes of its ``HTTPResponse``, only looked
+    up with the versions of urllib3 known to have them. Otherwise,
+    :py:class:`RequestsBackend` falls back to the public API.
+    """
+    if not _URLLIB3_INTERNALS:
+        return None, None
+    fp = getattr(getattr(raw, '_fp', None), 'fp', None)
+    return fp, getattr(raw, '_original_response', None)
+
+
+# Arguments of the requests that LightweightBackend sends itself
+_LIGHTWEIGHT_KWARGS = frozenset(['params', 'headers', 'timeout'])
+
+
+class LightweightBackend(RequestsBackend):
+    """
+    Send ``GET`` requests whose response isn't streamed with
+    :py:func:`~docker.transport.lighthttp.send_request`, on the connection
+    pools of the client's adapter, and all others like
+    :py:class:`RequestsBackend`.
+
+    This is much faster for small requests, but the session's hooks,
+    cookies and authentication are ignored. It only applies to the
+    ``unix://``, ``npipe://`` and ``ssh://`` protocols, which proxies don't
+    apply to.
+    """
+
+    def send(self, client, method, url, **kwargs):
+        if (method == 'GET' and _LIGHTWEIGHT_KWARGS.issuperset(kwargs) and
+                not isinstance(kwargs.get('timeout'), tuple) and
+                client.base_url.startswith('http+docker://')):
+            return self._send(client, method, url, **kwargs)
+        return super(LightweightBackend, self).send(
+            client, method, url, **kwargs
+        )
+
+    def _send(self, client, method, url, params=None, headers=None,
+              timeout=None):
+        path = url[len(client.base_url):]
+        if params:
+            query = requests.models.RequestEncodingMixin._encode_params(params)
+            if query:
+                path += ('&' if '?' in path else '?') + query
+        merged = CaseInsensitiveDict(client.headers)
+        if headers:
+            merged.update(headers)
+        # The content of responses is not decoded
+        merged.pop('Accept-Encoding', None)
+        if timeout is None:
+            timeout = client.timeout
+
+        pool = client.get_adapter(url).get_connection(client.base_url)
+        try:
+            raw, body = lighthttp.send_request(
+                pool, method, path,
+                [(k, v) for k, v in merged.items() if v is not None],
+                timeout
+            )
+        except socket.timeout as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except (six.moves.http_client.HTTPException, socket.error,
+                urllib3.exceptions.HTTPError) as e:
+            raise requests.exceptions.ConnectionError(e)
+
+        response = requests.Response()
+        response.status_code = raw.status
+        response.reason = raw.reason
+        response.headers = CaseInsensitiveDict(raw.getheaders())
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers
+        )
+        response.url = client.base_url + path
+        response._content = body
+        response._content_consumed = True
+        return response
@@ -1,8 +1,30 @@
 import requests.adapters
 
+try:
+    import requests.packages.urllib3 as urllib3
+except ImportError:
+    import urllib3
+
 
 class BaseHTTPAdapter(requests.adapters.HTTPAdapter):
     def close(self):
         super(BaseHTTPAdapter, self).close()
         if hasattr(self, 'pools'):
             self.pools.clear()
+
+    def reset_after_fork(self):
+        """
+        Forget the connections inherited from the parent process, in a
+        child process, without closing them for the parent. New
+        connections are opened when needed.
+        """
+        # Dropping the pools only closes their sockets in this process
+        self.init_poolmanager(
+            self._pool_connections, self._pool_maxsize,
+            block=self._pool_block
+        )
+        self.proxy_manager = {}
+        if hasattr(self, 'pools'):
+            self.pools = urllib3._collections.RecentlyUsedContainer(
+                self.pools._maxsize, dispose_func=self.pools.dispose_func
+            )
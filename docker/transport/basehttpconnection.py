@@ -0,0 +1,36 @@
+import six
+from six.moves import http_client as httplib
+
+
+class BaseHTTPConnection(httplib.HTTPConnection, object):
+    def request_chunked(self, method, url, body=None, headers=None):
+        """
+        Send a request with a body of unknown length, using chunked transfer
+        encoding. urllib3 calls this for iterable bodies, but only provides it
+        on its own connection class.
+        """
+        headers = headers or {}
+        header_keys = set(k.lower() for k in headers)
+        self.putrequest(
+            method, url,
+            skip_accept_encoding='accept-encoding' in header_keys,
+            skip_host='host' in header_keys
+        )
+        for header, value in headers.items():
+            self.putheader(header, value)
+        if 'transfer-encoding' not in header_keys:
+            self.putheader('Transfer-Encoding', 'chunked')
+        self.endheaders()
+
+        if body is not None:
+            if isinstance(body, six.string_types + (six.binary_type,)):
+                body = (body,)
+            for chunk in body:
+                if not chunk:
+                    continue
+                if not isinstance(chunk, six.binary_type):
+                    chunk = chunk.encode('utf-8')
+                self.send('{0:x}\r\n'.format(len(chunk)).encode('ascii'))
+                self.send(chunk)
+                self.send(b'\r\n')
+        self.send(b'0\r\n\r\n')
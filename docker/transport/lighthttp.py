@@ -0,0 +1,93 @@
+import contextlib
+import socket
+
+import requests.exceptions
+from six.moves import http_client as httplib
+
+
+def send_request(pool, method, path, headers=(), timeout=None):
+    """
+    Send a request without a body on a connection of ``pool``, an urllib3
+    connection pool, and read the whole response.
+
+    The request is written directly to the connection's socket, skipping
+    the layers of requests and urllib3: this is only meant for small
+    requests that don't need any of their features (proxies, redirects,
+    retries, content decoding...). If a connection kept alive by the pool
+    was closed by the server, the request is sent once more on a new
+    connection.
+
+    Args:
+        pool (HTTPConnectionPool): The pool to take a connection from.
+        method (str): ``GET``, ``HEAD`` or ``DELETE``.
+        path (str): The path and query string of the request.
+        headers (list): The ``(name, value)`` pairs of the request headers.
+        timeout (float): Timeout of socket operations, in seconds.
+
+    Returns:
+        (tuple): The ``HTTPResponse``, with its body already read, and the
+        body.
+    """
+    lines = ['{0} {1} HTTP/1.1'.format(method, path),
+             'Host: {0}'.format(pool.host)]
+    for name, value in headers:
+        value = str(value)
+        if '\n' in value or '\r' in value:
+            raise requests.exceptions.InvalidHeader(
+                'Invalid value for header {0}: {1!r}'.format(name, value)
+            )
+        lines.append('{0}: {1}'.format(name, value))
+    lines.append('\r\n')
+    request = '\r\n'.join(lines).encode('latin-1')
+
+    while True:
+        with _pooled_connection(pool) as conn:
+            reused = conn.sock is not None
+            try:
+                response, body = _exchange(conn, method, request, timeout)
+            except (httplib.HTTPException, socket.error) as e:
+                conn.close()
+                # Only retry when the server closed a connection before
+                # answering, as it does with connections left idle
+                if reused and not isinstance(e, socket.timeout) and \
+                        isinstance(e, (httplib.BadStatusLine, socket.error)):
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            return response, body
+
+
+@contextlib.contextmanager
+def _pooled_connection(pool):
+    """
+    Take a connection from ``pool`` and always put it back afterwards.
+
+    urllib3 has no public API to check a connection out of a pool, so this
+    is the only place where its private ``_get_conn`` and ``_put_conn``
+    methods are used. The pools of the unix socket, SSH and named pipe
+    adapters override them, so their connections are handed out too.
+    """
+    conn = pool._get_conn(timeout=None)
+    try:
+        yield conn
+    finally:
+        pool._put_conn(conn)
+
+
+def _exchange(conn, method, request, timeout):
+    if conn.sock is None:
+        conn.timeout = timeout
+        conn.connect()
+    conn.sock.settimeout(timeout)
+    conn.sock.sendall(request)
+    response = httplib.HTTPResponse(conn.sock, method=method)
+    try:
+        response.begin()
+        body = response.read()
+    finally:
+        response.close()
+    return response, body
@@ -2,14 +2,10 @@ import six
 import requests.adapters
 
 from docker.transport.basehttpadapter import BaseHTTPAdapter
+from docker.transport.basehttpconnection import BaseHTTPConnection
 from .. import constants
 from .npipesocket import NpipeSocket
 
-if six.PY3:
-    import http.client as httplib
-else:
-    import httplib
-
 try:
     import requests.packages.urllib3 as urllib3
 except ImportError:
@@ -18,7 +14,7 @@ except ImportError:
 RecentlyUsedContainer = urllib3._collections.RecentlyUsedContainer
 
 
-class NpipeHTTPConnection(httplib.HTTPConnection, object):
+class NpipeHTTPConnection(BaseHTTPConnection):
     def __init__(self, npipe_path, timeout=60):
         super(NpipeHTTPConnection, self).__init__(
             'localhost', timeout=timeout
@@ -1,19 +1,20 @@
-import paramiko
 import requests.adapters
 import six
 import logging
 import os
+import shutil
 import signal
 import socket
 import subprocess
+import tempfile
+import threading
+import time
 
 from docker.transport.basehttpadapter import BaseHTTPAdapter
+from docker.transport.basehttpconnection import BaseHTTPConnection
 from .. import constants
-
-if six.PY3:
-    import http.client as httplib
-else:
-    import httplib
+from ..errors import DockerException
+from ..utils import fork
 
 try:
     import requests.packages.urllib3 as urllib3
@@ -22,9 +23,11 @@ except ImportError:
 
 RecentlyUsedContainer = urllib3._collections.RecentlyUsedContainer
 
+_monotonic = getattr(time, 'monotonic', time.time)
+
 
 class SSHSocket(socket.socket):
-    def __init__(self, host):
+    def __init__(self, host, control_path=None):
         super(SSHSocket, self).__init__(
             socket.AF_INET, socket.SOCK_STREAM)
         self.host = host
@@ -35,17 +38,32 @@ class SSHSocket(socket.socket):
         if '@' in self.host:
             self.user, self.host = self.host.split('@')
 
+        # When set, connections are opened as channels of a master SSH
+        # session listening on this control socket, which is started by the
+        # first connection and outlives it.
+        self.control_path = control_path
         self.proc = None
 
-    def connect(self, **kwargs):
-        args = ['ssh']
+    def _ssh(self, command=(), options=(), **kwargs):
+        cmd = ['ssh']
         if self.user:
-            args = args + ['-l', self.user]
+            cmd = cmd + ['-l', self.user]
 
         if self.port:
-            args = args + ['-p', self.port]
+            cmd = cmd + ['-p', self.port]
 
-        args = args + ['--', self.host, 'docker system dial-stdio']
+        if self.control_path:
+            cmd = cmd + [
+                '-o', 'ControlMaster=auto',
+                '-o', 'ControlPath={}'.format(
+                    six.moves.shlex_quote(self.control_path)
+                ),
+                '-o', 'ControlPersist={}'.format(
+                    constants.DEFAULT_SSH_IDLE_TIMEOUT
+                ),
+            ]
+
+        cmd = cmd + list(options) + ['--', self.host] + list(command)
 
         preexec_func = None
         if not constants.IS_WINDOWS_PLATFORM:
@@ -53,19 +71,35 @@ class SSHSocket(socket.socket):
                 signal.signal(signal.SIGINT, signal.SIG_IGN)
             preexec_func = f
 
-        env = dict(os.environ) 
+        env = dict(os.environ)
 
         # drop LD_LIBRARY_PATH and SSL_CERT_FILE
         env.pop('LD_LIBRARY_PATH', None)
         env.pop('SSL_CERT_FILE', None)
 
-        self.proc = subprocess.Popen(
-            ' '.join(args),
+        return subprocess.Popen(
+            ' '.join(cmd),
             env=env,
             shell=True,
+            preexec_fn=preexec_func,
+            **kwargs)
+
+    def connect(self, **kwargs):
+        self.proc = self._ssh(
+            ['docker system dial-stdio'],
             stdout=subprocess.PIPE,
-            stdin=subprocess.PIPE,
-            preexec_fn=preexec_func)
+            stdin=subprocess.PIPE)
+
+    def stop_master(self):
+        """
+        Stop the master SSH session listening on ``control_path``, if any.
+        """
+        if not self.control_path or not os.path.exists(self.control_path):
+            return
+        with open(os.devnull, 'wb') as devnull:
+            self._ssh(
+                options=['-O', 'exit'], stdout=devnull, stderr=devnull
+            ).wait()
 
     def _write(self, data):
         if not self.proc or self.proc.stdin.closed:
@@ -85,65 +119,253 @@ class SSHSocket(socket.socket):
         if not self.proc:
             raise Exception('SSH subprocess not initiated.'
                             'connect() must be called first.')
+        read1 = getattr(self.proc.stdout, 'read1', None)
+        if read1 is not None:
+            return read1(n)
         return self.proc.stdout.read(n)
 
+    def recv_into(self, buf, nbytes=0):
+        if not self.proc:
+            raise Exception('SSH subprocess not initiated.'
+                            'connect() must be called first.')
+        nbytes = nbytes or len(buf)
+        stdout = self.proc.stdout
+        if hasattr(stdout, 'peek'):
+            # Once it has copied the buffered data, readinto1() may block on
+            # another read, so only ask for what is already buffered.
+            nbytes = min(nbytes, len(stdout.peek(1)))
+            return stdout.readinto1(memoryview(buf)[:nbytes])
+        data = stdout.read(nbytes)
+        buf[:len(data)] = data
+        return len(data)
+
     def makefile(self, mode):
         if not self.proc:
             self.connect()
-        if six.PY3:
-            self.proc.stdout.channel = self
+        return SSHSocketFile(self)
 
-        return self.proc.stdout
+    def is_alive(self):
+        return self.proc is not None and self.proc.poll() is None
 
     def close(self):
-        if not self.proc or self.proc.stdin.closed:
-            return
-        self.proc.stdin.write(b'\n\n')
-        self.proc.stdin.flush()
-        self.proc.terminate()
+        if self.proc and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.write(b'\n\n')
+                self.proc.stdin.flush()
+                self.proc.stdin.close()
+            except (IOError, OSError):
+                # The subprocess already exited
+                pass
+            self.proc.terminate()
+            self.proc.wait()
+            self.proc.stdout.close()
+        super(SSHSocket, self).close()
+
+
+class SSHSocketFile(object):
+    """
+    The read side of an :py:class:`SSHSocket`, as returned by its
+    ``makefile()`` method. HTTP responses close their file once they have
+    been read; closing this one leaves the subprocess running, so that the
+    connection can be kept alive and reused.
+    """
+    def __init__(self, channel):
+        self.channel = channel
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self.channel.proc.stdout, name)
+
+    def close(self):
+        self.closed = True
+
+
+class SSHTransportShard(object):
+    def __init__(self, client):
+        self.client = client
+        self.channels = 0
+
+    def is_active(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+
+class SSHTransportPool(object):
+    """
+    Opens channels over up to ``max_transports`` paramiko transports to the
+    same host, to get past the number of sessions an SSH server accepts on
+    one connection (``MaxSessions``, 10 with OpenSSH).
+
+    Channels are opened on the transport with the fewest open channels. A
+    new transport is connected with ``connect()`` when all the others have
+    ``max_sessions`` open channels; past ``max_transports``, channels go to
+    the least loaded transport anyway. Transports found dead are closed and
+    replaced.
+    """
+    def __init__(self, connect=None, max_transports=1,
+                 max_sessions=constants.DEFAULT_NUM_POOLS_SSH, clients=()):
+        self.connect = connect
+        self.max_transports = max_transports
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.connected = threading.Condition(self.lock)
+        self.shards = [SSHTransportShard(client) for client in clients]
+        self.connects = len(self.shards)
+        # Transports being connected, outside the lock
+        self.connecting = 0
+        self.dead_transports = 0
+
+    def open_channel(self):
+        """
+        Open a session channel, and return it along with the shard it was
+        opened on, which must be passed to :py:meth:`release` once the
+        channel is closed.
+        """
+        shard = self._get_shard()
+        try:
+            channel = shard.client.get_transport().open_session()
+        except Exception:
+            self.release(shard)
+            raise
+        return shard, channel
+
+    def release(self, shard):
+        with self.lock:
+            shard.channels -= 1
+
+    def _get_shard(self):
+        # Return a shard with a channel counted on it. The SSH handshake of
+        # a new transport runs outside the lock, in a slot reserved in
+        # self.connecting, so that other threads can use the transports
+        # already connected meanwhile.
+        with self.lock:
+            while True:
+                shard, reserved = self._pick_shard()
+                if shard is not None:
+                    shard.channels += 1
+                    return shard
+                if reserved:
+                    self.connecting += 1
+                    break
+                # The first transports are all being connected
+                self.connected.wait()
+
+        try:
+            shard = SSHTransportShard(self.connect())
+        except Exception:
+            with self.lock:
+                self.connecting -= 1
+                self.connected.notify_all()
+            raise
+
+        with self.lock:
+            self.connecting -= 1
+            self.shards.append(shard)
+            self.connects += 1
+            shard.channels += 1
+            self.connected.notify_all()
+        return shard
+
+    def _pick_shard(self):
+        # Return (shard, False) to use shard, (None, True) to connect a new
+        # transport, or (None, False) to wait for one being connected
+        if self.connect is not None:
+            for shard in [s for s in self.shards if not s.is_active()]:
+                shard.client.close()
+                self.shards.remove(shard)
+                self.dead_transports += 1
+
+        available = [
+            s for s in self.shards if s.channels < self.max_sessions
+        ]
+        if not available and self.connect is not None and (
+                len(self.shards) + self.connecting < self.max_transports):
+            return None, True
+        if not self.shards:
+            # Wait, if all the transports allowed are being connected
+            return None, not self.connecting
+        return min(available or self.shards, key=lambda s: s.channels), False
+
+    def stats(self):
+        with self.lock:
+            return {
+                'transports': [
+                    {'channels': s.channels, 'active': s.is_active()}
+                    for s in self.shards
+                ],
+                'transport_connects': self.connects,
+                'dead_transports': self.dead_transports,
+            }
+
+    def close(self):
+        with self.lock:
+            for shard in self.shards:
+                shard.client.close()
+            self.shards = []
 
 
-class SSHConnection(httplib.HTTPConnection, object):
-    def __init__(self, ssh_transport=None, timeout=60, host=None):
+class SSHConnection(BaseHTTPConnection):
+    def __init__(self, ssh_transport=None, timeout=60, host=None,
+                 control_path=None, transports=None):
         super(SSHConnection, self).__init__(
             'localhost', timeout=timeout
         )
         self.ssh_transport = ssh_transport
         self.timeout = timeout
         self.ssh_host = host
+        self.control_path = control_path
+        self.transports = transports
+        self.shard = None
 
     def connect(self):
-        if self.ssh_transport:
+        if self.transports:
+            self.shard, sock = self.transports.open_channel()
+            sock.settimeout(self.timeout)
+            sock.exec_command('docker system dial-stdio')
+        elif self.ssh_transport:
             sock = self.ssh_transport.open_session()
             sock.settimeout(self.timeout)
             sock.exec_command('docker system dial-stdio')
         else:
-            sock = SSHSocket(self.ssh_host)
+            sock = SSHSocket(self.ssh_host, self.control_path)
             sock.settimeout(self.timeout)
             sock.connect()
 
         self.sock = sock
 
+    def close(self):
+        super(SSHConnection, self).close()
+        if self.shard is not None:
+            self.transports.release(self.shard)
+            self.shard = None
+
 
 class SSHConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
     scheme = 'ssh'
 
-    def __init__(self, ssh_client=None, timeout=60, maxsize=10, host=None):
+    def __init__(self, ssh_client=None, timeout=60, maxsize=10, host=None,
+                 idle_timeout=constants.DEFAULT_SSH_IDLE_TIMEOUT,
+                 control_path=None, transports=None):
         super(SSHConnectionPool, self).__init__(
             'localhost', timeout=timeout, maxsize=maxsize
         )
-        self.ssh_transport = None
         self.timeout = timeout
-        if ssh_client:
-            self.ssh_transport = ssh_client.get_transport()
+        self.transports = transports
+        if ssh_client and transports is None:
+            self.transports = SSHTransportPool(clients=[ssh_client])
         self.ssh_host = host
+        self.idle_timeout = idle_timeout
+        self.control_path = control_path
 
     def _new_conn(self):
-        return SSHConnection(self.ssh_transport, self.timeout, self.ssh_host)
+        return SSHConnection(
+            timeout=self.timeout, host=self.ssh_host,
+            control_path=self.control_path, transports=self.transports
+        )
 
     # When re-using connections, urllib3 calls fileno() on our
     # SSH channel instance, quickly overloading our fd limit. To avoid this,
-    # we override _get_conn
+    # we override _get_conn, and check connections with _is_stale instead.
     def _get_conn(self, timeout):
         conn = None
         try:
@@ -161,23 +383,63 @@ class SSHConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
                 )
             pass  # Oh well, we'll create a new connection then
 
+        if conn and self._is_stale(conn):
+            # The connection reconnects on its next request
+            conn.close()
+
         return conn or self._new_conn()
 
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.last_used = _monotonic()
+        super(SSHConnectionPool, self)._put_conn(conn)
+
+    def _is_stale(self, conn):
+        sock = conn.sock
+        if sock is None:
+            return False
+        last_used = getattr(conn, 'last_used', None)
+        if (self.idle_timeout is not None and last_used is not None and
+                _monotonic() - last_used > self.idle_timeout):
+            return True
+        if isinstance(sock, SSHSocket):
+            return not sock.is_alive()
+        return (sock.closed or sock.exit_status_ready() or
+                not sock.get_transport().is_active())
+
 
 class SSHHTTPAdapter(BaseHTTPAdapter):
 
     __attrs__ = requests.adapters.HTTPAdapter.__attrs__ + [
-        'pools', 'timeout', 'ssh_client', 'ssh_params', 'max_pool_size'
+        'pools', 'timeout', 'ssh_client', 'ssh_params', 'max_pool_size',
+        'idle_timeout', 'control_path', 'transports'
     ]
 
     def __init__(self, base_url, timeout=60,
                  pool_connections=constants.DEFAULT_NUM_POOLS,
                  max_pool_size=constants.DEFAULT_MAX_POOL_SIZE,
-                 shell_out=False):
+                 shell_out=False,
+                 idle_timeout=constants.DEFAULT_SSH_IDLE_TIMEOUT,
+                 multiplexing=False, max_transports=1):
         self.ssh_client = None
+        self.transports = None
         if not shell_out:
             self._create_paramiko_client(base_url)
             self._connect()
+            self.transports = SSHTransportPool(
+                self._open_ssh_client, max_transports,
+                clients=[self.ssh_client]
+            )
+
+        # Paramiko already opens every connection as a channel of a
+        # transport. The ssh client needs a master session for that, whose
+        # control socket lives in a directory only we can access.
+        self.control_path = None
+        self.owns_control_path = True
+        if shell_out and multiplexing and not constants.IS_WINDOWS_PLATFORM:
+            self.control_path = os.path.join(
+                tempfile.mkdtemp(prefix='docker-ssh-'), 'control'
+            )
 
         self.ssh_host = base_url
         if base_url.startswith('ssh://'):
@@ -185,14 +447,21 @@ class SSHHTTPAdapter(BaseHTTPAdapter):
 
         self.timeout = timeout
         self.max_pool_size = max_pool_size
+        self.idle_timeout = idle_timeout
         self.pools = RecentlyUsedContainer(
             pool_connections, dispose_func=lambda p: p.close()
         )
         super(SSHHTTPAdapter, self).__init__()
 
     def _create_paramiko_client(self, base_url):
+        try:
+            import paramiko
+        except ImportError:
+            raise DockerException(
+                'Install paramiko package to enable ssh:// support'
+            )
         logging.getLogger("paramiko").setLevel(logging.WARNING)
-        self.ssh_client = paramiko.SSHClient()
+        self.ssh_client = self._new_paramiko_client()
         base_url = six.moves.urllib_parse.urlparse(base_url)
         self.ssh_params = {
             "hostname": base_url.hostname,
@@ -217,41 +486,119 @@ class SSHHTTPAdapter(BaseHTTPAdapter):
             if base_url.username is None and 'user' in host_config:
                 self.ssh_params['username'] = self.ssh_conf['user']
 
-        self.ssh_client.load_system_host_keys()
-        self.ssh_client.set_missing_host_key_policy(paramiko.WarningPolicy())
+    def _new_paramiko_client(self):
+        import paramiko
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        client.set_missing_host_key_policy(paramiko.WarningPolicy())
+        return client
 
     def _connect(self):
         if self.ssh_client:
             self.ssh_client.connect(**self.ssh_params)
 
-    def get_connection(self, url, proxies=None):
-        if not self.ssh_client:
-            return SSHConnectionPool(
-                ssh_client=self.ssh_client,
-                timeout=self.timeout,
-                maxsize=self.max_pool_size,
-                host=self.ssh_host
+    def _open_ssh_client(self):
+        import paramiko
+        client = self._new_paramiko_client()
+        params = dict(self.ssh_params)
+        if 'sock' in params:
+            # A proxy command can only carry one connection
+            params['sock'] = paramiko.ProxyCommand(
+                self.ssh_conf['proxycommand']
             )
+        client.connect(**params)
+        return client
+
+    def get_connection(self, url, proxies=None):
+        # All the URLs lead to the same daemon: share a pool between them,
+        # as UnixHTTPAdapter does
+        parsed = six.moves.urllib.parse.urlsplit(url)
+        key = '{0}://{1}'.format(parsed.scheme, parsed.netloc)
         with self.pools.lock:
-            pool = self.pools.get(url)
+            pool = self.pools.get(key)
             if pool:
                 return pool
 
-            # Connection is closed try a reconnect
-            if self.ssh_client and not self.ssh_client.get_transport():
-                self._connect()
-
             pool = SSHConnectionPool(
-                ssh_client=self.ssh_client,
                 timeout=self.timeout,
                 maxsize=self.max_pool_size,
-                host=self.ssh_host
+                host=self.ssh_host,
+                idle_timeout=self.idle_timeout,
+                control_path=self.control_path,
+                transports=self.transports
             )
-            self.pools[url] = pool
+            self.pools[key] = pool
 
         return pool
 
+    def reset_after_fork(self):
+        # Closing the inherited connections, even when they are garbage
+        # collected, would stop the ssh processes or send messages on the
+        # paramiko transports the parent process still uses: they are kept
+        # untouched, and new ones are opened when needed. The locks are
+        # ignored, as another thread of the parent may have held them.
+        for pool in list(self.pools._container.values()):
+            if pool.pool is not None:
+                fork.keep(*[c for c in pool.pool.queue if c is not None])
+                pool.pool.queue.clear()
+        if self.transports:
+            fork.keep(self.transports, self.ssh_client)
+            for shard in self.transports.shards:
+                transport = shard.client.get_transport()
+                sock = getattr(transport, 'sock', None)
+                if isinstance(sock, socket.socket):
+                    # Only closes the socket in this process
+                    sock.close()
+            self.transports = SSHTransportPool(
+                self._open_ssh_client, self.transports.max_transports,
+                self.transports.max_sessions
+            )
+            self.ssh_client = None
+        # The master SSH session belongs to the parent process
+        self.owns_control_path = False
+        super(SSHHTTPAdapter, self).reset_after_fork()
+
+    def pool_stats(self):
+        """
+        Return statistics about the connections of the adapter.
+
+        Returns:
+            (dict): ``pools``, the number of connection pools;
+            ``idle_connections``, the number of connections waiting in them;
+            ``requests``, the number of requests they made. With paramiko,
+            also ``transports``, a list of the ``channels`` open on each
+            transport and whether it is ``active``; ``transport_connects``,
+            the number of transports connected, and ``dead_transports``,
+            the number of transports that were found dead and replaced.
+        """
+        with self.pools.lock:
+            pools = [self.pools[url] for url in self.pools.keys()]
+        stats = {
+            'pools': len(pools),
+            'idle_connections': sum(
+                len([c for c in list(p.pool.queue) if c is not None])
+                for p in pools if p.pool is not None
+            ),
+            'requests': sum(p.num_requests for p in pools),
+            'transports': [],
+            'transport_connects': 0,
+            'dead_transports': 0,
+        }
+        if self.transports:
+            stats.update(self.transports.stats())
+        return stats
+
     def close(self):
         super(SSHHTTPAdapter, self).close()
+        if self.transports:
+            self.transports.close()
         if self.ssh_client:
             self.ssh_client.close()
+        if self.control_path and self.owns_control_path:
+            sock = SSHSocket(self.ssh_host, self.control_path)
+            sock.stop_master()
+            sock.close()
+            shutil.rmtree(
+                os.path.dirname(self.control_path), ignore_errors=True
+            )
+        self.control_path = None
@@ -2,12 +2,20 @@
       https://lukasa.co.uk/2013/01/Choosing_SSL_Version_In_Requests/
       https://github.com/kennethreitz/requests/pull/799
 """
+import collections
+import socket
+import ssl
 import sys
+import threading
+import time
+import weakref
 
-from distutils.version import StrictVersion
+import six
 from requests.adapters import HTTPAdapter
 
 from docker.transport.basehttpadapter import BaseHTTPAdapter
+from .. import constants
+from ..utils import fork
 
 try:
     import requests.packages.urllib3 as urllib3
@@ -23,6 +31,155 @@ if sys.version_info[0] < 3 or sys.version_info[1] < 5:
     from backports.ssl_match_hostname import match_hostname
     urllib3.connection.match_hostname = match_hostname
 
+# TLS sessions can be resumed from Python 3.6
+HAS_TLS_SESSIONS = hasattr(ssl, 'SSLSession')
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+# The protocol of contexts created without one, PROTOCOL_TLS_CLIENT from
+# Python 3.6. Other protocols are deprecated from Python 3.10.
+_DEFAULT_PROTOCOL = getattr(
+    ssl, 'PROTOCOL_TLS_CLIENT', getattr(ssl, 'PROTOCOL_TLS', None)
+) or ssl.PROTOCOL_SSLv23
+
+# From Python 3.7, the protocols restricted to a TLS version are replaced
+# with the minimum and maximum versions of a context
+_PINNED_VERSIONS = dict(
+    (getattr(ssl, 'PROTOCOL_' + name), getattr(ssl.TLSVersion, name))
+    for name in ('TLSv1', 'TLSv1_1', 'TLSv1_2')
+    if hasattr(ssl, 'PROTOCOL_' + name)
+) if hasattr(ssl, 'TLSVersion') else {}
+
+
+class ResumingSSLSocket(ssl.SSLSocket):
+    session_key = None
+
+    def close(self):
+        # With TLS 1.3, session tickets are only received after the
+        # handshake, so the session is saved again before closing
+        if self.session_key is not None:
+            self.context._save_session(self.session_key, self)
+        super(ResumingSSLSocket, self).close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    An SSL context that resumes the TLS session of the last connection to a
+    server when opening a new one, saving a full handshake, and keeps
+    statistics about the handshakes it performed.
+
+    ``initializer`` is called with the context before its first handshake,
+    to load certificates.
+
+    ``protocol`` defaults to ``ssl.PROTOCOL_TLS_CLIENT``, which checks
+    hostnames. The protocols restricted to a TLS version, such as
+    ``ssl.PROTOCOL_TLSv1_2``, are turned into a ``PROTOCOL_TLS_CLIENT``
+    context limited to that version where Python supports it.
+    """
+    # Only used from Python 3.7
+    sslsocket_class = ResumingSSLSocket
+
+    def __new__(cls, protocol=None, *args, **kwargs):
+        if protocol is None or protocol in _PINNED_VERSIONS:
+            protocol = _DEFAULT_PROTOCOL
+        return super(ResumingSSLContext, cls).__new__(cls, protocol)
+
+    def __init__(self, protocol=None, initializer=None,
+                 max_sessions=constants.DEFAULT_TLS_SESSION_CACHE_SIZE):
+        if six.PY2:
+            ssl.SSLContext.__init__(self, protocol or _DEFAULT_PROTOCOL)
+        version = _PINNED_VERSIONS.get(protocol)
+        if version is not None:
+            self.minimum_version = version
+            self.maximum_version = version
+        self.initializer = initializer
+        self.max_sessions = max_sessions
+        self._session_lock = threading.Lock()
+        self._sessions = collections.OrderedDict()
+        self._stats = dict.fromkeys([
+            'handshakes', 'resumed_handshakes', 'handshake_time',
+            'resumed_handshake_time'
+        ], 0)
+        fork.register(self)
+
+    def _reset_after_fork(self):
+        # The lock may have been held by another thread of the parent
+        self._session_lock = threading.Lock()
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        if self.initializer is not None:
+            with self._session_lock:
+                if self.initializer is not None:
+                    self.initializer(self)
+                    self.initializer = None
+
+        key = (kwargs.get('server_hostname'), _peer_address(sock))
+        if HAS_TLS_SESSIONS and not kwargs.get('server_side'):
+            kwargs.setdefault('session', self._get_session(key))
+
+        start = _monotonic()
+        ssl_sock = super(ResumingSSLContext, self).wrap_socket(
+            sock, *args, **kwargs
+        )
+        elapsed = _monotonic() - start
+
+        with self._session_lock:
+            self._stats['handshakes'] += 1
+            self._stats['handshake_time'] += elapsed
+            if getattr(ssl_sock, 'session_reused', False):
+                self._stats['resumed_handshakes'] += 1
+                self._stats['resumed_handshake_time'] += elapsed
+        if HAS_TLS_SESSIONS:
+            if isinstance(ssl_sock, ResumingSSLSocket):
+                ssl_sock.session_key = key
+            self._save_session(key, ssl_sock)
+        return ssl_sock
+
+    def _save_session(self, key, sock):
+        try:
+            session = sock.session
+        except (socket.error, ValueError):
+            return
+        if session is None:
+            return
+        with self._session_lock:
+            self._sessions.pop(key, None)
+            self._sessions[key] = (session, weakref.ref(sock))
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def _get_session(self, key):
+        with self._session_lock:
+            entry = self._sessions.get(key)
+        if entry is None:
+            return None
+        session, sock_ref = entry
+        sock = sock_ref()
+        if sock is not None:
+            # An open connection may have received newer session tickets
+            try:
+                session = sock.session or session
+            except (socket.error, ValueError):
+                pass
+        return session
+
+    def handshake_stats(self):
+        """
+        Return the number of ``handshakes`` performed by the context and the
+        time they took in seconds (``handshake_time``), as well as the
+        number of those that resumed a TLS session and their time
+        (``resumed_handshakes``, ``resumed_handshake_time``).
+        """
+        with self._session_lock:
+            return dict(self._stats)
+
+
+def _peer_address(sock):
+    try:
+        return sock.getpeername()
+    except (socket.error, AttributeError):
+        return None
+
 
 class SSLHTTPAdapter(BaseHTTPAdapter):
     '''An HTTPS Transport Adapter that uses an arbitrary SSL version.'''
@@ -31,11 +188,15 @@ class SSLHTTPAdapter(BaseHTTPAdapter):
                                          'assert_hostname',
                                          'ssl_version']
 
+    # Not pickled along with the adapter
+    ssl_context = None
+
     def __init__(self, ssl_version=None, assert_hostname=None,
-                 assert_fingerprint=None, **kwargs):
+                 assert_fingerprint=None, ssl_context=None, **kwargs):
         self.ssl_version = ssl_version
         self.assert_hostname = assert_hostname
         self.assert_fingerprint = assert_fingerprint
+        self.ssl_context = ssl_context
         super(SSLHTTPAdapter, self).__init__(**kwargs)
 
     def init_poolmanager(self, connections, maxsize, block=False):
@@ -46,11 +207,28 @@ class SSLHTTPAdapter(BaseHTTPAdapter):
             'assert_hostname': self.assert_hostname,
             'assert_fingerprint': self.assert_fingerprint,
         }
-        if self.ssl_version and self.can_override_ssl_version():
+        if self.ssl_context is not None:
+            kwargs['ssl_context'] = self.ssl_context
+        elif self.ssl_version and self.can_override_ssl_version():
             kwargs['ssl_version'] = self.ssl_version
 
         self.poolmanager = PoolManager(**kwargs)
 
+    def cert_verify(self, conn, url, verify, cert):
+        conn_kw = getattr(conn, 'conn_kw', {})
+        if (self.ssl_context is None or
+                conn_kw.get('ssl_context') is not self.ssl_context):
+            return super(SSLHTTPAdapter, self).cert_verify(
+                conn, url, verify, cert
+            )
+        # Certificates are already loaded in the SSL context, rather than
+        # for every new connection
+        conn.cert_reqs = 'CERT_REQUIRED' if verify else 'CERT_NONE'
+        conn.ca_certs = None
+        conn.ca_cert_dir = None
+        conn.cert_file = None
+        conn.key_file = None
+
     def get_connection(self, *args, **kwargs):
         """
         Ensure assert_hostname is set correctly on our pool
@@ -70,4 +248,5 @@ class SSLHTTPAdapter(BaseHTTPAdapter):
             return False
         if urllib_ver == 'dev':
             return True
+        from distutils.version import StrictVersion
         return StrictVersion(urllib_ver) > StrictVersion('1.5')
@@ -1,9 +1,11 @@
 import six
 import requests.adapters
 import socket
+import time
 from six.moves import http_client as httplib
 
 from docker.transport.basehttpadapter import BaseHTTPAdapter
+from docker.transport.basehttpconnection import BaseHTTPConnection
 from .. import constants
 
 try:
@@ -14,6 +16,8 @@ except ImportError:
 
 RecentlyUsedContainer = urllib3._collections.RecentlyUsedContainer
 
+_monotonic = getattr(time, 'monotonic', time.time)
+
 
 class UnixHTTPResponse(httplib.HTTPResponse, object):
     def __init__(self, sock, *args, **kwargs):
@@ -26,7 +30,7 @@ class UnixHTTPResponse(httplib.HTTPResponse, object):
         super(UnixHTTPResponse, self).__init__(sock, *args, **kwargs)
 
 
-class UnixHTTPConnection(httplib.HTTPConnection, object):
+class UnixHTTPConnection(BaseHTTPConnection):
 
     def __init__(self, base_url, unix_socket, timeout=60):
         super(UnixHTTPConnection, self).__init__(
@@ -56,19 +60,65 @@ class UnixHTTPConnection(httplib.HTTPConnection, object):
 
 
 class UnixHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
-    def __init__(self, base_url, socket_path, timeout=60, maxsize=10):
+    def __init__(self, base_url, socket_path, timeout=60, maxsize=10,
+                 idle_timeout=constants.DEFAULT_UNIX_IDLE_TIMEOUT):
         super(UnixHTTPConnectionPool, self).__init__(
             'localhost', timeout=timeout, maxsize=maxsize
         )
         self.base_url = base_url
         self.socket_path = socket_path
         self.timeout = timeout
+        self.idle_timeout = idle_timeout
 
     def _new_conn(self):
         return UnixHTTPConnection(
             self.base_url, self.socket_path, self.timeout
         )
 
+    def _get_conn(self, timeout=None):
+        # urllib3 checks that the connection wasn't closed by the server,
+        # which may have restarted since it was last used
+        conn = super(UnixHTTPConnectionPool, self)._get_conn(timeout)
+        if conn.sock is not None and self._is_idle(conn):
+            # The connection reconnects on its next request
+            conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.last_used = _monotonic()
+        super(UnixHTTPConnectionPool, self)._put_conn(conn)
+
+    def _is_idle(self, conn):
+        last_used = getattr(conn, 'last_used', None)
+        return (
+            self.idle_timeout is not None and last_used is not None and
+            _monotonic() - last_used > self.idle_timeout
+        )
+
+    def prewarm(self, n):
+        """
+        Open connections ahead of time, so that up to ``n`` requests can be
+        sent at once without connecting first. ``n`` is capped by the size of
+        the pool.
+
+        Returns:
+            (int): The number of connections opened.
+        """
+        conns = []
+        opened = 0
+        try:
+            for _ in range(min(n, self.pool.maxsize)):
+                conns.append(self._get_conn())
+            for conn in conns:
+                if conn.sock is None:
+                    conn.connect()
+                    opened += 1
+        finally:
+            for conn in conns:
+                self._put_conn(conn)
+        return opened
+
 
 class UnixHTTPAdapter(BaseHTTPAdapter):
 
@@ -92,19 +142,30 @@ class UnixHTTPAdapter(BaseHTTPAdapter):
         super(UnixHTTPAdapter, self).__init__()
 
     def get_connection(self, url, proxies=None):
+        # All the URLs lead to the same socket: as requests does for other
+        # protocols, share a pool between the URLs of a host
+        parsed = six.moves.urllib.parse.urlsplit(url)
+        key = '{0}://{1}'.format(parsed.scheme, parsed.netloc)
         with self.pools.lock:
-            pool = self.pools.get(url)
+            pool = self.pools.get(key)
             if pool:
                 return pool
 
             pool = UnixHTTPConnectionPool(
-                url, self.socket_path, self.timeout,
+                key, self.socket_path, self.timeout,
                 maxsize=self.max_pool_size
             )
-            self.pools[url] = pool
+            self.pools[key] = pool
 
         return pool
 
+    def prewarm(self, url, n):
+        """
+        Open ``n`` connections for the requests to ``url`` ahead of time.
+        See :py:meth:`UnixHTTPConnectionPool.prewarm`.
+        """
+        return self.get_connection(url).prewarm(n)
+
     def request_url(self, request, proxies):
         # The select_proxy utility in requests errors out when the provided URL
         # doesn't have a hostname, like is the case when using a UNIX socket.
@@ -1,5 +1,9 @@
 # flake8: noqa
-from .build import create_archive, exclude_paths, mkbuildcontext, tar
+from .build import (
+    create_archive, create_cached_archive, exclude_paths, mkbuildcontext,
+    stream_archive, tar
+)
+from .compression import ParallelGzipWriter, gzip_compress
 from .decorators import check_resource, minimum_version, update_headers
 from .utils import (
     compare_version, convert_port_bindings, convert_volume_binds,
@@ -1,19 +1,38 @@
+import contextlib
 import io
+import json
 import os
 import re
+import stat
+import sys
 import tarfile
 import tempfile
+import threading
+import time
 
 import six
 
-from .fnmatch import fnmatch
-from ..constants import IS_WINDOWS_PLATFORM
+from .compression import ParallelGzipWriter
+from .fnmatch import fnmatch, translate
+from ..constants import DEFAULT_DATA_CHUNK_SIZE, IS_WINDOWS_PLATFORM
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
 
 
 _SEP = re.compile('/|\\\\') if IS_WINDOWS_PLATFORM else re.compile('/')
 
 
-def tar(path, exclude=None, dockerfile=None, fileobj=None, gzip=False):
+def tar(path, exclude=None, dockerfile=None, fileobj=None, gzip=False,
+        stream=False, cache_dir=None, gzip_level=9, gzip_workers=None):
     root = os.path.abspath(path)
     exclude = exclude or []
     dockerfile = dockerfile or (None, None)
@@ -26,19 +45,33 @@ def tar(path, exclude=None, dockerfile=None, fileobj=None, gzip=False):
             ('.dockerignore', dockerignore_contents),
             dockerfile,
         ]
+    files = sorted(exclude_paths(root, exclude, dockerfile=dockerfile[0]))
+    if cache_dir is not None and not gzip:
+        return create_cached_archive(
+            root=root, cache_dir=cache_dir, files=files, gzip=gzip,
+            extra_files=extra_files, gzip_level=gzip_level,
+            gzip_workers=gzip_workers
+        )
+    if stream:
+        return stream_archive(
+            root=root, files=files, gzip=gzip, extra_files=extra_files,
+            gzip_level=gzip_level, gzip_workers=gzip_workers
+        )
     return create_archive(
-        files=sorted(exclude_paths(root, exclude, dockerfile=dockerfile[0])),
-        root=root, fileobj=fileobj, gzip=gzip, extra_files=extra_files
+        files=files, root=root, fileobj=fileobj, gzip=gzip,
+        extra_files=extra_files, gzip_level=gzip_level,
+        gzip_workers=gzip_workers
     )
 
 
-def exclude_paths(root, patterns, dockerfile=None):
+def exclude_paths(root, patterns, dockerfile=None, workers=None):
     """
     Given a root directory path and a list of .dockerignore patterns, return
     an iterator of all paths (both regular files and directories) in the root
     directory that do *not* match any of the patterns.
 
-    All paths returned are relative to the root.
+    All paths returned are relative to the root. If ``workers`` is set,
+    directories are listed concurrently by that many threads.
     """
 
     if dockerfile is None:
@@ -46,7 +79,7 @@ def exclude_paths(root, patterns, dockerfile=None):
 
     patterns.append('!' + dockerfile)
     pm = PatternMatcher(patterns)
-    return set(pm.walk(root))
+    return set(pm.walk(root, workers=workers))
 
 
 def build_file_list(root):
@@ -62,11 +95,316 @@ def build_file_list(root):
 
 
 def create_archive(root, files=None, fileobj=None, gzip=False,
-                   extra_files=None):
-    extra_files = extra_files or []
+                   extra_files=None, gzip_level=9, gzip_workers=None):
+    """
+    Write a tar archive of ``files``, relative to ``root``, to ``fileobj``
+    or to a temporary file, and return it. If ``gzip`` is ``True``, the
+    archive is compressed by ``gzip_workers`` threads (one per CPU by
+    default) with the ``gzip_level`` compression level.
+    """
     if not fileobj:
         fileobj = tempfile.NamedTemporaryFile()
-    t = tarfile.open(mode='w:gz' if gzip else 'w', fileobj=fileobj)
+    if gzip:
+        with ParallelGzipWriter(fileobj, gzip_level, gzip_workers) as gz:
+            t = tarfile.open(mode='w|', fileobj=gz)
+            _add_files(t, root, files, extra_files)
+            t.close()
+    else:
+        t = tarfile.open(mode='w', fileobj=fileobj)
+        _add_files(t, root, files, extra_files)
+        t.close()
+    fileobj.seek(0)
+    return fileobj
+
+
+def stream_archive(root, files=None, gzip=False, extra_files=None,
+                   chunk_size=DEFAULT_DATA_CHUNK_SIZE, max_chunks=4,
+                   gzip_level=9, gzip_workers=None):
+    """
+    Same as :py:func:`create_archive`, but returns a generator of chunks of
+    the archive instead of a file.
+
+    The archive is written by a background thread as the generator is
+    consumed, and at most ``max_chunks`` chunks of ``chunk_size`` bytes are
+    kept in memory at a time. Closing the generator stops the thread.
+    """
+    chunks = six.moves.queue.Queue(max_chunks)
+    stopped = threading.Event()
+    writer = _ChunkWriter(chunks, chunk_size, stopped)
+
+    def write_archive():
+        try:
+            if gzip:
+                with ParallelGzipWriter(
+                        writer, gzip_level, gzip_workers) as gz:
+                    t = tarfile.open(mode='w|', fileobj=gz)
+                    _add_files(t, root, files, extra_files)
+                    t.close()
+            else:
+                t = tarfile.open(mode='w|', fileobj=writer)
+                _add_files(t, root, files, extra_files)
+                t.close()
+            writer.flush()
+            writer.put(None)
+        except _Stopped:
+            pass
+        except Exception:
+            try:
+                writer.put(sys.exc_info())
+            except _Stopped:
+                pass
+
+    thread = threading.Thread(target=write_archive)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, tuple):
+                six.reraise(*chunk)
+            yield chunk
+    finally:
+        stopped.set()
+
+
+class _Stopped(Exception):
+    pass
+
+
+class _ChunkWriter(object):
+    """
+    A write-only file that queues what is written to it in chunks.
+    """
+    def __init__(self, chunks, chunk_size, stopped):
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.stopped = stopped
+        self.aborted = False
+        self.buf = bytearray()
+
+    def write(self, data):
+        if self.aborted:
+            # The tar stream may still be flushed while it is collected
+            return
+        self.buf += data
+        while len(self.buf) >= self.chunk_size:
+            self.put(bytes(self.buf[:self.chunk_size]))
+            del self.buf[:self.chunk_size]
+
+    def flush(self):
+        if self.buf:
+            self.put(bytes(self.buf))
+            self.buf = bytearray()
+
+    def put(self, item):
+        # Don't block forever if the reader went away
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except six.moves.queue.Full:
+                pass
+        self.aborted = True
+        raise _Stopped()
+
+
+def create_cached_archive(root, cache_dir, files=None, gzip=False,
+                          extra_files=None, gzip_level=9, gzip_workers=None):
+    """
+    Same as :py:func:`create_archive`, but keeps the archive and an index of
+    its members in ``cache_dir``. Files that haven't changed since the
+    previous call with the same cache (same size, modification time, inode,
+    mode and owner) are copied from the previous archive instead of being
+    read and archived again.
+
+    Several processes can share ``cache_dir``: each archive is written
+    under a unique name, and the index is updated under a file lock.
+
+    The cache isn't used with ``gzip=True``: the whole archive would still
+    have to be compressed again, which costs more than archiving the files.
+    """
+    extra_files = extra_files or []
+    if files is None:
+        files = build_file_list(root)
+    if gzip:
+        return create_archive(
+            root=root, files=files, gzip=True, extra_files=extra_files,
+            gzip_level=gzip_level, gzip_workers=gzip_workers
+        )
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+    old = None
+    with _cache_lock(cache_dir):
+        index = _load_context_index(cache_dir, root)
+        previous_entries = index.get('entries', {})
+        if previous_entries:
+            # Once open, the archive can be read even if another build
+            # replaces and removes it
+            try:
+                old = open(os.path.join(cache_dir, index['archive']), 'rb')
+            except (IOError, OSError):
+                previous_entries = {}
+    entries = {}
+    # Files modified this recently could be modified again without their
+    # modification time changing, so they aren't reused next time
+    racy_after = time.time() - 1
+
+    fd, archive = tempfile.mkstemp(
+        prefix='context-', suffix='.tar', dir=cache_dir
+    )
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            t = tarfile.open(mode='w', fileobj=out)
+            # Range of the previous archive that still has to be copied
+            copy_start, copy_end = 0, 0
+            extra_names = set(e[0] for e in extra_files)
+            for path in files:
+                if path in extra_names:
+                    continue
+                st = os.lstat(os.path.join(root, path))
+                key = _context_cache_key(st)
+                cached = previous_entries.get(path)
+                if cached and cached[:-2] == key:
+                    offset, length = cached[-2:]
+                    if offset != copy_end:
+                        _copy_range(old, out, copy_start, copy_end)
+                        copy_start = offset
+                    copy_end = offset + length
+                    entries[path] = key + [t.offset, length]
+                    t.offset += length
+                    continue
+
+                _copy_range(old, out, copy_start, copy_end)
+                copy_start, copy_end = 0, 0
+                offset = t.offset
+                if not _add_file(t, root, path):
+                    continue
+                # Hard links are archived as references to the first path
+                # of the same inode, so they always need a TarFile
+                if st.st_mtime < racy_after and (
+                        not stat.S_ISREG(st.st_mode) or st.st_nlink == 1):
+                    entries[path] = key + [offset, t.offset - offset]
+
+            _copy_range(old, out, copy_start, copy_end)
+            _add_extra_files(t, extra_files)
+            t.close()
+        # Opened before it is published, as the next build removes it
+        result = open(archive, 'rb')
+    except BaseException:
+        os.remove(archive)
+        raise
+    finally:
+        if old is not None:
+            old.close()
+
+    try:
+        with _cache_lock(cache_dir):
+            # Only the archive of the index being replaced is removed:
+            # the archives of the builds in progress aren't published yet
+            replaced = _load_context_index(cache_dir, root).get('archive')
+            _save_context_index(cache_dir, {
+                'root': root,
+                'archive': os.path.basename(archive),
+                'entries': entries,
+            })
+            if replaced:
+                try:
+                    os.remove(os.path.join(cache_dir, replaced))
+                except OSError:
+                    pass
+    except BaseException:
+        result.close()
+        os.remove(archive)
+        raise
+
+    return result
+
+
+@contextlib.contextmanager
+def _cache_lock(cache_dir):
+    # Serializes the index updates of the builds that share a cache, in
+    # this process or in others
+    with open(os.path.join(cache_dir, _CONTEXT_LOCK), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except IOError:
+                    # LK_LOCK gives up after 10 seconds
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_CONTEXT_INDEX = 'index.json'
+_CONTEXT_LOCK = 'index.lock'
+
+
+def _context_cache_key(st):
+    return [
+        st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime), st.st_ino,
+        st.st_mode, st.st_uid, st.st_gid
+    ]
+
+
+def _load_context_index(cache_dir, root):
+    try:
+        with open(os.path.join(cache_dir, _CONTEXT_INDEX), 'r') as f:
+            index = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    archive = index.get('archive')
+    if not archive or not os.path.exists(os.path.join(cache_dir, archive)):
+        return {}
+    if index.get('root') != root:
+        # Nothing can be reused, but the archive still has to be replaced
+        return {'archive': archive}
+    return index
+
+
+def _save_context_index(cache_dir, index):
+    fd, path = tempfile.mkstemp(prefix='index-', dir=cache_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(index, f)
+    _replace(path, os.path.join(cache_dir, _CONTEXT_INDEX))
+
+
+def _replace(src, dst):
+    if six.PY2 and IS_WINDOWS_PLATFORM and os.path.exists(dst):
+        os.remove(dst)
+    getattr(os, 'replace', os.rename)(src, dst)
+
+
+def _copy_range(src, dst, start, end):
+    if start == end:
+        return
+    src.seek(start)
+    while start < end:
+        data = src.read(min(end - start, DEFAULT_DATA_CHUNK_SIZE))
+        if not data:
+            raise IOError('Build context cache is truncated')
+        dst.write(data)
+        start += len(data)
+
+
+def _add_files(t, root, files, extra_files):
+    extra_files = extra_files or []
     if files is None:
         files = build_file_list(root)
     extra_names = set(e[0] for e in extra_files)
@@ -74,45 +412,49 @@ def create_archive(root, files=None, fileobj=None, gzip=False,
         if path in extra_names:
             # Extra files override context files with the same name
             continue
-        full_path = os.path.join(root, path)
+        _add_file(t, root, path)
+    _add_extra_files(t, extra_files)
 
-        i = t.gettarinfo(full_path, arcname=path)
-        if i is None:
-            # This happens when we encounter a socket file. We can safely
-            # ignore it and proceed.
-            continue
 
-        # Workaround https://bugs.python.org/issue32713
-        if i.mtime < 0 or i.mtime > 8**11 - 1:
-            i.mtime = int(i.mtime)
+def _add_file(t, root, path):
+    full_path = os.path.join(root, path)
 
-        if IS_WINDOWS_PLATFORM:
-            # Windows doesn't keep track of the execute bit, so we make files
-            # and directories executable by default.
-            i.mode = i.mode & 0o755 | 0o111
+    i = t.gettarinfo(full_path, arcname=path)
+    if i is None:
+        # This happens when we encounter a socket file. We can safely
+        # ignore it and proceed.
+        return False
+
+    # Workaround https://bugs.python.org/issue32713
+    if i.mtime < 0 or i.mtime > 8**11 - 1:
+        i.mtime = int(i.mtime)
+
+    if IS_WINDOWS_PLATFORM:
+        # Windows doesn't keep track of the execute bit, so we make files
+        # and directories executable by default.
+        i.mode = i.mode & 0o755 | 0o111
+
+    if i.isfile():
+        try:
+            with open(full_path, 'rb') as f:
+                t.addfile(i, f)
+        except IOError:
+            raise IOError(
+                'Can not read file in context: {}'.format(full_path)
+            )
+    else:
+        # Directories, FIFOs, symlinks... don't need to be read.
+        t.addfile(i, None)
+    return True
 
-        if i.isfile():
-            try:
-                with open(full_path, 'rb') as f:
-                    t.addfile(i, f)
-            except IOError:
-                raise IOError(
-                    'Can not read file in context: {}'.format(full_path)
-                )
-        else:
-            # Directories, FIFOs, symlinks... don't need to be read.
-            t.addfile(i, None)
 
+def _add_extra_files(t, extra_files):
     for name, contents in extra_files:
         info = tarfile.TarInfo(name)
         contents_encoded = contents.encode('utf-8')
         info.size = len(contents_encoded)
         t.addfile(info, io.BytesIO(contents_encoded))
 
-    t.close()
-    fileobj.seek(0)
-    return fileobj
-
 
 def mkbuildcontext(dockerfile):
     f = tempfile.NamedTemporaryFile()
@@ -147,9 +489,9 @@ def normalize_slashes(p):
     return p
 
 
-def walk(root, patterns, default=True):
+def walk(root, patterns, default=True, workers=None):
     pm = PatternMatcher(patterns)
-    return pm.walk(root)
+    return pm.walk(root, workers=workers)
 
 
 # Heavily based on
@@ -160,27 +502,121 @@ class PatternMatcher(object):
             lambda p: p.dirs, [Pattern(p) for p in patterns]
         ))
         self.patterns.append(Pattern('!.dockerignore'))
+        self._rules = self._compile_rules(self.patterns)
+
+    @staticmethod
+    def _compile_rules(patterns):
+        # The last pattern matching a path decides whether it is excluded,
+        # so patterns are checked in reverse order, and consecutive patterns
+        # with the same polarity are merged into a single regular expression.
+        # A pattern also matches a path if it matches the first components
+        # of its parent directory, as many as the pattern has. When none of
+        # its wildcards can match a "/", that is the same as matching the
+        # path or one of its parents, which the expression checks directly.
+        # Otherwise (e.g. "**"), the parent prefix is checked separately.
+        rules = []
+        for pattern in reversed(patterns):
+            depth = None if pattern.fixed_depth else len(pattern.dirs)
+            body = '(?:{0})'.format(
+                translate(pattern.cleaned_pattern.lower())[1:-1]
+            )
+            if rules and rules[-1][:2] == (pattern.exclusion, depth):
+                rules[-1][2].append(body)
+            else:
+                rules.append((pattern.exclusion, depth, [body]))
+
+        return [
+            (negative, depth, re.compile('(?:{0}){1}$'.format(
+                '|'.join(bodies), '(?:/[\\s\\S]*)?' if depth is None else ''
+            )))
+            for negative, depth, bodies in rules
+        ]
 
     def matches(self, filepath):
-        matched = False
-        parent_path = os.path.dirname(filepath)
-        parent_path_dirs = split_path(parent_path)
-
-        for pattern in self.patterns:
-            negative = pattern.exclusion
-            match = pattern.match(filepath)
-            if not match and parent_path != '':
-                if len(pattern.dirs) <= len(parent_path_dirs):
-                    match = pattern.match(
-                        os.path.sep.join(parent_path_dirs[:len(pattern.dirs)])
+        path = normalize_slashes(filepath).lower()
+        parent_path_dirs = None
+        for negative, depth, regex in self._rules:
+            match = regex.match(path)
+            if not match and depth is not None:
+                if parent_path_dirs is None:
+                    parent_path_dirs = split_path(os.path.dirname(filepath))
+                if depth <= len(parent_path_dirs):
+                    match = regex.match(
+                        '/'.join(parent_path_dirs[:depth]).lower()
                     )
-
             if match:
-                matched = not negative
+                return not negative
+        return False
+
+    def _skip_dir(self, fpath):
+        # If we want to skip this file and it's a directory then we should
+        # first check to see if there's an excludes pattern (e.g. !dir/file)
+        # that starts with this dir. If so then we can't skip this dir.
+        for pat in self.patterns:
+            if not pat.exclusion:
+                continue
+            if pat.cleaned_pattern.startswith(normalize_slashes(fpath)):
+                return False
+        return True
+
+    def _scan(self, root, current_dir):
+        """
+        List a directory, relative to root, and return a list of
+        ``(path, excluded, descend)`` tuples for its entries.
+        """
+        entries = []
+        for entry in list(scandir(os.path.join(root, current_dir))):
+            fpath = os.path.join(current_dir, entry.name)
+            match = self.matches(fpath)
+            # The entry caches the file type, so this doesn't stat it again
+            descend = entry.is_dir(follow_symlinks=False) and (
+                not match or not self._skip_dir(fpath)
+            )
+            entries.append((fpath, match, descend))
+        return entries
+
+    def walk(self, root, workers=None):
+        """
+        Return an iterator of the paths below root, relative to it, that
+        don't match the patterns. If ``workers`` is set, directories are
+        listed concurrently by that many threads, which mostly helps on slow
+        (e.g. network) file systems. Paths are then not returned in a
+        depth-first order.
+        """
+        if scandir is None:
+            return self._listdir_walk(root)
+        if workers:
+            return self._parallel_walk(root, workers)
+
+        def rec_walk(current_dir):
+            for fpath, match, descend in self._scan(root, current_dir):
+                if not match:
+                    yield fpath
+                if descend:
+                    for sub in rec_walk(fpath):
+                        yield sub
+
+        return rec_walk('')
 
-        return matched
+    def _parallel_walk(self, root, workers):
+        from concurrent.futures import (
+            FIRST_COMPLETED, ThreadPoolExecutor, wait
+        )
 
-    def walk(self, root):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set([executor.submit(self._scan, root, '')])
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for fpath, match, descend in future.result():
+                        if not match:
+                            yield fpath
+                        if descend:
+                            pending.add(
+                                executor.submit(self._scan, root, fpath)
+                            )
+
+    def _listdir_walk(self, root):
         def rec_walk(current_dir):
             for f in os.listdir(current_dir):
                 fpath = os.path.join(
@@ -196,22 +632,8 @@ class PatternMatcher(object):
                 if not os.path.isdir(cur) or os.path.islink(cur):
                     continue
 
-                if match:
-                    # If we want to skip this file and it's a directory
-                    # then we should first check to see if there's an
-                    # excludes pattern (e.g. !dir/file) that starts with this
-                    # dir. If so then we can't skip this dir.
-                    skip = True
-
-                    for pat in self.patterns:
-                        if not pat.exclusion:
-                            continue
-                        if pat.cleaned_pattern.startswith(
-                                normalize_slashes(fpath)):
-                            skip = False
-                            break
-                    if skip:
-                        continue
+                if match and self._skip_dir(fpath):
+                    continue
                 for sub in rec_walk(cur):
                     yield sub
 
@@ -227,6 +649,12 @@ class Pattern(object):
 
         self.dirs = self.normalize(pattern_str)
         self.cleaned_pattern = '/'.join(self.dirs)
+        # Whether the pattern only matches paths with as many components as
+        # it has, i.e. none of its wildcards can match a "/"
+        self.fixed_depth = not (
+            '**' in self.cleaned_pattern or '[!' in self.cleaned_pattern or
+            re.search(r'\[[^\]]*/', self.cleaned_pattern)
+        )
 
     @classmethod
     def normalize(cls, p):
@@ -0,0 +1,158 @@
+import collections
+import io
+import struct
+import time
+import zlib
+
+import six
+
+try:
+    from os import cpu_count
+except ImportError:
+    from multiprocessing import cpu_count
+
+
+GZIP_BLOCK_SIZE = 128 * 1024
+# Size of the deflate window, used to prime the compression of a block with
+# the end of the previous one
+_WINDOW_SIZE = 32 * 1024
+
+
+class ParallelGzipWriter(object):
+    """
+    A write-only file that gzip-compresses what is written to it, and writes
+    the result to ``fileobj``.
+
+    Like pigz, data is split into blocks that are compressed concurrently by
+    a pool of ``workers`` threads, each block using the end of the previous
+    one as a dictionary. The blocks are joined into a single, standard gzip
+    member. With a single worker, or on Python 2, data is compressed on the
+    calling thread.
+
+    Closing the writer doesn't close ``fileobj``.
+    """
+    def __init__(self, fileobj, compresslevel=9, workers=None,
+                 block_size=GZIP_BLOCK_SIZE):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.block_size = block_size
+        self.workers = workers or cpu_count() or 1
+        self.closed = False
+        self._buf = bytearray()
+        self._crc = 0
+        self._size = 0
+        self._dictionary = b''
+        self._pending = collections.deque()
+        self._executor = None
+        self._compressor = None
+        if self.workers > 1 and six.PY3:
+            # Imported here, so that importing docker doesn't load it
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            self._compressor = zlib.compressobj(
+                compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS
+            )
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._executor is not None:
+            self._executor.shutdown()
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('write() on closed ParallelGzipWriter')
+        view = memoryview(data)
+        if self._buf:
+            missing = self.block_size - len(self._buf)
+            self._buf += view[:missing]
+            view = view[missing:]
+            if len(self._buf) < self.block_size:
+                return len(data)
+            self._compress(bytes(self._buf))
+            self._buf = bytearray()
+        while len(view) >= self.block_size:
+            self._compress(view[:self.block_size].tobytes())
+            view = view[self.block_size:]
+        self._buf += view
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._compress(bytes(self._buf), last=True)
+        self._buf = None
+        while self._pending:
+            self.fileobj.write(self._pending.popleft().result())
+        if self._executor is not None:
+            self._executor.shutdown()
+        self.fileobj.write(
+            struct.pack('<LL', self._crc & 0xffffffff, self._size & 0xffffffff)
+        )
+
+    def _write_header(self):
+        if self.compresslevel == 9:
+            xfl = b'\002'
+        elif self.compresslevel == 1:
+            xfl = b'\004'
+        else:
+            xfl = b'\000'
+        self.fileobj.write(
+            b'\037\213\010\000' + struct.pack('<L', int(time.time())) +
+            xfl + b'\377'
+        )
+
+    def _compress(self, block, last=False):
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+        if self._executor is None:
+            data = self._compressor.compress(block)
+            if last:
+                data += self._compressor.flush()
+            self.fileobj.write(data)
+            return
+
+        self._pending.append(self._executor.submit(
+            _deflate, block, self.compresslevel, self._dictionary, last
+        ))
+        self._dictionary = block[-_WINDOW_SIZE:]
+        # Bound the memory used by blocks that are waiting to be written
+        while len(self._pending) > 2 * self.workers:
+            self.fileobj.write(self._pending.popleft().result())
+
+
+def _deflate(block, compresslevel, dictionary, last):
+    args = [compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS]
+    if dictionary:
+        args += [zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY, dictionary]
+    compressor = zlib.compressobj(*args)
+    return compressor.compress(block) + compressor.flush(
+        zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+    )
+
+
+def gzip_compress(data, compresslevel=9, workers=None):
+    """
+    Compress bytes, or the content of a readable file-like object, with
+    :py:class:`ParallelGzipWriter` and return the compressed bytes.
+    """
+    out = io.BytesIO()
+    with ParallelGzipWriter(out, compresslevel, workers) as writer:
+        if hasattr(data, 'read'):
+            while True:
+                chunk = data.read(GZIP_BLOCK_SIZE * 8)
+                if not chunk:
+                    break
+                writer.write(chunk)
+        else:
+            writer.write(data)
+    return out.getvalue()
@@ -38,10 +38,16 @@ def minimum_version(version):
 
 def update_headers(f):
     def inner(self, *args, **kwargs):
-        if 'HttpHeaders' in self._general_configs:
-            if not kwargs.get('headers'):
-                kwargs['headers'] = self._general_configs['HttpHeaders']
+        # The client merges the configured headers once, when it loads the
+        # configuration. The caller's headers are left untouched.
+        config_headers = self._config_headers
+        if config_headers:
+            headers = kwargs.get('headers')
+            if headers:
+                headers = dict(headers)
+                headers.update(config_headers)
+                kwargs['headers'] = headers
             else:
-                kwargs['headers'].update(self._general_configs['HttpHeaders'])
+                kwargs['headers'] = config_headers
         return f(self, *args, **kwargs)
     return inner
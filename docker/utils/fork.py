@@ -0,0 +1,52 @@
+import logging
+import os
+import weakref
+
+log = logging.getLogger(__name__)
+
+# Objects whose _reset_after_fork() method is called in child processes
+_registered = weakref.WeakSet()
+# Callables called in child processes
+_callbacks = []
+# Objects inherited from the parent process that must never be finalized in
+# the child, because finalizing them would write to connections the parent
+# still uses
+_inherited = []
+
+
+def register(obj):
+    """
+    Call ``obj._reset_after_fork()`` in the child processes forked by this
+    process, for as long as ``obj`` is alive. Nothing is done on platforms
+    without :py:func:`os.register_at_fork` (Python < 3.7, Windows).
+    """
+    _registered.add(obj)
+
+
+def after_in_child(func):
+    """
+    Call ``func()`` in the child processes forked by this process.
+    """
+    _callbacks.append(func)
+    return func
+
+
+def keep(*objs):
+    """
+    Keep references to ``objs`` until the process exits, so that they are
+    never finalized. Meant for objects inherited from the parent process.
+    """
+    _inherited.extend(objs)
+
+
+def _reset_in_child():
+    for func in list(_callbacks) + [
+            obj._reset_after_fork for obj in list(_registered)]:
+        try:
+            func()
+        except Exception:
+            log.warning('Failed to reset %r after fork', func, exc_info=True)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_in_child)
@@ -8,9 +8,20 @@ import six
 
 from ..errors import StreamParseError
 
-
 json_decoder = json.JSONDecoder()
 
+try:
+    from orjson import loads as _loads
+except ImportError:
+    try:
+        import ujson
+
+        def _loads(data):
+            return ujson.loads(bytes(data))
+    except ImportError:
+        def _loads(data):
+            return json_decoder.decode(data.decode('utf-8'))
+
 
 def stream_as_text(stream):
     """
@@ -43,7 +54,116 @@ def json_stream(stream):
     This handles streams which are inconsistently buffered (some entries may
     be newline delimited, and others are not).
     """
-    return split_buffer(stream, json_splitter, json_decoder.decode)
+    decoder = JSONStreamDecoder()
+    for data in stream:
+        for obj in decoder.feed(data):
+            yield obj
+    for obj in decoder.close():
+        yield obj
+
+
+def _raw_decode_all(text):
+    """Decode as many consecutive json objects as possible from text. Return
+    them along with the index at which decoding stopped.
+    """
+    objects = []
+    index = json.decoder.WHITESPACE.match(text, 0).end()
+    while index < len(text):
+        try:
+            obj, index = json_decoder.raw_decode(text, index)
+        except ValueError:
+            break
+        objects.append(obj)
+        index = json.decoder.WHITESPACE.match(text, index).end()
+    return objects, index
+
+
+class JSONStreamDecoder(object):
+    """
+    Incremental decoder for a stream of json objects, usually one per line
+    as sent by the Engine for progress and event streams.
+
+    Input is appended to a bytes buffer and only complete lines are decoded,
+    so the cost is linear in the size of the stream. Lines holding several
+    objects, or objects spanning several lines, are also supported.
+
+    ``orjson`` or ``ujson`` are used to decode each line when installed.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        # Start of the first object that hasn't been decoded yet
+        self._pos = 0
+        # Where to look for the next line break
+        self._search = 0
+
+    def feed(self, data):
+        """Add data (bytes or text) to the buffer and return the list of
+        objects that could be decoded.
+        """
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        buf = self._buffer
+        if self._pos:
+            del buf[:self._pos]
+            self._search -= self._pos
+            self._pos = 0
+        buf += data
+
+        objects = []
+        while True:
+            newline = buf.find(b'\n', self._search)
+            if newline == -1:
+                break
+            self._search = newline + 1
+            objects.extend(self._decode(self._search))
+
+        # Don't hold back an object that isn't followed by a line break
+        if len(buf) > self._pos and buf[-1:] in (b'}', b']'):
+            objects.extend(self._decode(len(buf)))
+        return objects
+
+    def close(self):
+        """Decode and return whatever is left in the buffer. Raises
+        StreamParseError if it isn't valid json.
+        """
+        rest = bytes(self._buffer[self._pos:]).decode('utf-8', 'replace')
+        self._buffer = bytearray()
+        self._pos = self._search = 0
+        objects, index = _raw_decode_all(rest)
+        if index < len(rest):
+            try:
+                json_decoder.decode(rest[index:])
+            except Exception as e:
+                raise StreamParseError(e)
+        return objects
+
+    def _decode(self, end):
+        record = self._buffer[self._pos:end]
+        if not record.strip():
+            self._pos = end
+            return []
+        try:
+            obj = _loads(record)
+        except ValueError:
+            pass
+        else:
+            self._pos = end
+            self._search = max(self._search, end)
+            return [obj]
+
+        # Several objects on one line, or an incomplete object
+        text = record.decode('utf-8', 'replace')
+        objects, index = _raw_decode_all(text)
+        if index < len(text):
+            rest = text[index:].encode('utf-8')
+            self._buffer[self._pos:end] = rest
+            end = self._pos + len(rest)
+            self._search = end
+        else:
+            self._pos = end
+            self._search = max(self._search, end)
+        return objects
 
 
 def line_splitter(buffer, separator=u'\n'):
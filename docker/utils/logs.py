@@ -0,0 +1,445 @@
+import calendar
+import collections
+import json
+import os
+import re
+import socket
+import tempfile
+import time
+
+import requests.exceptions
+import six
+
+from .. import errors
+from ..constants import DEFAULT_MAX_LOG_LINE_LENGTH, IS_WINDOWS_PLATFORM
+from .socket import STDERR, STDOUT
+
+try:
+    import requests.packages.urllib3 as urllib3
+except ImportError:
+    import urllib3
+
+
+LogLine = collections.namedtuple('LogLine', ['stream', 'timestamp', 'data'])
+LogLine.__doc__ = """
+A line of the logs of a container.
+
+Attributes:
+    stream (int): ``1`` for ``stdout``, ``2`` for ``stderr``.
+    timestamp (str): The RFC3339 timestamp of the line, with nanoseconds.
+    data (bytes): The line, without the timestamp but with its line break.
+"""
+
+_STREAM_NAMES = {STDOUT: 'stdout', STDERR: 'stderr'}
+
+_RFC3339 = re.compile(
+    r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d{1,9}))?'
+    r'(Z|[+-]\d\d:\d\d)$'
+)
+
+_RETRYABLE_ERRORS = (
+    requests.exceptions.RequestException, urllib3.exceptions.HTTPError,
+    socket.error
+)
+
+
+def parse_timestamp(timestamp):
+    """
+    Parse an RFC3339 timestamp, as prefixed to log lines by the Engine,
+    without losing precision.
+
+    Returns:
+        (tuple): The UNIX time, in seconds, and the nanoseconds.
+
+    Raises:
+        ValueError: If the timestamp is not valid.
+    """
+    match = _RFC3339.match(timestamp)
+    if match is None:
+        raise ValueError('Invalid timestamp: {0!r}'.format(timestamp))
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    seconds = calendar.timegm(tuple(int(v) for v in (
+        year, month, day, hour, minute, second
+    )))
+    if offset != 'Z':
+        delta = int(offset[1:3]) * 3600 + int(offset[4:6]) * 60
+        seconds -= delta if offset[0] == '+' else -delta
+    nanoseconds = int((fraction or '0').ljust(9, '0'))
+    return seconds, nanoseconds
+
+
+def _timestamp_to_float(line):
+    # Parses the timestamp the Engine prefixes log lines with, as a float,
+    # with arithmetic on the bytes of the fixed-width format it uses
+    # (RFC3339 with nanoseconds, in UTC)
+    if six.PY3 and len(line) > 30 and line[30] == 32 and line[29] == 90 and \
+            line[19] == 46 and line[10] == 84:
+        year = line[0] * 1000 + line[1] * 100 + line[2] * 10 + line[3] - \
+            53328
+        month = line[5] * 10 + line[6] - 528
+        day = line[8] * 10 + line[9] - 528
+        # Days since the epoch, from the proleptic Gregorian calendar
+        year -= month <= 2
+        era = year // 400
+        year_of_era = year - era * 400
+        day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + \
+            day - 1
+        days = era * 146097 + year_of_era * 365 + year_of_era // 4 - \
+            year_of_era // 100 + day_of_year - 719468
+        seconds = (
+            days * 86400 +
+            (line[11] * 10 + line[12] - 528) * 3600 +
+            (line[14] * 10 + line[15] - 528) * 60 +
+            line[17] * 10 + line[18] - 528
+        )
+        try:
+            return seconds + int(line[20:29]) / 1e9, 31
+        except ValueError:
+            return None, 0
+    end = line.find(b' ', 0, 40)
+    if end < 0:
+        return None, 0
+    try:
+        seconds, nanoseconds = parse_timestamp(line[:end].decode('ascii'))
+    except ValueError:
+        return None, 0
+    return seconds + nanoseconds / 1e9, end + 1
+
+
+class LineSplitter(object):
+    """
+    Splits the data of several streams into lines, keeping a buffer per
+    stream for the line being received. Lines longer than
+    ``max_line_length`` are split in several lines, so that the memory
+    used stays bounded.
+    """
+    def __init__(self, max_line_length=DEFAULT_MAX_LOG_LINE_LENGTH):
+        self.max_line_length = max_line_length
+        self._buffers = {}
+
+    def feed(self, stream, data):
+        """
+        Add ``data`` received on ``stream``, and return the list of the
+        lines it completes, with their line break.
+        """
+        buf = self._buffers.get(stream)
+        if not buf:
+            # Log lines usually come as one frame each
+            if data and isinstance(data, bytes) and \
+                    data.find(b'\n') == len(data) - 1 and \
+                    len(data) <= self.max_line_length:
+                return [data]
+            if buf is None:
+                buf = self._buffers[stream] = bytearray()
+        buf += data
+        lines = []
+        max_length = self.max_line_length
+        start = 0
+        end = buf.find(b'\n') + 1
+        while True:
+            limit = end or len(buf)
+            while limit - start > max_length:
+                lines.append(bytes(buf[start:start + max_length]))
+                start += max_length
+            if not end:
+                break
+            lines.append(bytes(buf[start:end]))
+            start = end
+            end = buf.find(b'\n', start) + 1
+        del buf[:start]
+        return lines
+
+    def flush(self):
+        """
+        Return the ``(stream, data)`` pairs of the lines that were not
+        terminated, and forget them.
+        """
+        pending = [
+            (stream, bytes(buf)) for stream, buf in self._buffers.items()
+            if buf
+        ]
+        self._buffers.clear()
+        return pending
+
+
+def iter_lines(frames, max_line_length=DEFAULT_MAX_LOG_LINE_LENGTH,
+               parse_timestamps=False):
+    """
+    Returns a generator of the complete lines of the streams multiplexed in
+    ``frames``, as ``(stream, line)`` tuples, or
+    ``(stream, timestamp, line)`` tuples with ``parse_timestamps``.
+
+    Args:
+        frames (iterable): ``(stream, data)`` tuples, as yielded by
+            :py:func:`~docker.utils.socket.frames_iter`.
+        max_line_length (int): Longer lines are split in several lines.
+        parse_timestamps (bool): Remove the timestamp prefixed to the lines
+            of logs requested with ``timestamps=True``, and yield it as a
+            UNIX time, in seconds, or ``None`` for the lines that have no
+            timestamp.
+
+    Closing the generator closes ``frames``, if it can be closed.
+    """
+    splitter = LineSplitter(max_line_length)
+    try:
+        for stream, data in frames:
+            for line in splitter.feed(stream, data):
+                if parse_timestamps:
+                    timestamp, start = _timestamp_to_float(line)
+                    yield stream, timestamp, line[start:] if start else line
+                else:
+                    yield stream, line
+    finally:
+        if hasattr(frames, 'close'):
+            frames.close()
+    for stream, line in splitter.flush():
+        if parse_timestamps:
+            timestamp, start = _timestamp_to_float(line)
+            yield stream, timestamp, line[start:] if start else line
+        else:
+            yield stream, line
+
+
+def _is_retryable(error):
+    if isinstance(error, errors.APIError):
+        return error.is_server_error()
+    return isinstance(error, _RETRYABLE_ERRORS)
+
+
+class LogFollower(object):
+    """
+    Follows the logs of a container across disconnections, yielding
+    :py:class:`LogLine` objects.
+
+    When the connection to the server is lost, or the daemon restarts,
+    the logs are requested again since the timestamp of the last line
+    delivered, and the lines that were already delivered are skipped. The
+    position reached on each stream is the :py:attr:`checkpoint` of the
+    follower, which can be passed to another follower, or saved to a
+    file, to resume from it later.
+
+    A line counts as delivered once the iteration moves past it, so no
+    line is ever skipped, but the lines consumed since the checkpoint was
+    last saved are delivered again after a crash.
+
+    Created with
+    :py:meth:`~docker.api.container.ContainerApiMixin.follow_logs`.
+    """
+
+    def __init__(self, open_stream, is_running, since=None, tail='all',
+                 checkpoint=None, checkpoint_path=None,
+                 checkpoint_interval=1, max_retries=None, backoff_factor=0.5,
+                 max_backoff=30,
+                 max_line_length=DEFAULT_MAX_LOG_LINE_LENGTH):
+        self._open_stream = open_stream
+        self._is_running = is_running
+        self._since = since
+        self._tail = tail
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._max_backoff = max_backoff
+        self._max_line_length = max_line_length
+        self._stream = None
+        self._closed = False
+        self._saved_at = None
+
+        if checkpoint is None and checkpoint_path is not None and \
+                os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+        # Per stream, the timestamp of the last line delivered, parsed and
+        # as received, and the number of lines delivered with it
+        self._positions = {}
+        for stream, name in _STREAM_NAMES.items():
+            position = (checkpoint or {}).get(name)
+            if position:
+                self._positions[stream] = [
+                    parse_timestamp(position['timestamp']),
+                    position['timestamp'], position['count']
+                ]
+        self.reconnects = 0
+
+    def __iter__(self):
+        return self._follow()
+
+    @property
+    def checkpoint(self):
+        """
+        A dict of the ``timestamp`` of the last line delivered on each
+        stream, ``stdout`` and ``stderr``, and the ``count`` of lines
+        delivered with that timestamp.
+        """
+        return dict(
+            (_STREAM_NAMES[stream], {'timestamp': text, 'count': count})
+            for stream, (_, text, count) in self._positions.items()
+        )
+
+    def save_checkpoint(self):
+        """
+        Write the checkpoint to ``checkpoint_path``, atomically.
+        """
+        if self._checkpoint_path is None:
+            return
+        path = self._checkpoint_path
+        fd, tmp_path = tempfile.mkstemp(
+            prefix='.checkpoint-', dir=os.path.dirname(os.path.abspath(path))
+        )
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.checkpoint, f)
+            if six.PY2 and IS_WINDOWS_PLATFORM and os.path.exists(path):
+                os.remove(path)
+            getattr(os, 'replace', os.rename)(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        self._saved_at = time.time()
+
+    def close(self):
+        """
+        Stop following the logs. Can be called from another thread.
+        """
+        self._closed = True
+        if self._stream is not None:
+            self._stream.close()
+
+    def _resume_point(self):
+        if not self._positions:
+            return self._since, self._tail
+        # Lines are requested again from the start of the second of the
+        # oldest position: those already delivered are skipped
+        seconds = min(p[0][0] for p in self._positions.values())
+        return max(seconds, 1), 'all'
+
+    def _is_delivered(self, stream, timestamp, resumed, seen):
+        position = resumed.get(stream)
+        if position is None:
+            return False
+        if timestamp != position[0]:
+            return timestamp < position[0]
+        seen[stream] = seen.get(stream, 0) + 1
+        return seen[stream] <= position[1]
+
+    def _deliver(self, stream, message):
+        if message is None:
+            return
+        timestamp, text = message
+        position = self._positions.get(stream)
+        if position is not None and position[0] == timestamp:
+            position[2] += 1
+        else:
+            self._positions[stream] = [timestamp, text, 1]
+        if self._checkpoint_path is not None and (
+                self._saved_at is None or
+                time.time() - self._saved_at >= self._checkpoint_interval):
+            self.save_checkpoint()
+
+    def _parse_line(self, stream, data, current, resumed, seen):
+        # Returns the line, or None if it was already delivered
+        timestamp = None
+        if b' ' in data[:40]:
+            text, rest = data.split(b' ', 1)
+            text = text.decode('ascii', 'replace')
+            try:
+                timestamp = parse_timestamp(text)
+            except ValueError:
+                pass
+            else:
+                data = rest
+                current[stream] = (timestamp, text)
+        if timestamp is None:
+            # A line of a message logged with several lines, which only
+            # the first one is prefixed with the timestamp of
+            timestamp, text = current.get(stream, (None, None))
+            if timestamp is None:
+                return LogLine(stream, None, data)
+        if self._is_delivered(stream, timestamp, resumed, seen):
+            return None
+        return LogLine(stream, text, data)
+
+    def _follow(self):
+        failures = 0
+        final = False
+        try:
+            while not self._closed:
+                since, tail = self._resume_point()
+                splitter = LineSplitter(self._max_line_length)
+                # Per stream, the position the lines are requested again
+                # from, the number of lines received again at it, and the
+                # timestamp of the message being read
+                resumed = dict(
+                    (stream, (p[0], p[2]))
+                    for stream, p in self._positions.items()
+                )
+                seen = {}
+                current = {}
+                delivered = False
+                error = None
+                try:
+                    self._stream = self._open_stream(
+                        since=since, tail=tail, follow=not final
+                    )
+                    for stream, data in self._stream:
+                        for line in splitter.feed(stream, data):
+                            line = self._parse_line(
+                                stream, line, current, resumed, seen
+                            )
+                            if line is None:
+                                continue
+                            yield line
+                            self._deliver(stream, current.get(stream))
+                            delivered = True
+                            if self._closed:
+                                return
+                except Exception as e:
+                    if not _is_retryable(e):
+                        raise
+                    error = e
+                finally:
+                    # Also when the caller stops iterating, so that the
+                    # connection is released
+                    stream, self._stream = self._stream, None
+                    if stream is not None:
+                        stream.close()
+
+                if self._closed:
+                    return
+                if final:
+                    # Unterminated lines are only complete once the
+                    # container stopped
+                    for stream, line in splitter.flush():
+                        line = self._parse_line(
+                            stream, line, current, resumed, seen
+                        )
+                        if line is not None:
+                            yield line
+                            self._deliver(stream, current.get(stream))
+                    return
+
+                if error is None:
+                    try:
+                        if not self._is_running():
+                            # Fetch what was logged since the disconnection,
+                            # if any, without following
+                            final = True
+                            continue
+                    except Exception as e:
+                        if not _is_retryable(e):
+                            raise
+                        error = e
+
+                failures = 0 if delivered else failures + 1
+                if error is not None and self._max_retries is not None \
+                        and failures > self._max_retries:
+                    raise error
+                if failures:
+                    time.sleep(min(
+                        self._backoff_factor * 2 ** (failures - 1),
+                        self._max_backoff
+                    ))
+                self.reconnects += 1
+        finally:
+            if self._positions:
+                self.save_checkpoint()
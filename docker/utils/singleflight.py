@@ -0,0 +1,83 @@
+import copy
+import threading
+
+from . import fork
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _copy_error(error):
+    try:
+        return copy.copy(error)
+    except Exception:
+        # Exceptions whose arguments don't match their constructor
+        return error
+
+
+class SingleFlight(object):
+    """
+    Merges concurrent calls with the same key: while a call is in progress,
+    the calls made with its key by other threads wait for it and get the
+    same result instead of running themselves. If it raises, each of them
+    raises its own copy of the exception. Calls made once it has returned
+    run again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'calls': 0, 'coalesced': 0}
+        fork.register(self)
+
+    def _reset_after_fork(self):
+        # The calls in progress in the parent never return in the child
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """
+        Return ``func()``, or the result of the call in progress for
+        ``key``, which must be hashable.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['calls'] += 1
+            else:
+                self._stats['coalesced'] += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise _copy_error(call.error)
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def stats(self):
+        """
+        Return statistics about the calls.
+
+        Returns:
+            (dict): ``calls``, the number of calls that ran, and
+            ``coalesced``, the number of calls that got the result of
+            another one instead.
+        """
+        with self._lock:
+            return dict(self._stats)
@@ -2,42 +2,104 @@ import errno
 import os
 import select
 import socket as pysocket
+import ssl
 import struct
 
 import six
 
+from ..constants import (
+    DEFAULT_FRAME_BUFFER_SIZE, DEFAULT_SINK_BUFFER_SIZE,
+    STREAM_HEADER_SIZE_BYTES
+)
+
 try:
     from ..transport import NpipeSocket
 except ImportError:
     NpipeSocket = type(None)
 
+try:
+    import requests.packages.urllib3 as urllib3
+except ImportError:
+    import urllib3
+
 
 STDOUT = 1
 STDERR = 2
 
+_RECOVERABLE_ERRORS = (errno.EINTR, errno.EDEADLK)
+_WOULD_BLOCK_ERRORS = (errno.EAGAIN, errno.EWOULDBLOCK)
+
 
 class SocketError(Exception):
     pass
 
 
-def read(socket, n=4096):
+def _would_block(e):
+    if isinstance(e, (pysocket.timeout, getattr(ssl, 'SSLWantReadError', ()))):
+        return True
+    return getattr(e, 'errno', None) in _WOULD_BLOCK_ERRORS
+
+
+def _recv(socket, recv, *args):
     """
-    Reads at most n bytes from socket
+    Call the socket's ``recv`` method, only waiting in ``select`` if the
+    socket would block (non-blocking socket, or a socket with a timeout).
     """
+    while True:
+        try:
+            return recv(*args)
+        except EnvironmentError as e:
+            if isinstance(socket, NpipeSocket) or not _would_block(e):
+                raise
+        select.select([socket], [], [])
 
-    recoverable_errors = (errno.EINTR, errno.EDEADLK, errno.EWOULDBLOCK)
 
+def _unwrap(socket):
+    # SocketIO objects wrap a real socket, which we can read from directly
+    if six.PY3 and isinstance(socket, pysocket.SocketIO):
+        return getattr(socket, '_sock', socket)
+    return socket
+
+
+def _wait_readable(socket):
     if six.PY3 and not isinstance(socket, NpipeSocket):
         select.select([socket], [], [])
 
+
+def read(socket, n=4096):
+    """
+    Reads at most n bytes from socket
+    """
+    socket = _unwrap(socket)
     try:
         if hasattr(socket, 'recv'):
-            return socket.recv(n)
+            return _recv(socket, socket.recv, n)
+        _wait_readable(socket)
         if six.PY3 and isinstance(socket, getattr(pysocket, 'SocketIO')):
             return socket.read(n)
         return os.read(socket.fileno(), n)
     except EnvironmentError as e:
-        if e.errno not in recoverable_errors:
+        if e.errno not in _RECOVERABLE_ERRORS:
+            raise
+
+
+def read_into(socket, buf):
+    """
+    Reads at most len(buf) bytes from socket into the writable buffer buf.
+    Returns the number of bytes read, or None if the read should be retried.
+    """
+    socket = _unwrap(socket)
+    if not hasattr(socket, 'recv_into'):
+        data = read(socket, len(buf))
+        if data is None:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    try:
+        return _recv(socket, socket.recv_into, buf)
+    except EnvironmentError as e:
+        if e.errno not in _RECOVERABLE_ERRORS:
             raise
 
 
@@ -46,13 +108,17 @@ def read_exactly(socket, n):
     Reads exactly n bytes from socket
     Raises SocketError if there isn't enough data
     """
-    data = six.binary_type()
-    while len(data) < n:
-        next_data = read(socket, n - len(data))
-        if not next_data:
+    data = bytearray(n)
+    view = memoryview(data)
+    pos = 0
+    while pos < n:
+        count = read_into(socket, view[pos:])
+        if count is None:
+            continue
+        if not count:
             raise SocketError("Unexpected EOF")
-        data += next_data
-    return data
+        pos += count
+    return bytes(data)
 
 
 def next_frame_header(socket):
@@ -85,25 +151,234 @@ def frames_iter(socket, tty):
         return frames_iter_no_tty(socket)
 
 
-def frames_iter_no_tty(socket):
+def frames_iter_no_tty(socket, buffer_size=DEFAULT_FRAME_BUFFER_SIZE,
+                       copy=True):
     """
     Returns a generator of data read from the socket when the tty setting is
     not enabled.
     """
+    def readinto(buf):
+        return read_into(socket, buf)
+
+    return read_frames(readinto, buffer_size=buffer_size, copy=copy)
+
+
+def read_frames(readinto, buffer_size=DEFAULT_FRAME_BUFFER_SIZE, copy=True):
+    """
+    Returns a generator of ``(stream, data)`` frames parsed from the
+    multiplexed stream protocol.
+
+    Data is read with ``readinto`` into a single preallocated buffer, and
+    every frame that is already in the buffer is parsed before reading
+    again. Frames larger than the buffer are yielded in several pieces.
+
+    Args:
+        readinto (callable): Fills the writable buffer it is given and
+            returns the number of bytes read, ``0`` on EOF or ``None`` if the
+            read should be retried.
+        buffer_size (int): Size of the read buffer, in bytes.
+        copy (bool): If ``False``, yield ``memoryview`` slices of the read
+            buffer instead of ``bytes``. A slice is only valid until the
+            generator is resumed.
+    """
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    start = end = 0
+    # Stream and number of bytes left of a frame that doesn't fit the buffer
+    stream, left = None, 0
+
     while True:
-        (stream, n) = next_frame_header(socket)
-        if n < 0:
-            break
-        while n > 0:
-            result = read(socket, n)
-            if result is None:
+        if left:
+            if end > start:
+                size = min(left, end - start)
+                data = view[start:start + size]
+                start += size
+                left -= size
+                yield (stream, bytes(data) if copy else data)
+                continue
+        else:
+            while end - start >= STREAM_HEADER_SIZE_BYTES:
+                stream, length = struct.unpack_from('>BxxxL', buf, start)
+                frame_end = start + STREAM_HEADER_SIZE_BYTES + length
+                if frame_end > end:
+                    if frame_end - start > buffer_size:
+                        start += STREAM_HEADER_SIZE_BYTES
+                        left = length
+                    break
+                data = view[start + STREAM_HEADER_SIZE_BYTES:frame_end]
+                start = frame_end
+                if length:
+                    yield (stream, bytes(data) if copy else data)
+            if left:
                 continue
-            data_length = len(result)
-            if data_length == 0:
-                # We have reached EOF
+
+        if start == end:
+            start = end = 0
+        elif start:
+            # Move the incomplete frame to the front of the buffer
+            end -= start
+            buf[:end] = buf[start:start + end]
+            start = 0
+
+        count = readinto(view[end:])
+        if count is None:
+            continue
+        if not count:
+            # We have reached EOF
+            return
+        end += count
+
+
+def readinto_from_chunks(chunks):
+    """
+    Returns a ``readinto`` callable, as expected by :py:func:`read_frames`,
+    that copies data from an iterable of bytes chunks.
+    """
+    chunks = iter(chunks)
+    # The part of the current chunk that hasn't been consumed yet
+    current = [memoryview(b'')]
+
+    def readinto(buf):
+        data = current[0]
+        if not len(data):
+            data = memoryview(next(chunks, b''))
+            if not len(data):
+                return 0
+        count = min(len(buf), len(data))
+        buf[:count] = data[:count]
+        current[0] = data[count:]
+        return count
+
+    return readinto
+
+
+def readinto_from_file(fp):
+    """
+    Returns a ``readinto`` callable, as expected by :py:func:`read_frames`,
+    that reads from a buffered file such as the one an HTTP response is
+    parsed from.
+
+    Data the file has already buffered is returned first, then every call
+    makes a single read on the underlying raw file. Unlike
+    ``fp.readinto1``, this never blocks while buffered data is available.
+    """
+    drained = [False]
+
+    def readinto(buf):
+        if drained[0]:
+            return fp.raw.readinto(buf)
+        buffered = len(fp.peek(1))
+        if buffered <= len(buf):
+            drained[0] = True
+        return fp.readinto1(memoryview(buf)[:buffered])
+
+    return readinto
+
+
+def read_chunked(readinto, buffer_size=DEFAULT_FRAME_BUFFER_SIZE,
+                 coalesce=False):
+    """
+    Returns a generator of the chunks of an HTTP body sent with chunked
+    transfer encoding.
+
+    Data is read with ``readinto`` into a single preallocated buffer, and
+    every chunk that is already in the buffer is parsed before reading
+    again, so a read costs one call to ``readinto`` however many chunks it
+    returns.
+
+    Args:
+        readinto (callable): Fills the writable buffer it is given and
+            returns the number of bytes read, ``0`` on EOF or ``None`` if the
+            read should be retried.
+        buffer_size (int): Size of the read buffer, in bytes.
+        coalesce (bool): If ``True``, the chunks returned by a single read
+            are joined and yielded together instead of one by one. This
+            never waits for more data than is already available.
+
+    Raises:
+        urllib3.exceptions.ProtocolError: If the body ends before its last
+            chunk, as urllib3 does.
+    """
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    start = end = 0
+    # Bytes left of a chunk that doesn't fit the buffer, including the CRLF
+    # that follows it, and the pieces of that chunk read so far
+    left, parts = 0, []
+    # Whether the last chunk was read and only trailer lines are left
+    trailer = False
+
+    while True:
+        ready = []
+        while True:
+            if left:
+                size = min(left, end - start)
+                if not size:
+                    break
+                parts.append(view[start:start + size].tobytes())
+                start += size
+                left -= size
+                if left:
+                    break
+                ready.append(b''.join(parts)[:-2])
+                parts = []
+                continue
+
+            eol = buf.find(b'\r\n', start, end)
+            if eol < 0:
+                if end - start == buffer_size:
+                    raise SocketError('Chunk size line is too long')
+                break
+            line = bytes(buf[start:eol])
+            start = eol + 2
+            if trailer:
+                if not line:
+                    # We have reached the end of the body
+                    for chunk in _coalesce(ready, coalesce):
+                        yield chunk
+                    return
+                continue
+            try:
+                size = int(line.split(b';', 1)[0], 16)
+            except ValueError:
+                raise SocketError('Invalid chunk size: {0!r}'.format(line))
+            if not size:
+                trailer = True
+            elif start + size + 2 <= end:
+                ready.append(view[start:start + size].tobytes())
+                start += size + 2
+            else:
+                left = size + 2
+
+        for chunk in _coalesce(ready, coalesce):
+            yield chunk
+
+        if start == end:
+            start = end = 0
+        elif start:
+            # Move the incomplete chunk to the front of the buffer
+            end -= start
+            buf[:end] = buf[start:start + end]
+            start = 0
+
+        count = readinto(view[end:])
+        if count is None:
+            continue
+        if not count:
+            if trailer:
+                # EOF instead of the empty line that ends the trailer
                 return
-            n -= data_length
-            yield (stream, result)
+            # The connection was closed before the last chunk
+            raise urllib3.exceptions.ProtocolError(
+                'Response ended prematurely'
+            )
+        end += count
+
+
+def _coalesce(chunks, coalesce):
+    if coalesce and len(chunks) > 1:
+        return [b''.join(chunks)]
+    return chunks
 
 
 def frames_iter_tty(socket):
@@ -143,17 +418,74 @@ def consume_socket_output(frames, demux=False):
         # It is guaranteed that for each frame, one and only one stream
         # is not None.
         assert frame != (None, None)
-        if frame[0] is not None:
-            if out[0] is None:
-                out[0] = frame[0]
-            else:
-                out[0] += frame[0]
-        else:
-            if out[1] is None:
-                out[1] = frame[1]
-            else:
-                out[1] += frame[1]
-    return tuple(out)
+        i = 0 if frame[0] is not None else 1
+        if out[i] is None:
+            out[i] = []
+        out[i].append(frame[i])
+    return tuple(
+        None if chunks is None else six.binary_type().join(chunks)
+        for chunks in out
+    )
+
+
+def write_frames(frames, stdout, stderr, buffer_size=DEFAULT_SINK_BUFFER_SIZE):
+    """
+    Write the data of frames read from the socket to the file of their
+    stream, and return the number of bytes written for each stream.
+
+    The data written to each file is gathered in a buffer of
+    ``buffer_size`` bytes, so that files get few large writes whatever the
+    size of the frames. When both streams are written to the same file,
+    they share its buffer, and the data is written in the order it was
+    received.
+
+    Args:
+        frames (iterable): ``(stream, data)`` tuples. As the data is copied
+            to the buffers, frames may be ``memoryview`` slices that are
+            only valid until the next frame, as yielded by
+            :py:func:`read_frames` with ``copy=False``.
+        stdout: A file object opened in binary mode for the data of stdout,
+            or ``None`` to discard it.
+        stderr: A file object opened in binary mode for the data of stderr,
+            or ``None`` to discard it. It may be the same as ``stdout``.
+        buffer_size (int): Size of the buffer of each file, in bytes.
+
+    Returns:
+        (tuple): The number of bytes of stdout and stderr.
+    """
+    buffers = {}
+    targets = {}
+    for stream, fp in ((STDOUT, stdout), (STDERR, stderr)):
+        if fp is not None:
+            buf = buffers.setdefault(id(fp), bytearray())
+            targets[stream] = (fp, buf)
+    written = {STDOUT: 0, STDERR: 0}
+
+    try:
+        for stream, data in frames:
+            target = targets.get(stream)
+            if target is None:
+                if stream not in written:
+                    raise ValueError(
+                        '{0} is not a valid stream'.format(stream)
+                    )
+                continue
+            fp, buf = target
+            written[stream] += len(data)
+            if len(buf) + len(data) > buffer_size:
+                if buf:
+                    fp.write(buf)
+                    del buf[:]
+                if len(data) >= buffer_size:
+                    fp.write(data)
+                    continue
+            buf += data
+    finally:
+        for fp, buf in targets.values():
+            if buf:
+                fp.write(buf)
+                del buf[:]
+    return written[STDOUT], written[STDERR]
 
 
 def demux_adaptor(stream_id, data):
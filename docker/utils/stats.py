@@ -0,0 +1,220 @@
+import collections
+
+from ..errors import DockerException
+from .logs import parse_timestamp
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+StatsSample = collections.namedtuple('StatsSample', [
+    'timestamp', 'cpu_percent', 'memory_usage', 'memory_limit',
+    'memory_percent', 'net_rx', 'net_tx', 'block_read', 'block_write', 'pids'
+])
+StatsSample.__doc__ = """
+The numbers of a sample of the statistics of a container.
+
+Attributes:
+    timestamp (float): When the sample was read, as a UNIX time.
+    cpu_percent (float): The CPU usage since the previous sample, as in
+        ``docker stats``: ``100.0`` per CPU in use.
+    memory_usage (int): The memory used, in bytes, without the inactive
+        page cache, as in ``docker stats``.
+    memory_limit (int): The memory limit, in bytes.
+    memory_percent (float): The memory used, as a percentage of the limit.
+    net_rx (int): The bytes received on all the networks since the previous
+        sample.
+    net_tx (int): The bytes sent on all the networks since the previous
+        sample.
+    block_read (int): The bytes read from block devices since the previous
+        sample.
+    block_write (int): The bytes written to block devices since the
+        previous sample.
+    pids (int): The number of processes.
+
+The I/O counters are ``0`` for the first sample.
+"""
+
+
+def _cpu_percent(cpu, precpu):
+    usage = cpu.get('cpu_usage') or {}
+    previous_system = precpu.get('system_cpu_usage')
+    if not previous_system:
+        return 0.0
+    cpu_delta = usage.get('total_usage', 0) - \
+        (precpu.get('cpu_usage') or {}).get('total_usage', 0)
+    system_delta = cpu.get('system_cpu_usage', 0) - previous_system
+    if cpu_delta <= 0 or system_delta <= 0:
+        return 0.0
+    cpus = cpu.get('online_cpus') or len(usage.get('percpu_usage') or ()) or 1
+    return cpu_delta * 100.0 * cpus / system_delta
+
+
+def _io_totals(sample):
+    rx = tx = read = write = 0
+    for network in (sample.get('networks') or {}).values():
+        rx += network.get('rx_bytes', 0)
+        tx += network.get('tx_bytes', 0)
+    blkio = sample.get('blkio_stats') or {}
+    for entry in blkio.get('io_service_bytes_recursive') or ():
+        op = entry.get('op', '').lower()
+        if op == 'read':
+            read += entry.get('value', 0)
+        elif op == 'write':
+            write += entry.get('value', 0)
+    return rx, tx, read, write
+
+
+class StatsDecoder(object):
+    """
+    Turns the samples of the statistics of a container, as returned by
+    :py:meth:`~docker.api.container.ContainerApiMixin.stats` with
+    ``decode=True``, into :py:class:`StatsSample` records.
+
+    The I/O counters of the Engine are totals. The decoder keeps the totals
+    of the previous sample to compute the I/O of each sample, so a decoder
+    must only be given the samples of one container, in order.
+    """
+    def __init__(self):
+        self._totals = None
+
+    def decode(self, sample):
+        """
+        Return the :py:class:`StatsSample` of a sample.
+        """
+        read = sample.get('read')
+        if read:
+            seconds, nanoseconds = parse_timestamp(read)
+            timestamp = seconds + nanoseconds / 1e9
+        else:
+            timestamp = 0.0
+
+        memory = sample.get('memory_stats') or {}
+        usage = memory.get('usage', 0)
+        # Like docker stats, leave out the page cache that can be reclaimed,
+        # reported differently by cgroups v1 and v2
+        details = memory.get('stats') or {}
+        inactive = details.get(
+            'total_inactive_file', details.get('inactive_file', 0)
+        )
+        if inactive < usage:
+            usage -= inactive
+        limit = memory.get('limit', 0)
+
+        totals = _io_totals(sample)
+        previous = self._totals or totals
+        self._totals = totals
+        # A counter that went back was reset, when the container restarted
+        deltas = [
+            total - before if total >= before else total
+            for total, before in zip(totals, previous)
+        ]
+
+        return StatsSample(
+            timestamp,
+            _cpu_percent(
+                sample.get('cpu_stats') or {},
+                sample.get('precpu_stats') or {}
+            ),
+            usage, limit, usage * 100.0 / limit if limit else 0.0,
+            deltas[0], deltas[1], deltas[2], deltas[3],
+            (sample.get('pids_stats') or {}).get('current', 0)
+        )
+
+
+def iter_stats(samples):
+    """
+    Returns a generator of the :py:class:`StatsSample` of ``samples``, the
+    decoded samples of the statistics of a container.
+    """
+    decoder = StatsDecoder()
+    for sample in samples:
+        yield decoder.decode(sample)
+
+
+def _ring_indices(count, size):
+    # The rows of a ring buffer of ``size`` rows, after ``count`` appends,
+    # from the oldest to the newest
+    if count <= size:
+        return list(range(count))
+    start = count % size
+    return list(range(start, size)) + list(range(start))
+
+
+class StatsWindow(object):
+    """
+    A ring buffer of the last ``size`` samples of the statistics of a
+    container, stored in a preallocated NumPy array, to compute aggregates
+    over a sliding window. Requires the ``numpy`` package.
+
+    Example:
+
+        >>> window = StatsWindow(60)
+        >>> for sample in container.stats(compact=True):
+        ...     window.append(sample)
+        ...     print(window.mean().cpu_percent, window.sum().net_rx)
+    """
+    def __init__(self, size):
+        if numpy is None:
+            raise DockerException(
+                'Install the numpy package to use StatsWindow'
+            )
+        self.size = size
+        self._data = numpy.zeros((size, len(StatsSample._fields)))
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+    def append(self, sample):
+        """
+        Add a :py:class:`StatsSample`, replacing the oldest one if the
+        window is full.
+        """
+        self._data[self._count % self.size] = sample
+        self._count += 1
+
+    def array(self):
+        """
+        Return a copy of the samples of the window, from the oldest to the
+        newest, as a NumPy array with a row per sample and a column per
+        field of :py:class:`StatsSample`.
+        """
+        # Indexing with a list of rows copies them
+        return self._data[_ring_indices(self._count, self.size)]
+
+    def _aggregate(self, func):
+        if not self._count:
+            return None
+        return StatsSample(*func(self._data[:len(self)], axis=0).tolist())
+
+    def mean(self):
+        """
+        Return the mean of each field over the window, as a
+        :py:class:`StatsSample`, or ``None`` if the window is empty.
+        """
+        return self._aggregate(numpy.mean)
+
+    def min(self):
+        """
+        Return the minimum of each field over the window, as a
+        :py:class:`StatsSample`, or ``None`` if the window is empty.
+        """
+        return self._aggregate(numpy.min)
+
+    def max(self):
+        """
+        Return the maximum of each field over the window, as a
+        :py:class:`StatsSample`, or ``None`` if the window is empty.
+        """
+        return self._aggregate(numpy.max)
+
+    def sum(self):
+        """
+        Return the sum of each field over the window, as a
+        :py:class:`StatsSample`, or ``None`` if the window is empty. The
+        sums of the I/O fields are the I/O over the window.
+        """
+        return self._aggregate(numpy.sum)
@@ -5,7 +5,6 @@ import os.path
 import shlex
 import string
 from datetime import datetime
-from distutils.version import StrictVersion
 
 import six
 
@@ -56,8 +55,8 @@ def compare_version(v1, v2):
     >>> compare_version(v2, v2)
     0
     """
-    s1 = StrictVersion(v1)
-    s2 = StrictVersion(v2)
+    s1 = _version_tuple(v1)
+    s2 = _version_tuple(v2)
     if s1 == s2:
         return 0
     elif s1 > s2:
@@ -66,6 +65,14 @@ def compare_version(v1, v2):
         return 1
 
 
+def _version_tuple(version):
+    # Numeric components, without trailing zeros: 1.9 is the same as 1.9.0
+    parts = [int(part) for part in version.split('.')]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
 def version_lt(v1, v2):
     return compare_version(v1, v2) > 0
 
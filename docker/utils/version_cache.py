@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import six
+
+from ..constants import DEFAULT_API_VERSION_CACHE_TTL, IS_WINDOWS_PLATFORM
+from . import fork
+from .config import config_path_from_environment, home_dir
+
+API_VERSION_CACHE_FILENAME = 'api-versions.json'
+
+log = logging.getLogger(__name__)
+
+# API versions negotiated by the clients of this process, by endpoint
+_versions = {}
+_lock = threading.Lock()
+
+
+@fork.after_in_child
+def _reset_lock():
+    global _lock
+    _lock = threading.Lock()
+
+
+def default_cache_path():
+    """
+    Path of the file where negotiated API versions are persisted: next to
+    the Docker config file.
+    """
+    config_path = config_path_from_environment()
+    if config_path:
+        config_dir = os.path.dirname(config_path)
+    else:
+        config_dir = os.path.join(home_dir(), '.docker')
+    return os.path.join(config_dir, API_VERSION_CACHE_FILENAME)
+
+
+def get_api_version(endpoint, path=None):
+    """
+    Return the API version previously negotiated with the daemon at
+    ``endpoint`` (a URL as returned by ``parse_host``), or ``None``.
+
+    Versions negotiated in this process are looked up first, then those
+    persisted in the file at ``path``, if given. Entries expire after their
+    time to live, or when the daemon is found to have restarted since.
+    """
+    daemon = _daemon_identity(endpoint)
+    with _lock:
+        entry = _versions.get(endpoint)
+    if not _is_valid(entry, daemon) and path is not None:
+        entry = _load(path).get(endpoint)
+        if _is_valid(entry, daemon):
+            with _lock:
+                _versions[endpoint] = entry
+    if _is_valid(entry, daemon):
+        return entry['version']
+    return None
+
+
+def set_api_version(endpoint, version, path=None,
+                    ttl=DEFAULT_API_VERSION_CACHE_TTL):
+    """
+    Remember that ``version`` was negotiated with the daemon at
+    ``endpoint``, for ``ttl`` seconds, and persist it in the file at
+    ``path`` if given.
+    """
+    entry = {
+        'version': version,
+        'expires': time.time() + ttl,
+        'daemon': _daemon_identity(endpoint),
+    }
+    with _lock:
+        _versions[endpoint] = entry
+    if path is None:
+        return
+
+    entries = dict(
+        (k, v) for k, v in six.iteritems(_load(path))
+        if isinstance(v, dict) and _is_valid(v, v.get('daemon'))
+    )
+    entries[endpoint] = entry
+    try:
+        _save(path, entries)
+    except (IOError, OSError) as e:
+        log.debug('Unable to save API versions to {0}: {1}'.format(path, e))
+
+
+def clear_api_versions():
+    """
+    Forget the API versions negotiated in this process.
+    """
+    with _lock:
+        _versions.clear()
+
+
+def _daemon_identity(endpoint):
+    # A restarted daemon creates a new socket: the entries of a unix socket
+    # only stay valid as long as the socket file is the same. Other
+    # endpoints only rely on the time to live.
+    if not endpoint.startswith('http+unix://'):
+        return None
+    socket_path = endpoint.replace('http+unix://', '')
+    if not socket_path.startswith('/'):
+        socket_path = '/' + socket_path
+    try:
+        st = os.stat(socket_path)
+    except OSError:
+        return None
+    return [st.st_ino, getattr(st, 'st_mtime_ns', st.st_mtime)]
+
+
+def _is_valid(entry, daemon):
+    return (
+        isinstance(entry, dict) and
+        isinstance(entry.get('version'), six.string_types) and
+        entry.get('expires', 0) > time.time() and
+        entry.get('daemon') == daemon
+    )
+
+
+def _load(path):
+    try:
+        with open(path, 'r') as f:
+            entries = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    if not isinstance(entries, dict):
+        return {}
+    return entries
+
+
+def _save(path, entries):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix='api-versions-', dir=directory
+    )
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        if six.PY2 and IS_WINDOWS_PLATFORM and os.path.exists(path):
+            os.remove(path)
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,126 @@
+"""
+Measure how many small API calls per second the client makes, with and
+without ``fast_requests``.
+
+    python scripts/bench_requests.py [--calls N] [--runs N]
+        [--base-url URL --container ID]
+
+By default, the calls are made to a fake daemon, served by a separate
+process on a temporary unix socket, that answers ``inspect_container`` with
+a small JSON document. This measures the overhead of the client itself.
+With ``--base-url`` and ``--container``, a real container of a real daemon
+is inspected instead.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import docker
+from six.moves import BaseHTTPServer, socketserver
+
+CONTAINER = {
+    'Id': 'a' * 64, 'Name': '/bench', 'State': {'Running': True},
+    'Config': {'Image': 'busybox', 'Cmd': ['sleep', '3600']},
+}
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler, object):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        data = json.dumps(CONTAINER).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(socket_path):
+    Server(socket_path, Handler).serve_forever()
+
+
+def start_server(socket_path):
+    proc = subprocess.Popen([sys.executable, __file__, '--serve', socket_path])
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            sock = socket.socket(socket.AF_UNIX)
+            sock.connect(socket_path)
+            sock.close()
+            return proc
+        except socket.error:
+            time.sleep(0.05)
+    proc.kill()
+    sys.exit('The fake daemon did not start')
+
+
+def calls_per_second(client, container, calls):
+    client.inspect_container(container)  # Open the connection
+    start = time.time()
+    for _ in range(calls):
+        client.inspect_container(container)
+    return calls / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--base-url')
+    parser.add_argument('--container', default='bench')
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+
+    proc = tmpdir = None
+    base_url = args.base_url
+    if base_url is None:
+        tmpdir = tempfile.mkdtemp()
+        socket_path = os.path.join(tmpdir, 'docker.sock')
+        proc = start_server(socket_path)
+        base_url = 'unix://' + socket_path
+    try:
+        results = {}
+        for fast_requests in (False, True):
+            client = docker.APIClient(
+                base_url=base_url, version='1.35',
+                fast_requests=fast_requests
+            )
+            with client:
+                results[fast_requests] = max(
+                    calls_per_second(client, args.container, args.calls)
+                    for _ in range(args.runs)
+                )
+    finally:
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+            shutil.rmtree(tmpdir)
+
+    print('inspect_container, best of {0} x {1} calls:'.format(
+        args.runs, args.calls
+    ))
+    print('  requests:      {0:8.0f} calls/s'.format(results[False]))
+    print('  fast_requests: {0:8.0f} calls/s ({1:.1f}x)'.format(
+        results[True], results[True] / results[False]
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure the time taken by ``import docker``, using ``python -X importtime``
+(Python 3.7 and above).
+
+    python scripts/importtime.py [--runs N] [--top N] [--max-ms MS] [module]
+
+Each run imports the module in a fresh interpreter. The best run is kept,
+and the modules that took the longest to import in it are listed. With
+``--max-ms``, exits with an error if the import took longer than that.
+"""
+import argparse
+import subprocess
+import sys
+
+HEAVY_MODULES = ('paramiko', 'websocket', 'docker.models')
+
+
+def importtime(module):
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.STDOUT, universal_newlines=True
+    )
+    times = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():  # Header
+            continue
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('module', nargs='?', default='docker')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-ms', type=float)
+    args = parser.parse_args()
+
+    runs = [importtime(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[-1][2])
+    total_ms = best[-1][2] / 1000.0
+
+    print('{0}: {1:.1f} ms (best of {2})'.format(
+        args.module, total_ms, args.runs
+    ))
+    print('{0:>10} {1:>10}  module'.format('self ms', 'total ms'))
+    for name, self_us, cumulative_us in sorted(
+            best, key=lambda t: t[2], reverse=True)[:args.top]:
+        print('{0:10.1f} {1:10.1f}  {2}'.format(
+            self_us / 1000.0, cumulative_us / 1000.0, name
+        ))
+
+    imported = set(name for name, _, _ in best)
+    heavy = [
+        prefix for prefix in HEAVY_MODULES
+        if any(name == prefix or name.startswith(prefix + '.')
+               for name in imported)
+    ]
+    if heavy:
+        print('Heavy modules imported: {0}'.format(', '.join(heavy)))
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        sys.exit('{0} took {1:.1f} ms to import, more than {2} ms'.format(
+            args.module, total_ms, args.max_ms
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -39,6 +39,9 @@ extras_require = {
     # Only required when connecting using the ssh:// protocol
     'ssh': ['paramiko>=2.4.2'],
 
+    # Only required for docker.utils.stats.StatsWindow
+    'stats': ['numpy'],
+
 }
 
 version = None
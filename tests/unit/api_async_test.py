@@ -0,0 +1,265 @@
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import unittest
+
+import docker
+import pytest
+import six
+from docker import auth
+from docker.constants import DEFAULT_DOCKER_API_VERSION
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from docker.api.async_client import AsyncAPIClient
+
+
+def frame(stream, data):
+    return struct.pack('>BxxxL', stream, len(data)) + data
+
+
+def chunked(*chunks):
+    return b''.join(
+        b'%x\r\n' % len(c) + c + b'\r\n' for c in chunks
+    ) + b'0\r\n\r\n'
+
+
+class Server(six.moves.socketserver.ThreadingUnixStreamServer):
+    request_queue_size = 128
+
+
+class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler, object):
+    protocol_version = 'HTTP/1.1'
+    prefix = '/v{0}'.format(DEFAULT_DOCKER_API_VERSION)
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return 'unix'
+
+    def send_json(self, status, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunked(self, *chunks):
+        self.send_response(200)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self.wfile.write(chunked(*chunks))
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path))
+        path = self.path.split('?')[0]
+        if path == '/version':
+            self.send_json(200, {'ApiVersion': DEFAULT_DOCKER_API_VERSION})
+        elif path == self.prefix + '/containers/abc/json':
+            self.send_json(200, {'Id': 'abc', 'Config': {'Tty': False}})
+        elif path == self.prefix + '/containers/json':
+            self.send_json(200, [{'Id': 'abcdefabcdefabcdef'}])
+        elif path == self.prefix + '/containers/missing/json':
+            self.send_json(404, {'message': 'No such container: missing'})
+        elif path == self.prefix + '/containers/abc/logs':
+            self.send_chunked(
+                frame(1, b'line 1\n') + frame(2, b'oops\n'),
+                frame(1, b'line 2\n')
+            )
+        elif path == self.prefix + '/containers/abc/stats':
+            self.send_chunked(
+                b'{"read": 1}\n', b'{"read": 2}\n{"read": 3}\n'
+            )
+        else:
+            self.send_json(404, {'message': 'unknown path'})
+
+    def read_body(self):
+        if 'chunked' in self.headers.get('Transfer-Encoding', ''):
+            body = b''
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                body += self.rfile.read(size + 2)[:size]
+                if not size:
+                    return body
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        self.server.requests.append(('POST', self.path))
+        self.server.bodies.append(self.read_body())
+        path = self.path.split('?')[0]
+        if path == self.prefix + '/build':
+            self.send_chunked(b'{"stream": "Successfully built"}\r\n')
+        elif path == self.prefix + '/containers/slow/wait':
+            self.server.release.wait(10)
+            self.send_json(200, {'StatusCode': 0})
+        elif path == self.prefix + '/containers/abc/start':
+            self.send_response(204)
+            self.end_headers()
+        elif path == self.prefix + '/images/create':
+            self.send_chunked(
+                b'{"status": "Pulling"}\r\n{"status": "Downloading"}',
+                b'\r\n{"status": "Done"}\r\n'
+            )
+        else:
+            self.send_json(404, {'message': 'unknown path'})
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 6), reason='Requires Python 3.6 or above'
+)
+@pytest.mark.skipif(
+    docker.constants.IS_WINDOWS_PLATFORM, reason='Unix only'
+)
+class AsyncAPIClientTest(unittest.TestCase):
+    def setUp(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_file = os.path.join(socket_dir, 'docker.sock')
+        self.server = Server(socket_file, Handler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.bodies = []
+        self.server.release = threading.Event()
+        thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={'poll_interval': 0.01}
+        )
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.client = AsyncAPIClient(
+            base_url='unix://' + socket_file,
+            version=DEFAULT_DOCKER_API_VERSION
+        )
+        self.addCleanup(self.client.close)
+
+    def run_coro(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def collect(self, agen):
+        items = []
+        while True:
+            try:
+                items.append(self.run_coro(agen.__anext__()))
+            except StopAsyncIteration:
+                return items
+
+    def test_inspect_container(self):
+        result = self.run_coro(self.client.inspect_container('abc'))
+        assert result == {'Id': 'abc', 'Config': {'Tty': False}}
+
+    def test_method_with_post_processing(self):
+        result = self.run_coro(self.client.containers(quiet=True))
+        assert result == [{'Id': 'abcdefabcdefabcdef'}]
+
+    def test_request_without_result_is_sent(self):
+        assert self.run_coro(self.client.start('abc')) is None
+        assert self.server.requests == [
+            ('POST', Handler.prefix + '/containers/abc/start')
+        ]
+
+    def test_not_found(self):
+        with pytest.raises(docker.errors.NotFound) as excinfo:
+            self.run_coro(self.client.inspect_container('missing'))
+        assert excinfo.value.explanation == 'No such container: missing'
+
+    def test_connection_reuse(self):
+        for _ in range(3):
+            self.run_coro(self.client.inspect_container('abc'))
+        assert len(self.client._idle) == 1
+
+    def test_version_auto(self):
+        self.client._version = None
+        self.run_coro(self.client.inspect_container('abc'))
+        assert self.client.api_version == DEFAULT_DOCKER_API_VERSION
+        assert self.server.requests[0] == ('GET', '/version')
+
+    def test_logs(self):
+        assert self.run_coro(self.client.logs('abc')) == (
+            b'line 1\noops\nline 2\n'
+        )
+
+    def test_logs_stream(self):
+        stream = self.run_coro(self.client.logs('abc', stream=True))
+        assert self.collect(stream) == [b'line 1\n', b'oops\n', b'line 2\n']
+
+    def test_stats_decode(self):
+        stream = self.run_coro(self.client.stats('abc', decode=True))
+        assert self.collect(stream) == [
+            {'read': 1}, {'read': 2}, {'read': 3}
+        ]
+
+    def test_pull_stream_decode(self):
+        stream = self.run_coro(
+            self.client.pull('busybox', stream=True, decode=True)
+        )
+        assert self.collect(stream) == [
+            {'status': 'Pulling'}, {'status': 'Downloading'},
+            {'status': 'Done'}
+        ]
+
+    def test_mixin_code_runs_once(self):
+        with mock.patch.object(
+            auth, 'get_config_header', wraps=auth.get_config_header
+        ) as get_config_header:
+            stream = self.run_coro(self.client.pull('busybox', stream=True))
+            self.collect(stream)
+        assert get_config_header.call_count == 1
+
+    def test_many_pending_calls(self):
+        async def wait_all():
+            calls = [
+                asyncio.ensure_future(self.client.wait('slow'))
+                for _ in range(100)
+            ]
+            while len(self.server.requests) < len(calls):
+                await asyncio.sleep(0.01)
+            self.server.release.set()
+            return await asyncio.gather(*calls)
+
+        with mock.patch.object(
+            self.loop, 'run_in_executor', wraps=self.loop.run_in_executor
+        ) as run_in_executor:
+            results = self.run_coro(asyncio.wait_for(wait_all(), 10))
+        # The calls were all pending at once, without any thread
+        assert results == [{'StatusCode': 0}] * 100
+        assert not run_in_executor.called
+
+    def test_file_body_streamed(self):
+        fileobj = six.BytesIO(b'x' * 300000)
+        stream = self.run_coro(self.client.build(
+            fileobj=fileobj, custom_context=True
+        ))
+        self.collect(stream)
+        assert len(self.server.bodies[-1]) == 300000
+
+    def test_build_stream_context(self):
+        context = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, context)
+        with open(os.path.join(context, 'Dockerfile'), 'w') as f:
+            f.write('FROM busybox\n')
+        with open(os.path.join(context, 'data'), 'wb') as f:
+            f.write(b'x' * 300000)
+        for stream_context in (False, True):
+            stream = self.run_coro(self.client.build(
+                path=context, stream_context=stream_context
+            ))
+            self.collect(stream)
+        buffered, streamed = self.server.bodies
+        assert len(buffered) > 300000
+        assert len(streamed) == len(buffered)
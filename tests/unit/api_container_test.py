@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import datetime
+import gzip
+import io
 import json
 import signal
 
@@ -1476,6 +1478,20 @@ class ContainerTest(BaseAPIClientTest):
             stream=True
         )
 
+    def test_container_stats_compact(self):
+        sample = self.client.stats(
+            fake_api.FAKE_CONTAINER_ID, stream=False, compact=True
+        )
+
+        fake_request.assert_called_with(
+            'GET',
+            url_prefix + 'containers/3cc2351ab11b/stats',
+            params={'stream': False},
+            timeout=60
+        )
+        assert sample.memory_limit == 8039038976
+        assert sample.timestamp == pytest.approx(1423675246.667)
+
     def test_container_top(self):
         self.client.top(fake_api.FAKE_CONTAINER_ID)
 
@@ -1508,3 +1524,14 @@ class ContainerTest(BaseAPIClientTest):
             'Memory': 2 * 1024, 'CpuShares': 124, 'BlkioWeight': 345
         }
         assert args[1]['headers']['Content-Type'] == 'application/json'
+
+    def test_put_archive_gzip(self):
+        data = b'tar data' * 100000
+        assert self.client.put_archive(
+            fake_api.FAKE_CONTAINER_ID, '/tmp', data, gzip=True
+        )
+        args = fake_request.call_args
+        assert args[0][1] == url_prefix + 'containers/3cc2351ab11b/archive'
+        assert args[1]['params'] == {'path': '/tmp'}
+        with gzip.GzipFile(fileobj=io.BytesIO(args[1]['data'])) as f:
+            assert f.read() == data
@@ -6,6 +6,7 @@ import re
 import shutil
 import socket
 import struct
+import tarfile
 import tempfile
 import threading
 import time
@@ -17,6 +18,7 @@ import requests
 import six
 from docker.api import APIClient
 from docker.constants import DEFAULT_DOCKER_API_VERSION
+from docker.transport.backend import RequestsBackend
 from requests.packages import urllib3
 
 from . import fake_api
@@ -343,23 +345,26 @@ class DockerApiTest(BaseAPIClientTest):
 
         # mock a stream interface
         raw_resp = urllib3.HTTPResponse(body=body)
-        setattr(raw_resp._fp, 'chunked', True)
-        setattr(raw_resp._fp, 'chunk_left', len(body.getvalue()) - 1)
+        raw_resp.chunked = True
+        setattr(raw_resp._fp, 'fp', io.BufferedReader(io.BytesIO(
+            '{0:x}\r\n'.format(len(content_str)).encode('ascii') +
+            content_str + b'\r\n0\r\n\r\n'
+        )))
 
         # pass `decode=False` to the helper
-        raw_resp._fp.seek(0)
+        raw_resp._fp.fp.seek(0)
         resp = response(status_code=status_code, content=content, raw=raw_resp)
         result = next(self.client._stream_helper(resp))
         assert result == content_str
 
         # pass `decode=True` to the helper
-        raw_resp._fp.seek(0)
+        raw_resp._fp.fp.seek(0)
         resp = response(status_code=status_code, content=content, raw=raw_resp)
         result = next(self.client._stream_helper(resp, decode=True))
         assert result == content
 
         # non-chunked response, pass `decode=False` to the helper
-        setattr(raw_resp._fp, 'chunked', False)
+        raw_resp.chunked = False
         raw_resp._fp.seek(0)
         resp = response(status_code=status_code, content=content, raw=raw_resp)
         result = next(self.client._stream_helper(resp))
@@ -474,6 +479,62 @@ class UnixSocketStreamTest(unittest.TestCase):
                 str(i).encode() for i in range(50)
             ]
 
+    def chunked_request_handler(self, connection):
+        data = b''
+        headers = None
+        while not headers:
+            data += connection.recv(2048)
+            parts = data.split(b'\r\n\r\n', 1)
+            if len(parts) == 2:
+                headers, data = parts
+        self.request_headers = headers.decode()
+
+        body = b''
+        while True:
+            while b'\r\n' not in data:
+                data += connection.recv(2048)
+            size, data = data.split(b'\r\n', 1)
+            size = int(size, 16)
+            while len(data) < size + 2:
+                data += connection.recv(2048)
+            body += data[:size]
+            data = data[size + 2:]
+            if not size:
+                break
+        self.request_body = body
+        connection.sendall(self.response)
+
+    @pytest.mark.skipif(
+        docker.constants.IS_WINDOWS_PLATFORM, reason='Unix only'
+    )
+    def test_build_stream_context(self):
+        self.request_handler = self.chunked_request_handler
+        self.response = (
+            b'HTTP/1.1 200 OK\r\n'
+            b'Transfer-Encoding: chunked\r\n'
+            b'\r\n'
+            b'0\r\n\r\n'
+        )
+        with open(os.path.join(self.build_context, 'Dockerfile'), 'w') as f:
+            f.write('FROM busybox\n')
+        data = os.urandom(1024 * 1024)
+        with open(os.path.join(self.build_context, 'data'), 'wb') as f:
+            f.write(data)
+
+        with APIClient(
+                base_url="http+unix://" + self.socket_file,
+                version=DEFAULT_DOCKER_API_VERSION) as client:
+            stream = client.build(
+                path=self.build_context, gzip=True, stream_context=True
+            )
+            assert list(stream) == []
+
+        assert 'Transfer-Encoding: chunked' in self.request_headers
+        assert 'Content-Encoding: gzip' in self.request_headers
+        with tarfile.open(fileobj=io.BytesIO(self.request_body)) as tar:
+            assert sorted(tar.getnames()) == ['Dockerfile', 'data']
+            assert tar.extractfile('data').read() == data
+
 
 class TCPSocketStreamTest(unittest.TestCase):
     stdout_data = b'''
@@ -509,6 +570,23 @@ class TCPSocketStreamTest(unittest.TestCase):
         stderr_data = cls.stderr_data
 
         class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler, object):
+            def do_GET(self):
+                resp_data = self.get_resp_data()
+                self.protocol_version = 'HTTP/1.1'
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                # Split the frames across several HTTP chunks
+                for i in range(0, len(resp_data), 100):
+                    chunk = resp_data[i:i + 100]
+                    self.wfile.write(
+                        '{:x}\r\n'.format(len(chunk)).encode() +
+                        chunk + b'\r\n'
+                    )
+                self.wfile.write(b'0\r\n\r\n')
+                self.wfile.flush()
+
             def do_POST(self):
                 resp_data = self.get_resp_data()
                 self.send_response(101)
@@ -556,6 +634,25 @@ class TCPSocketStreamTest(unittest.TestCase):
             return client._read_from_socket(
                 resp, stream=stream, tty=tty, demux=demux)
 
+    def test_multiplexed_response_stream(self):
+        with APIClient(
+                base_url=self.address,
+                version=DEFAULT_DOCKER_API_VERSION
+                ) as client:
+            resp = client._get(client._url('/no-tty'), stream=True)
+            res = client._multiplexed_response_stream_helper(resp)
+            assert b''.join(res) == self.stdout_data + self.stderr_data
+
+    def test_stream_helper(self):
+        data = self.stdout_data + self.stderr_data
+        with APIClient(
+                base_url=self.address,
+                version=DEFAULT_DOCKER_API_VERSION
+                ) as client:
+            resp = client._get(client._url('/tty'), stream=True)
+            chunks = list(client._stream_helper(resp))
+        assert chunks == [data[i:i + 100] for i in range(0, len(data), 100)]
+
     def test_read_from_socket_tty(self):
         res = self.request(stream=True, tty=True, demux=False)
         assert next(res) == self.stdout_data + self.stderr_data
@@ -631,6 +728,468 @@ class UserAgentTest(unittest.TestCase):
         assert headers['User-Agent'] == 'foo/bar'
 
 
+@pytest.mark.skipif(
+    docker.constants.IS_WINDOWS_PLATFORM, reason='Unix only'
+)
+class FastRequestsTest(unittest.TestCase):
+    class Server(six.moves.socketserver.ThreadingMixIn,
+                 six.moves.socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler, object):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.server.requests.append((self.path, self.headers))
+            self.server.connections.add(self.connection)
+            if self.path.startswith('/v1.35/containers/missing/'):
+                status, body = 404, {'message': 'No such container: missing'}
+            else:
+                status, body = 200, {'Id': 'abc', 'Path': self.path}
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            self.close_connection = self.server.close_connections
+
+        def log_message(self, *args):
+            pass
+
+    def setUp(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_file = os.path.join(socket_dir, 'docker.sock')
+        self.server = self.Server(socket_file, self.Handler)
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.close_connections = False
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.client = APIClient(
+            base_url='unix://' + socket_file, version='1.35',
+            fast_requests=True
+        )
+        self.addCleanup(self.client.close)
+
+    def test_inspect_container(self):
+        with mock.patch.object(APIClient, 'send') as send:
+            for _ in range(3):
+                result = self.client.inspect_container('abc')
+                assert result == {
+                    'Id': 'abc', 'Path': '/v1.35/containers/abc/json'
+                }
+        assert not send.called
+        assert len(self.server.requests) == 3
+        assert len(self.server.connections) == 1
+
+        headers = self.server.requests[0][1]
+        assert headers['User-Agent'] == self.client.headers['User-Agent']
+        assert headers['Host'] == 'localhost'
+        assert 'Accept-Encoding' not in headers
+
+    def test_params_and_headers(self):
+        self.client._general_configs = {'HttpHeaders': {'X-Test': 'yes'}}
+        self.client.containers(all=True, filters={'status': 'running'})
+        path, headers = self.server.requests[0]
+        assert path.startswith('/v1.35/containers/json?')
+        assert 'all=1' in path
+        assert 'filters=%7B%22status%22%3A+%5B%22running%22%5D%7D' in path
+        assert headers['X-Test'] == 'yes'
+
+    def test_error(self):
+        with pytest.raises(docker.errors.NotFound) as excinfo:
+            self.client.inspect_container('missing')
+        assert excinfo.value.explanation == 'No such container: missing'
+        assert excinfo.value.response.url.endswith(
+            '/v1.35/containers/missing/json'
+        )
+
+    def test_connections_closed_by_server(self):
+        self.server.close_connections = True
+        for _ in range(3):
+            assert self.client.inspect_container('abc')['Id'] == 'abc'
+        assert len(self.server.connections) == 3
+
+    def test_connection_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.remove(self.server.server_address)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            self.client.inspect_container('abc')
+
+    def test_streams_use_requests(self):
+        with mock.patch.object(
+                docker.transport.lighthttp, 'send_request') as send_request:
+            self.client._get(self.client._url('/info'), stream=False)
+            self.client._get(self.client._url('/info'), timeout=(5, 5))
+        assert not send_request.called
+        assert len(self.server.requests) == 2
+
+    def test_tcp_uses_requests(self):
+        client = APIClient(
+            base_url='tcp://127.0.0.1:2375',
+            version=DEFAULT_DOCKER_API_VERSION, fast_requests=True
+        )
+        with mock.patch.object(
+                docker.transport.lighthttp, 'send_request') as send_request:
+            with mock.patch.object(APIClient, 'send', return_value=fake_resp(
+                    'GET', '{0}/version'.format(fake_api.prefix))) as send:
+                client.version()
+        assert not send_request.called
+        assert send.call_count == 1
+
+
+class TransportBackendTest(unittest.TestCase):
+    class Backend(RequestsBackend):
+        def __init__(self):
+            self.calls = []
+
+        def send(self, client, method, url, **kwargs):
+            self.calls.append((method, url, kwargs))
+            return fake_request(method, url, **kwargs)
+
+        def get_socket(self, client, response):
+            return self.socket
+
+        def close(self, client):
+            self.calls.append(('close', client))
+
+    def setUp(self):
+        self.backend = self.Backend()
+        self.client = APIClient(
+            version=DEFAULT_DOCKER_API_VERSION, backend=self.backend
+        )
+
+    def test_send(self):
+        self.client.inspect_container(fake_api.FAKE_CONTAINER_ID)
+        self.client.start(fake_api.FAKE_CONTAINER_ID)
+        assert [(method, url) for method, url, _ in self.backend.calls] == [
+            ('GET', url_prefix + 'containers/{0}/json'.format(
+                fake_api.FAKE_CONTAINER_ID
+            )),
+            ('POST', url_prefix + 'containers/{0}/start'.format(
+                fake_api.FAKE_CONTAINER_ID
+            )),
+        ]
+        assert self.backend.calls[0][2]['timeout'] == DEFAULT_TIMEOUT_SECONDS
+
+    def test_get_socket(self):
+        self.backend.socket = mock.Mock()
+        res = response(status_code=200)
+        assert self.client._get_raw_response_socket(res) is \
+            self.backend.socket
+
+    def test_close(self):
+        self.client.close()
+        assert self.backend.calls == [('close', self.client)]
+
+    def test_iter_chunks_without_buffered_file(self):
+        raw = mock.Mock(spec=['stream'])
+        raw.stream.return_value = iter([b'ab', b'c'])
+        res = response(status_code=200, raw=raw)
+        chunks = RequestsBackend().iter_chunks(self.client, res)
+        assert list(chunks) == [b'ab', b'c']
+        raw.stream.assert_called_once_with(None, decode_content=False)
+
+    def test_iter_chunks_unknown_urllib3_version(self):
+        raw = mock.Mock(spec=['stream', '_fp', '_original_response'])
+        raw._fp.fp = io.BufferedReader(io.BytesIO(b'3\r\nabc\r\n0\r\n\r\n'))
+        raw.stream.return_value = iter([b'abc'])
+        res = response(status_code=200, raw=raw)
+        with mock.patch(
+                'docker.transport.backend._URLLIB3_INTERNALS', False):
+            chunks = list(RequestsBackend().iter_chunks(self.client, res))
+        assert chunks == [b'abc']
+        raw.stream.assert_called_once_with(None, decode_content=False)
+        assert raw._fp.fp.tell() == 0
+
+    def test_get_socket_of_connection(self):
+        raw = mock.Mock(spec=['connection'])
+        res = response(status_code=200, raw=raw)
+        assert RequestsBackend().get_socket(self.client, res) is \
+            raw.connection.sock
+
+
+class CoalesceRequestsTest(unittest.TestCase):
+    class Backend(RequestsBackend):
+        def __init__(self):
+            self.calls = []
+            self.started = threading.Event()
+            self.release = threading.Event()
+
+        def send(self, client, method, url, **kwargs):
+            self.calls.append((method, url, kwargs))
+            self.started.set()
+            self.release.wait(5)
+            if url.endswith('/containers/missing/json'):
+                return response(
+                    status_code=404,
+                    content={'message': 'No such container: missing'}
+                )
+            return fake_request(method, url, **kwargs)
+
+    def setUp(self):
+        self.backend = self.Backend()
+        self.client = APIClient(
+            version=DEFAULT_DOCKER_API_VERSION, backend=self.backend,
+            coalesce_requests=True
+        )
+
+    def run_concurrently(self, func, n):
+        results = [None] * n
+
+        def run(i):
+            try:
+                results[i] = func()
+            except Exception as e:
+                results[i] = e
+
+        threads = [
+            threading.Thread(target=run, args=(i,)) for i in range(n)
+        ]
+        threads[0].start()
+        assert self.backend.started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.time() + 5
+        while self.client.coalescing_stats()['coalesced'] < n - 1:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        self.backend.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_requests_merged(self):
+        results = self.run_concurrently(
+            lambda: self.client.inspect_container(fake_api.FAKE_CONTAINER_ID),
+            3
+        )
+        assert len(self.backend.calls) == 1
+        assert results[0] == results[1] == results[2]
+        # Each caller gets its own decoded result
+        assert results[0] is not results[1]
+        assert self.client.coalescing_stats() == {
+            'calls': 1, 'coalesced': 2
+        }
+
+    def test_concurrent_callers_read_body(self):
+        url = self.client._url(
+            '/containers/{0}/json', fake_api.FAKE_CONTAINER_ID
+        )
+        responses = self.run_concurrently(lambda: self.client._get(url), 3)
+        assert len(self.backend.calls) == 1
+        assert len(set(map(id, responses))) == 3
+        body = responses[0].content
+        for res in responses:
+            assert res.content == body
+            assert res.json() == json.loads(body.decode('utf-8'))
+        responses[0].headers['X-Test'] = 'yes'
+        assert 'X-Test' not in responses[1].headers
+
+    def test_concurrent_errors_copied(self):
+        results = self.run_concurrently(
+            lambda: self.client.inspect_container('missing'), 3
+        )
+        assert len(self.backend.calls) == 1
+        assert len(set(map(id, results))) == 3
+        for result in results:
+            assert isinstance(result, docker.errors.NotFound)
+            assert result.explanation == 'No such container: missing'
+
+    def test_different_requests_not_merged(self):
+        self.backend.release.set()
+        self.client.inspect_container(fake_api.FAKE_CONTAINER_ID)
+        self.client.inspect_image(fake_api.FAKE_IMAGE_NAME)
+        self.client.inspect_container(fake_api.FAKE_CONTAINER_ID)
+        assert len(self.backend.calls) == 3
+        assert self.client.coalescing_stats() == {
+            'calls': 3, 'coalesced': 0
+        }
+
+    def test_streams_not_merged(self):
+        self.backend.release.set()
+        self.client._get(self.client._url('/events'), stream=True)
+        assert len(self.backend.calls) == 1
+        assert self.client.coalescing_stats()['calls'] == 0
+
+    def test_disabled_by_default(self):
+        client = APIClient(version=DEFAULT_DOCKER_API_VERSION)
+        with pytest.raises(docker.errors.DockerException):
+            client.coalescing_stats()
+
+
+class FollowLogsTest(unittest.TestCase):
+    class Server(six.moves.socketserver.ThreadingMixIn,
+                 six.moves.socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler, object):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if '/logs?' in self.path:
+                self.server.requests.append(self.path)
+                if isinstance(self.server.logs, dict):
+                    # Sliced logs, requested concurrently
+                    query = six.moves.urllib.parse.parse_qs(
+                        self.path.split('?', 1)[1]
+                    )
+                    lines = self.server.logs[query.get('since', [None])[0]]
+                else:
+                    lines = self.server.logs.pop(0)
+                data = b''.join(
+                    struct.pack('>BxxxL', stream, len(line)) + line
+                    for stream, line in lines
+                )
+                content_type = 'application/vnd.docker.raw-stream'
+            else:
+                data = json.dumps({
+                    'Config': {'Tty': False},
+                    'Created': '2021-03-04T05:06:07.123456789Z',
+                    'State': {'Running': self.server.running.pop(0)},
+                }).encode('utf-8')
+                content_type = 'application/json'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    def setUp(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_file = os.path.join(socket_dir, 'docker.sock')
+        self.server = self.Server(socket_file, self.Handler)
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.client = APIClient(
+            base_url='unix://' + socket_file, version='1.35'
+        )
+        self.addCleanup(self.client.close)
+
+    def test_follow_logs(self):
+        a = (1, b'2021-03-04T05:06:07.100000000Z a\n')
+        b = (2, b'2021-03-04T05:06:07.200000000Z b\n')
+        c = (1, b'2021-03-04T05:06:08.300000000Z c\n')
+        # The first response ends while the container is still running
+        self.server.logs = [[a, b], [a, b, c], [c]]
+        # The logs are requested after checking whether the container
+        # has a TTY
+        self.server.running = [True, True, True, False, False]
+        lines = list(self.client.follow_logs('abc', since=1000, tail=10))
+        assert [(line.stream, line.data) for line in lines] == [
+            (1, b'a\n'), (2, b'b\n'), (1, b'c\n')
+        ]
+        assert lines[2].timestamp == '2021-03-04T05:06:08.300000000Z'
+
+        params = [
+            dict(six.moves.urllib.parse.parse_qsl(path.split('?', 1)[1]))
+            for path in self.server.requests
+        ]
+        assert params[0] == {
+            'stdout': '1', 'stderr': '1', 'timestamps': '1', 'follow': '1',
+            'tail': '10', 'since': '1000',
+        }
+        assert params[1]['since'] == '1614834367'
+        assert params[1]['tail'] == 'all'
+        assert params[2]['follow'] == '0'
+
+    def test_log_lines(self):
+        self.server.logs = [[
+            (1, b'2021-03-04T05:06:07.100000000Z a\n'),
+            (2, b'2021-03-04T05:06:07.200000000Z b'),
+            (2, b'2021-03-04T05:06:07.300000000Z \n'),
+        ]]
+        self.server.running = [True]
+        lines = list(self.client.log_lines('abc', timestamps=True, until=10))
+        assert lines == [
+            (1, 1614834367.1, b'a\n'),
+            (2, 1614834367.2, b'b2021-03-04T05:06:07.300000000Z \n'),
+        ]
+        params = dict(six.moves.urllib.parse.parse_qsl(
+            self.server.requests[0].split('?', 1)[1]
+        ))
+        assert params['timestamps'] == '1'
+        assert params['until'] == '10'
+
+    def test_logs_to(self):
+        self.server.logs = [[
+            (1, b'out\n'), (2, b'err\n'), (1, b'x' * 100000),
+        ]]
+        self.server.running = [True]
+        stdout, stderr = io.BytesIO(), io.BytesIO()
+        assert self.client.logs_to('abc', stdout, stderr, tail=5) == (
+            100004, 4
+        )
+        assert stdout.getvalue() == b'out\n' + b'x' * 100000
+        assert stderr.getvalue() == b'err\n'
+        params = dict(six.moves.urllib.parse.parse_qsl(
+            self.server.requests[0].split('?', 1)[1]
+        ))
+        assert params['stdout'] == params['stderr'] == '1'
+        assert params['timestamps'] == '0'
+        assert params['tail'] == '5'
+
+    def test_sliced_logs(self):
+        self.server.logs = {
+            None: [(1, b'a\n'), (2, b'b\n')],
+            '1614834397': [(1, b'c\n')],
+            '1614834427': [(2, b'd\n'), (1, b'e')],
+        }
+        self.server.running = [True]
+        lines = list(self.client.log_lines(
+            'abc', until=1614834457, slices=3
+        ))
+        assert lines == [
+            (1, b'a\n'), (2, b'b\n'), (1, b'c\n'), (2, b'd\n'), (1, b'e')
+        ]
+        params = sorted(
+            (p.get('since', ''), p['until']) for p in (
+                dict(six.moves.urllib.parse.parse_qsl(path.split('?', 1)[1]))
+                for path in self.server.requests
+            )
+        )
+        assert params == [
+            ('', '1614834396.999999999'),
+            ('1614834397', '1614834426.999999999'),
+            ('1614834427', '1614834457'),
+        ]
+
+    def test_sliced_logs_to(self):
+        self.server.logs = {
+            '1000': [(1, b'a\n'), (2, b'b\n')],
+            '1001': [(1, b'c\n')],
+        }
+        self.server.running = [True]
+        stdout = io.BytesIO()
+        assert self.client.logs_to(
+            'abc', stdout, stdout, since=1000, until=1002, slices=4
+        ) == (4, 2)
+        assert stdout.getvalue() == b'a\nb\nc\n'
+        assert len(self.server.requests) == 2
+
+    def test_slices_with_tail(self):
+        with pytest.raises(docker.errors.InvalidArgument):
+            self.client.log_lines('abc', tail=10, slices=2)
+
+
 class DisableSocketTest(unittest.TestCase):
     class DummySocket(object):
         def __init__(self, timeout=60):
@@ -0,0 +1,203 @@
+import os
+import threading
+import unittest
+
+import docker
+import pytest
+from docker import errors
+from docker.client_registry import ClientRegistry
+from docker.constants import DEFAULT_TIMEOUT_SECONDS
+from docker.tls import TLSConfig
+from docker.utils import version_cache
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+TEST_CERT_DIR = os.path.join(os.path.dirname(__file__), 'testdata/certs')
+
+
+class ClientRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = ClientRegistry()
+        self.addCleanup(self.registry.close)
+
+    def test_same_parameters_share_client(self):
+        client = self.registry.client(version='1.35')
+        assert isinstance(client, docker.DockerClient)
+        assert client is self.registry.client(
+            base_url='unix:///var/run/docker.sock', version='1.35',
+            timeout=DEFAULT_TIMEOUT_SECONDS
+        )
+        assert client.api is self.registry.api_client(
+            base_url='unix:///var/run/docker.sock', version='1.35'
+        )
+        assert len(self.registry) == 1
+
+    @mock.patch('docker.api.APIClient._retrieve_server_version')
+    def test_auto_version_negotiated_once(self, retrieve_server_version):
+        retrieve_server_version.return_value = '1.41'
+        version_cache.clear_api_versions()
+        self.addCleanup(version_cache.clear_api_versions)
+        client = self.registry.client()
+        assert client.api._version == '1.41'
+        assert client is self.registry.client(version='auto')
+        assert client is not self.registry.client(version='1.41')
+        assert retrieve_server_version.call_count == 1
+
+    def test_different_parameters(self):
+        client = self.registry.client(version='1.35')
+        assert client is not self.registry.client(version='1.40')
+        assert client is not self.registry.client(
+            version='1.35', base_url='tcp://127.0.0.1:2375'
+        )
+        assert client is not self.registry.client(version='1.35', timeout=5)
+        assert len(self.registry) == 4
+
+    def test_equivalent_tls_configs(self):
+        def tls_config():
+            return TLSConfig(
+                client_cert=(
+                    os.path.join(TEST_CERT_DIR, 'cert.pem'),
+                    os.path.join(TEST_CERT_DIR, 'key.pem')
+                ),
+                ca_cert=os.path.join(TEST_CERT_DIR, 'ca.pem'),
+                verify=True
+            )
+
+        client = self.registry.client(
+            base_url='tcp://127.0.0.1:2376', version='1.35', tls=tls_config()
+        )
+        assert client.api.base_url == 'https://127.0.0.1:2376'
+        assert client is self.registry.client(
+            base_url='tcp://127.0.0.1:2376', version='1.35', tls=tls_config()
+        )
+        assert client is not self.registry.client(
+            base_url='tcp://127.0.0.1:2376', version='1.35', tls=True
+        )
+
+    def test_unhashable_arguments(self):
+        client = self.registry.client(
+            version='1.35', credstore_env={'PATH': '/usr/bin'}
+        )
+        assert client is self.registry.client(
+            version='1.35', credstore_env={'PATH': '/usr/bin'}
+        )
+
+    def test_from_env(self):
+        environment = {'DOCKER_HOST': 'tcp://192.168.59.103:2375'}
+        client = self.registry.from_env(
+            version='1.35', environment=environment
+        )
+        assert client.api.base_url == 'http://192.168.59.103:2375'
+        assert client is self.registry.from_env(
+            version='1.35', environment=environment
+        )
+        assert client is self.registry.client(
+            base_url='tcp://192.168.59.103:2375', version='1.35'
+        )
+
+    def test_context(self):
+        client = self.registry.client(context='default', version='1.35')
+        assert client is self.registry.client(
+            base_url=docker.ContextAPI.get_context('default').Host,
+            version='1.35'
+        )
+
+    @mock.patch('docker.context.ContextAPI.get_context', return_value=None)
+    def test_context_not_found(self, _):
+        with pytest.raises(errors.ContextNotFound):
+            self.registry.client(context='missing')
+
+    def test_concurrent_access(self):
+        clients = []
+
+        def get_client():
+            clients.append(self.registry.client(version='1.35'))
+
+        threads = [threading.Thread(target=get_client) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(clients) == 10
+        assert all(client is clients[0] for client in clients)
+
+    def test_client_created_outside_lock(self):
+        started = threading.Event()
+        finish = threading.Event()
+        docker_client = docker.DockerClient
+
+        def slow_client(**kwargs):
+            if kwargs['version'] == '1.35':
+                started.set()
+                finish.wait(5)
+            return docker_client(**kwargs)
+
+        clients = []
+        with mock.patch(
+                'docker.client_registry.DockerClient', side_effect=slow_client
+        ):
+            threads = [
+                threading.Thread(
+                    target=lambda: clients.append(
+                        self.registry.client(version='1.35')
+                    )
+                ) for _ in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            assert started.wait(5)
+            # Clients with other parameters don't wait for it
+            self.registry.client(version='1.40')
+            assert clients == []
+            finish.set()
+            for thread in threads:
+                thread.join(5)
+        assert len(clients) == 2 and clients[0] is clients[1]
+        assert len(self.registry) == 2
+
+    def test_failed_client_not_registered(self):
+        with pytest.raises(errors.DockerException):
+            self.registry.client(version=1.35)
+        assert len(self.registry) == 0
+
+    def test_close(self):
+        client = self.registry.client(version='1.35')
+        with mock.patch.object(client.api, 'close') as close:
+            self.registry.close()
+        close.assert_called_once_with()
+        assert len(self.registry) == 0
+        assert self.registry.client(version='1.35') is not client
+
+    def test_shared_client(self):
+        client = docker.shared_client(version='1.35')
+        assert client is docker.shared_client(version='1.35')
+        assert client.api is docker.shared_api_client(version='1.35')
+
+
+class LazyConfigTest(unittest.TestCase):
+    @mock.patch('docker.utils.config.load_general_config')
+    def test_config_loaded_on_first_use(self, load_general_config):
+        load_general_config.return_value = {
+            'detachKeys': 'ctrl-p',
+            'proxies': {'default': {'httpProxy': 'http://proxy:3128'}},
+        }
+        client = docker.APIClient(version='1.35')
+        assert not load_general_config.called
+
+        assert client._general_configs['detachKeys'] == 'ctrl-p'
+        assert client._proxy_configs.http == 'http://proxy:3128'
+        assert client._auth_configs.auths == {}
+        assert load_general_config.call_count == 1
+
+    @mock.patch('docker.utils.config.load_general_config')
+    def test_proxy_config_for_base_url(self, load_general_config):
+        load_general_config.return_value = {'proxies': {
+            'tcp://127.0.0.1:2375': {'httpProxy': 'http://proxy:3128'},
+        }}
+        client = docker.APIClient(
+            base_url='tcp://127.0.0.1:2375', version='1.35'
+        )
+        assert client._proxy_configs.http == 'http://proxy:3128'
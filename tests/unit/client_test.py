@@ -89,10 +89,8 @@ class ClientTest(unittest.TestCase):
         mock_obj.return_value.urlopen.return_value.status = 200
         client.ping()
 
-        base_url = "{base_url}/v{version}/_ping".format(
-            base_url=client.api.base_url,
-            version=client.api._version
-        )
+        # The pool is shared by all the URLs of the host
+        base_url = client.api.base_url
 
         mock_obj.assert_called_once_with(base_url,
                                          "/var/run/docker.sock",
@@ -128,10 +126,8 @@ class ClientTest(unittest.TestCase):
         mock_obj.return_value.urlopen.return_value.status = 200
         client.ping()
 
-        base_url = "{base_url}/v{version}/_ping".format(
-            base_url=client.api.base_url,
-            version=client.api._version
-        )
+        # The pool is shared by all the URLs of the host
+        base_url = client.api.base_url
 
         mock_obj.assert_called_once_with(base_url,
                                          "/var/run/docker.sock",
@@ -202,10 +198,8 @@ class FromEnvTest(unittest.TestCase):
         mock_obj.return_value.urlopen.return_value.status = 200
         client.ping()
 
-        base_url = "{base_url}/v{version}/_ping".format(
-            base_url=client.api.base_url,
-            version=client.api._version
-        )
+        # The pool is shared by all the URLs of the host
+        base_url = client.api.base_url
 
         mock_obj.assert_called_once_with(base_url,
                                          "/var/run/docker.sock",
@@ -239,10 +233,8 @@ class FromEnvTest(unittest.TestCase):
         mock_obj.return_value.urlopen.return_value.status = 200
         client.ping()
 
-        base_url = "{base_url}/v{version}/_ping".format(
-            base_url=client.api.base_url,
-            version=client.api._version
-        )
+        # The pool is shared by all the URLs of the host
+        base_url = client.api.base_url
 
         mock_obj.assert_called_once_with(base_url,
                                          "/var/run/docker.sock",
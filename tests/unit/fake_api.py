@@ -449,6 +449,10 @@ def post_fake_update_container():
     return 200, {'Warnings': []}
 
 
+def put_fake_archive():
+    return 200, ''
+
+
 def post_fake_update_node():
     return 200, None
 
@@ -556,6 +560,9 @@ fake_responses = {
     get_fake_diff,
     '{1}/{0}/containers/3cc2351ab11b/export'.format(CURRENT_VERSION, prefix):
     get_fake_export,
+    ('{1}/{0}/containers/3cc2351ab11b/archive'.format(CURRENT_VERSION, prefix),
+     'PUT'):
+    put_fake_archive,
     '{1}/{0}/containers/3cc2351ab11b/update'.format(CURRENT_VERSION, prefix):
     post_fake_update_container,
     '{1}/{0}/containers/3cc2351ab11b/exec'.format(CURRENT_VERSION, prefix):
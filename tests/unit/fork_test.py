@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import docker
+import pytest
+import six
+from docker.utils import fork
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class ResetInChildTest(unittest.TestCase):
+    def test_registered_objects_reset(self):
+        class Resettable(object):
+            resets = 0
+
+            def _reset_after_fork(self):
+                self.resets += 1
+
+        class Failing(object):
+            def _reset_after_fork(self):
+                raise ValueError()
+
+        obj = Resettable()
+        failing = Failing()
+        callback = mock.Mock()
+        with mock.patch.object(fork, '_registered', set()), \
+                mock.patch.object(fork, '_callbacks', []):
+            fork.register(failing)
+            fork.register(obj)
+            fork.after_in_child(callback)
+            fork._reset_in_child()
+        assert obj.resets == 1
+        assert callback.call_count == 1
+
+    def test_client_keeps_configuration(self):
+        client = docker.APIClient(
+            base_url='unix:///var/run/docker.sock', version='1.35',
+            user_agent='test'
+        )
+        adapter = client._custom_adapter
+        pool = adapter.get_connection(client.base_url)
+        client._reset_after_fork()
+        assert adapter.get_connection(client.base_url) is not pool
+        assert client.adapters['http+docker://'] is adapter
+        assert client.api_version == '1.35'
+        assert client.headers['User-Agent'] == 'test'
+
+    def test_tcp_client(self):
+        client = docker.APIClient(
+            base_url='tcp://127.0.0.1:2375', version='1.35'
+        )
+        poolmanager = client.adapters['http://'].poolmanager
+        client._reset_after_fork()
+        assert client.adapters['http://'].poolmanager is not poolmanager
+
+
+@pytest.mark.skipif(
+    not hasattr(os, 'register_at_fork'), reason='requires os.register_at_fork'
+)
+class ForkedClientTest(unittest.TestCase):
+    class Server(six.moves.socketserver.ThreadingMixIn,
+                 six.moves.socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler, object):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.server.connections.add(self.connection)
+            data = json.dumps({'Id': 'abc'}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    def setUp(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_file = os.path.join(socket_dir, 'docker.sock')
+        self.server = self.Server(socket_file, self.Handler)
+        self.server.connections = set()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.client = docker.APIClient(
+            base_url='unix://' + socket_file, version='1.35'
+        )
+        self.addCleanup(self.client.close)
+
+    def test_child_opens_new_connections(self):
+        self.client.inspect_container('abc')
+        assert len(self.server.connections) == 1
+
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                if self.client.inspect_container('abc')['Id'] == 'abc':
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        assert status == 0
+        assert len(self.server.connections) == 2
+
+        # The connection of the parent is still usable
+        assert self.client.inspect_container('abc')['Id'] == 'abc'
+        assert len(self.server.connections) == 2
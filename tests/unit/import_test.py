@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import unittest
+
+import docker
+
+# Modules that are slow to import, and only needed for some features
+LAZY_MODULES = (
+    'paramiko', 'websocket', 'docker.models', 'docker.transport.sshconn',
+    'docker.transport.npipeconn', 'distutils', 'concurrent.futures'
+)
+
+
+def imported_modules(code):
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        code + '\nimport sys\nprint("\\n".join(sys.modules))'
+    ], universal_newlines=True)
+    return [
+        name for name in output.split()
+        if name.startswith(LAZY_MODULES)
+    ]
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_import_docker(self):
+        assert imported_modules('import docker') == []
+
+    def test_create_client(self):
+        assert imported_modules(
+            'import docker\n'
+            'docker.DockerClient(base_url="unix:///var/run/docker.sock", '
+            'version="1.41")'
+        ) == []
+
+    def test_models_loaded_on_first_use(self):
+        modules = imported_modules(
+            'import docker\n'
+            'docker.DockerClient(version="1.41").containers'
+        )
+        assert 'docker.models.containers' in modules
+        assert 'paramiko' not in modules
+
+    def test_lazy_transport_attributes(self):
+        from docker.transport.sshconn import SSHHTTPAdapter
+        assert docker.transport.SSHHTTPAdapter is SSHHTTPAdapter
+        with self.assertRaises(AttributeError):
+            docker.transport.NotATransport
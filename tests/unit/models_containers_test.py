@@ -420,7 +420,7 @@ class ContainerTest(unittest.TestCase):
         )
         client.api.exec_start.assert_called_with(
             FAKE_EXEC_ID, detach=False, tty=False, stream=True, socket=False,
-            demux=False,
+            demux=False, lines=False, sink=None,
         )
 
     def test_exec_run_failure(self):
@@ -434,7 +434,7 @@ class ContainerTest(unittest.TestCase):
         )
         client.api.exec_start.assert_called_with(
             FAKE_EXEC_ID, detach=False, tty=False, stream=False, socket=False,
-            demux=False,
+            demux=False, lines=False, sink=None,
         )
 
     def test_export(self):
@@ -485,8 +485,10 @@ class ContainerTest(unittest.TestCase):
         client = make_fake_client()
         container = client.containers.get(FAKE_CONTAINER_ID)
         container.put_archive('path', 'foo')
-        client.api.put_archive.assert_called_with(FAKE_CONTAINER_ID,
-                                                  'path', 'foo')
+        client.api.put_archive.assert_called_with(
+            FAKE_CONTAINER_ID, 'path', 'foo', gzip=False, gzip_level=9,
+            gzip_workers=None
+        )
 
     def test_remove(self):
         client = make_fake_client()
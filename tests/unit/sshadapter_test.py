@@ -1,6 +1,23 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
 import unittest
+
 import docker
-from docker.transport.sshconn import SSHSocket
+import pytest
+import six
+from docker import constants
+from docker.utils import fork
+from docker.transport.sshconn import (
+    SSHConnection, SSHHTTPAdapter, SSHSocket, SSHTransportPool
+)
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 class SSHAdapterTest(unittest.TestCase):
     def test_ssh_hostname_prefix_trim(self):
@@ -29,4 +46,389 @@ class SSHAdapterTest(unittest.TestCase):
         c = SSHSocket(host="hostname:22")
         assert c.host == "hostname"
         assert c.port == "22"
-        assert c.user == None
\ No newline at end of file
+        assert c.user == None
+
+
+FAKE_SSH = '''#!{executable}
+# Stands in for "ssh host docker system dial-stdio", forwarding stdio to the
+# socket of a local test server. With a ControlPath, the first connection
+# plays the master SSH session, and the next ones channels opened over it.
+import os
+import socket
+import sys
+import threading
+
+options = sys.argv[1:sys.argv.index('--')]
+control_path = None
+for option in options:
+    if option.startswith('ControlPath='):
+        control_path = option[len('ControlPath='):]
+
+
+def log(role):
+    with open(os.environ['DOCKER_TEST_SSH_LOG'], 'a') as f:
+        f.write(role + '\\n')
+
+
+if '-O' in options:
+    log('exit')
+    os.remove(control_path)
+    sys.exit(0)
+if control_path and os.path.exists(control_path):
+    log('channel')
+elif control_path:
+    open(control_path, 'w').close()
+    log('master')
+else:
+    log('connection')
+
+sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+sock.connect(os.environ['DOCKER_TEST_SOCKET'])
+
+
+def forward_stdin():
+    while True:
+        data = os.read(0, 65536)
+        if not data:
+            break
+        sock.sendall(data)
+    sock.shutdown(socket.SHUT_WR)
+
+
+thread = threading.Thread(target=forward_stdin)
+thread.daemon = True
+thread.start()
+while True:
+    data = sock.recv(65536)
+    if not data:
+        break
+    os.write(1, data)
+'''
+
+
+@pytest.mark.skipif(
+    constants.IS_WINDOWS_PLATFORM, reason='Unix only'
+)
+class SSHShellOutPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        ssh_path = os.path.join(self.tmpdir, 'ssh')
+        with open(ssh_path, 'w') as f:
+            f.write(FAKE_SSH.format(executable=sys.executable))
+        os.chmod(ssh_path, 0o755)
+
+        connections = []
+
+        class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                connections.append(self)
+                six.moves.BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+
+            def do_GET(self):
+                body = b'{"ApiVersion": "1.41"}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.connections = connections
+        socket_path = os.path.join(self.tmpdir, 'docker.sock')
+        server = six.moves.socketserver.ThreadingUnixStreamServer(
+            socket_path, Handler
+        )
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        patcher = mock.patch.dict(os.environ, {
+            'PATH': self.tmpdir + os.pathsep + os.environ.get('PATH', ''),
+            'DOCKER_TEST_SOCKET': socket_path,
+            'DOCKER_TEST_SSH_LOG': os.path.join(self.tmpdir, 'ssh.log'),
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = self.make_client()
+
+    def make_client(self, **kwargs):
+        client = docker.APIClient(
+            base_url='ssh://testhost', version='1.41', use_ssh_client=True,
+            **kwargs
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def ssh_log(self):
+        with open(os.environ['DOCKER_TEST_SSH_LOG']) as f:
+            return f.read().split()
+
+    def pooled_connections(self):
+        adapter = self.client._custom_adapter
+        assert len(adapter.pools) == 1
+        pool = adapter.pools[adapter.pools.keys()[0]]
+        return [conn for conn in pool.pool.queue if conn is not None]
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            assert self.client.version()['ApiVersion'] == '1.41'
+        assert len(self.connections) == 1
+        assert len(self.pooled_connections()) == 1
+
+    def test_urls_share_pool(self):
+        for container in ('a', 'b', 'c', 'd'):
+            self.client.inspect_container(container)
+        assert len(self.connections) == 1
+        assert len(self.pooled_connections()) == 1
+        assert self.ssh_log() == ['connection']
+
+    def test_dead_connection_is_replaced(self):
+        self.client.version()
+        conn, = self.pooled_connections()
+        proc = conn.sock.proc
+        proc.kill()
+        proc.wait()
+
+        assert self.client.version()['ApiVersion'] == '1.41'
+        assert len(self.connections) == 2
+        assert conn.sock.proc is not proc
+
+    def test_idle_connection_is_evicted(self):
+        self.client.version()
+        conn, = self.pooled_connections()
+        proc = conn.sock.proc
+        conn.last_used -= constants.DEFAULT_SSH_IDLE_TIMEOUT + 1
+
+        self.client.version()
+        assert len(self.connections) == 2
+        assert proc.poll() is not None
+
+    def test_close_terminates_subprocess(self):
+        self.client.version()
+        conn, = self.pooled_connections()
+        proc = conn.sock.proc
+        self.client.close()
+        assert proc.poll() is not None
+
+    def test_multiplexing(self):
+        self.client = self.make_client(ssh_multiplexing=True)
+        control_path = self.client._custom_adapter.control_path
+        assert os.path.dirname(control_path) != self.tmpdir
+
+        self.client.version()
+        conn, = self.pooled_connections()
+        conn.sock.proc.kill()
+        conn.sock.proc.wait()
+        self.client.version()
+        assert self.ssh_log() == ['master', 'channel']
+        assert os.path.exists(control_path)
+
+        self.client.close()
+        assert self.ssh_log() == ['master', 'channel', 'exit']
+        assert not os.path.exists(os.path.dirname(control_path))
+
+    def test_master_kept_for_parent_after_fork(self):
+        self.client = self.make_client(ssh_multiplexing=True)
+        control_path = self.client._custom_adapter.control_path
+        self.client.version()
+        conn, = self.pooled_connections()
+        self.addCleanup(conn.close)
+
+        with mock.patch.object(fork, '_inherited', []):
+            self.client._reset_after_fork()
+        assert len(self.client._custom_adapter.pools) == 0
+        assert conn.sock.is_alive()
+        self.client.version()
+        self.client.close()
+        assert self.ssh_log() == ['master', 'channel']
+        assert os.path.exists(control_path)
+        shutil.rmtree(os.path.dirname(control_path))
+
+    def test_no_multiplexing_by_default(self):
+        self.client.version()
+        assert self.client._custom_adapter.control_path is None
+        assert self.ssh_log() == ['connection']
+
+
+class FakeChannel(object):
+    def __init__(self, transport):
+        self.transport = transport
+        self.closed = False
+
+    def settimeout(self, timeout):
+        pass
+
+    def exec_command(self, command):
+        self.command = command
+
+    def exit_status_ready(self):
+        return False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def open_session(self):
+        return FakeChannel(self)
+
+
+class FakeSSHClient(object):
+    def __init__(self):
+        self.transport = FakeTransport()
+
+    def connect(self, **kwargs):
+        pass
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.transport.active = False
+
+
+class SSHTransportPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.clients = []
+        self.pool = SSHTransportPool(
+            self.connect, max_transports=3, max_sessions=2
+        )
+
+    def connect(self):
+        client = FakeSSHClient()
+        self.clients.append(client)
+        return client
+
+    def channels(self):
+        return [t['channels'] for t in self.pool.stats()['transports']]
+
+    def test_channels_spread_across_transports(self):
+        shards = [self.pool.open_channel()[0] for _ in range(5)]
+        assert len(self.clients) == 3
+        assert self.channels() == [2, 2, 1]
+
+        self.pool.release(shards[0])
+        self.pool.release(shards[1])
+        shard, channel = self.pool.open_channel()
+        assert channel.get_transport() is self.clients[0].transport
+        assert self.channels() == [1, 2, 1]
+
+    def test_least_loaded_transport_past_max_transports(self):
+        for _ in range(6):
+            self.pool.open_channel()
+        shard, _ = self.pool.open_channel()
+        assert len(self.clients) == 3
+        assert self.channels() == [3, 2, 2]
+
+    def test_dead_transport_is_replaced(self):
+        shard, _ = self.pool.open_channel()
+        self.clients[0].transport.active = False
+        self.pool.open_channel()
+        assert len(self.clients) == 2
+        stats = self.pool.stats()
+        assert stats['dead_transports'] == 1
+        assert stats['transport_connects'] == 2
+        assert self.channels() == [1]
+
+    def test_connect_outside_lock(self):
+        for _ in range(2):
+            self.pool.open_channel()
+        started = threading.Event()
+        finish = threading.Event()
+
+        def slow_connect():
+            started.set()
+            finish.wait(5)
+            return self.connect()
+
+        self.pool.connect = slow_connect
+        thread = threading.Thread(target=self.pool.open_channel)
+        thread.start()
+        assert started.wait(5)
+        # Other threads use the connected transport meanwhile
+        self.pool.release(self.pool.shards[0])
+        shard, _ = self.pool.open_channel()
+        assert shard is self.pool.shards[0]
+        assert thread.is_alive()
+        finish.set()
+        thread.join(5)
+        assert self.channels() == [2, 1]
+
+    def test_failed_connect_releases_slot(self):
+        pool = SSHTransportPool(
+            mock.Mock(side_effect=IOError), max_transports=1
+        )
+        for _ in range(2):
+            with pytest.raises(IOError):
+                pool.open_channel()
+        assert pool.connecting == 0
+        pool.connect = self.connect
+        shard, _ = pool.open_channel()
+        assert pool.shards == [shard] and pool.connects == 1
+
+    def test_connection_releases_channel(self):
+        conn = SSHConnection(transports=self.pool)
+        conn.connect()
+        assert conn.sock.command == 'docker system dial-stdio'
+        assert self.channels() == [1]
+        conn.close()
+        assert self.channels() == [0]
+
+    @mock.patch.object(SSHHTTPAdapter, '_new_paramiko_client', FakeSSHClient)
+    def test_adapter_pool_stats(self):
+        adapter = SSHHTTPAdapter('ssh://user@hostname:1234', max_transports=2)
+        pool = adapter.get_connection('http+docker://ssh/v1.41/version')
+        conns = [pool._get_conn(None) for _ in range(10)]
+        for conn in conns:
+            conn.connect()
+        for conn in conns[:3]:
+            pool._put_conn(conn)
+
+        stats = adapter.pool_stats()
+        assert stats['pools'] == 1
+        assert stats['idle_connections'] == 3
+        assert stats['transport_connects'] == 2
+        assert [t['channels'] for t in stats['transports']] == [9, 1]
+        adapter.close()
+        assert adapter.pool_stats()['transports'] == []
+
+    @mock.patch.object(SSHHTTPAdapter, '_new_paramiko_client', FakeSSHClient)
+    def test_adapter_reset_after_fork(self):
+        adapter = SSHHTTPAdapter('ssh://user@hostname:1234')
+        transport = adapter.ssh_client.transport
+        pool = adapter.get_connection('http+docker://ssh/v1.41/version')
+        conn = pool._get_conn(None)
+        conn.connect()
+        pool._put_conn(conn)
+
+        with mock.patch.object(fork, '_inherited', []):
+            adapter.reset_after_fork()
+        # The transport of the parent process is left untouched
+        assert transport.active
+        assert not conn.sock.closed
+        assert adapter.pool_stats()['idle_connections'] == 0
+
+        pool = adapter.get_connection('http+docker://ssh/v1.41/version')
+        conn = pool._get_conn(None)
+        conn.connect()
+        assert conn.sock.get_transport() is not transport
+        adapter.close()
+        assert transport.active
@@ -1,7 +1,20 @@
+import os
+import ssl
+import threading
 import unittest
+import warnings
+
+import docker
+import requests
+import six
 from docker.transport import ssladapter
 import pytest
 
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
 try:
     from backports.ssl_match_hostname import (
         match_hostname, CertificateError
@@ -29,6 +42,32 @@ class SSLAdapterTest(unittest.TestCase):
         assert not ssl_context.options & OP_NO_TLSv1
 
 
+class ResumingSSLContextTest(unittest.TestCase):
+    def test_default_protocol(self):
+        context = ssladapter.ResumingSSLContext(None)
+        assert context.protocol == getattr(
+            ssl, 'PROTOCOL_TLS_CLIENT', ssl.PROTOCOL_SSLv23
+        )
+
+    @pytest.mark.skipif(
+        not hasattr(ssl, 'TLSVersion'), reason='Python 3.7+ only'
+    )
+    def test_pinned_version(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            context = ssladapter.ResumingSSLContext(ssl.PROTOCOL_TLSv1_2)
+        assert context.protocol == ssl.PROTOCOL_TLS_CLIENT
+        assert context.minimum_version == ssl.TLSVersion.TLSv1_2
+        assert context.maximum_version == ssl.TLSVersion.TLSv1_2
+
+    def test_tls_config_context(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            context = docker.tls.TLSConfig(verify=False).ssl_context
+        assert not context.check_hostname
+        assert context.verify_mode == ssl.CERT_NONE
+
+
 class MatchHostnameTest(unittest.TestCase):
     cert = {
         'issuer': (
@@ -76,3 +115,106 @@ class MatchHostnameTest(unittest.TestCase):
     def test_match_dns_failure(self):
         with pytest.raises(CertificateError):
             match_hostname(self.cert, 'foobar.co.uk')
+
+
+TEST_CERT_DIR = os.path.join(os.path.dirname(__file__), 'testdata/certs')
+SERVER_CERT = os.path.join(TEST_CERT_DIR, 'server-cert.pem')
+SERVER_KEY = os.path.join(TEST_CERT_DIR, 'server-key.pem')
+
+
+@pytest.mark.skipif(
+    not ssladapter.HAS_TLS_SESSIONS, reason='TLS sessions not supported'
+)
+class TLSSessionResumptionTest(unittest.TestCase):
+    def setUp(self):
+        class Handler(six.moves.BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = b'{"ApiVersion": "1.41"}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(SERVER_CERT, SERVER_KEY)
+        server = six.moves.socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), Handler, bind_and_activate=False
+        )
+        server.daemon_threads = True
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        server.server_bind()
+        server.server_activate()
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = 'https://127.0.0.1:{0}'.format(
+            server.server_address[1]
+        )
+
+        # requests lets these override the verify option of the client
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop('REQUESTS_CA_BUNDLE', None)
+        os.environ.pop('CURL_CA_BUNDLE', None)
+
+    def make_client(self, tls_config):
+        client = docker.APIClient(
+            base_url=self.base_url, tls=tls_config, version='1.41'
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def check_resumption(self, tls_config):
+        client = self.make_client(tls_config)
+        assert client.version()['ApiVersion'] == '1.41'
+        # Force a new connection
+        client.close()
+        assert self.make_client(tls_config).version()
+
+        stats = tls_config.handshake_stats()
+        assert stats['handshakes'] == 2
+        assert stats['resumed_handshakes'] == 1
+        assert 0 < stats['resumed_handshake_time'] < stats['handshake_time']
+
+    def test_session_resumption_tls12(self):
+        self.check_resumption(docker.tls.TLSConfig(
+            ca_cert=SERVER_CERT, verify=True
+        ))
+
+    def test_session_resumption_tls13(self):
+        if not getattr(ssl, 'HAS_TLSv1_3', False):
+            pytest.skip('TLS 1.3 not supported')
+        self.check_resumption(docker.tls.TLSConfig(
+            ca_cert=SERVER_CERT, verify=True,
+            ssl_version=ssl.PROTOCOL_TLS_CLIENT
+        ))
+
+    def test_ssl_context_is_shared(self):
+        tls_config = docker.tls.TLSConfig(ca_cert=SERVER_CERT, verify=True)
+        self.make_client(tls_config).version()
+        self.make_client(tls_config).version()
+        adapters = [
+            client.get_adapter(self.base_url) for client in
+            [self.make_client(tls_config), self.make_client(tls_config)]
+        ]
+        assert adapters[0].ssl_context is adapters[1].ssl_context
+        assert adapters[0].ssl_context is tls_config.ssl_context
+
+    def test_verification_failure(self):
+        tls_config = docker.tls.TLSConfig(verify=True)
+        with pytest.raises(requests.exceptions.SSLError):
+            self.make_client(tls_config).version()
+        assert tls_config.handshake_stats()['handshakes'] == 0
+
+    def test_no_verification(self):
+        tls_config = docker.tls.TLSConfig(verify=False)
+        assert self.make_client(tls_config).version()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import docker
+import pytest
+from docker.transport import unixconn
+from docker.transport.unixconn import UnixHTTPAdapter
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class UnixHTTPAdapterTest(unittest.TestCase):
+    def setUp(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        self.socket_file = os.path.join(socket_dir, 'docker.sock')
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(self.server.close)
+        self.server.bind(self.socket_file)
+        self.server.listen(16)
+        self.accepted = []
+
+        def accept():
+            while True:
+                try:
+                    self.accepted.append(self.server.accept()[0])
+                except socket.error:
+                    return
+        thread = threading.Thread(target=accept)
+        thread.daemon = True
+        thread.start()
+
+        def close_accepted():
+            for conn in self.accepted:
+                conn.close()
+        self.addCleanup(close_accepted)
+
+        self.adapter = UnixHTTPAdapter(
+            'http+unix://' + self.socket_file, max_pool_size=3
+        )
+        self.addCleanup(self.adapter.close)
+
+    def test_pool_shared_between_urls(self):
+        pool = self.adapter.get_connection(
+            'http+docker://localhost/v1.35/containers/json'
+        )
+        assert self.adapter.get_connection(
+            'http+docker://localhost/v1.35/_ping'
+        ) is pool
+        assert pool.socket_path == self.socket_file
+
+    def test_prewarm(self):
+        url = 'http+docker://localhost'
+        assert self.adapter.prewarm(url, 2) == 2
+        pool = self.adapter.get_connection(url)
+        conns = [pool._get_conn() for _ in range(3)]
+        assert len([c for c in conns if c.sock is not None]) == 2
+        for conn in conns:
+            pool._put_conn(conn)
+
+        # Connections already open are not opened again, and no more
+        # connections than the pool holds are opened
+        assert self.adapter.prewarm(url, 10) == 1
+
+    def test_idle_connections_closed(self):
+        pool = self.adapter.get_connection('http+docker://localhost')
+        pool.prewarm(1)
+        with mock.patch.object(
+                unixconn, '_monotonic',
+                return_value=unixconn._monotonic() + pool.idle_timeout + 1):
+            conn = pool._get_conn()
+        assert conn.sock is None
+
+    def test_recent_connections_reused(self):
+        pool = self.adapter.get_connection('http+docker://localhost')
+        pool.prewarm(1)
+        conn = pool._get_conn()
+        assert conn.sock is not None
+
+    def test_connections_closed_by_server_dropped(self):
+        pool = self.adapter.get_connection('http+docker://localhost')
+        pool.prewarm(1)
+        deadline = time.time() + 5
+        while not self.accepted and time.time() < deadline:
+            time.sleep(0.01)
+        for conn in self.accepted:
+            conn.close()
+        conn = pool._get_conn()
+        assert conn.sock is None
+
+
+class APIClientPrewarmTest(unittest.TestCase):
+    def test_prewarm(self):
+        client = docker.APIClient(
+            base_url='unix:///var/run/docker.sock', version='1.35'
+        )
+        with mock.patch.object(
+                UnixHTTPAdapter, 'prewarm', return_value=2) as prewarm:
+            assert client.prewarm(2) == 2
+        prewarm.assert_called_once_with(client.base_url, 2)
+
+    def test_prewarm_unsupported(self):
+        client = docker.APIClient(
+            base_url='tcp://127.0.0.1:2375', version='1.35'
+        )
+        with pytest.raises(docker.errors.DockerException):
+            client.prewarm(2)
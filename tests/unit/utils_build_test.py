@@ -1,19 +1,30 @@
 # -*- coding: utf-8 -*-
 
+import io
+import json
 import os
 import os.path
 import shutil
 import socket
 import tarfile
 import tempfile
+import time
 import unittest
 
 
 from docker.constants import IS_WINDOWS_PLATFORM
-from docker.utils import exclude_paths, tar
+from docker.utils import (
+    create_archive, create_cached_archive, exclude_paths, stream_archive, tar
+)
+from docker.utils import build as build_utils
 
 import pytest
 
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
 from ..helpers import make_tree
 
 
@@ -342,6 +353,28 @@ class ExcludePathsTest(unittest.TestCase):
             ['../a.py', '/../b.py']
         ) == set(['c.py'])
 
+    def test_case_insensitive_mixed_patterns(self):
+        assert self.exclude(
+            ['FOO', '!foo/BAR', '**/A.PY', 'subdir/*', '!subdir/file.txt']
+        ) == convert_paths(
+            self.all_paths - set([
+                'foo', 'foo/a.py', 'foo/b.py', 'foo/Dockerfile3',
+                'foo/bar/a.py', 'a.py', 'bar/a.py', 'subdir/target',
+                'subdir/target/file.txt', 'subdir/target/subdir',
+                'subdir/target/subdir/file.txt', 'subdir/subdir2',
+                'subdir/subdir2/file.txt', 'subdir/subdir2/target',
+                'subdir/subdir2/target/file.txt',
+                'subdir/subdir2/target/subdir',
+                'subdir/subdir2/target/subdir/file.txt',
+            ])
+        )
+
+    def test_parallel_walk(self):
+        patterns = ['foo', '!foo/bar', '**/target', '*.py', '!a.py']
+        assert set(exclude_paths(
+            self.base, list(patterns), workers=4
+        )) == self.exclude(list(patterns))
+
 
 class TarTest(unittest.TestCase):
     def test_tar_with_excludes(self):
@@ -390,6 +423,117 @@ class TarTest(unittest.TestCase):
             tar_data = tarfile.open(fileobj=archive)
             assert sorted(tar_data.getnames()) == sorted(expected_names)
 
+    def test_tar_stream(self):
+        base = make_tree(['foo'], ['Dockerfile', 'foo/a.py', 'b.py'])
+        self.addCleanup(shutil.rmtree, base)
+        with open(os.path.join(base, 'foo', 'a.py'), 'wb') as f:
+            f.write(b'x' * 100000)
+
+        for gzip in (False, True):
+            data = b''.join(
+                tar(base, exclude=['b.py'], gzip=gzip, stream=True)
+            )
+            with tarfile.open(fileobj=io.BytesIO(data)) as tar_data:
+                assert sorted(tar_data.getnames()) == [
+                    'Dockerfile', 'foo', 'foo/a.py'
+                ]
+                assert len(tar_data.extractfile('foo/a.py').read()) == 100000
+
+    def test_stream_archive_bounded_chunks(self):
+        base = make_tree([], ['a', 'b'])
+        self.addCleanup(shutil.rmtree, base)
+        with open(os.path.join(base, 'a'), 'wb') as f:
+            f.write(b'x' * 100000)
+
+        chunks = stream_archive(base, chunk_size=4096, max_chunks=2)
+        first = next(chunks)
+        assert len(first) == 4096
+        chunks.close()
+
+        chunks = list(stream_archive(base, chunk_size=4096))
+        assert all(len(c) == 4096 for c in chunks[:-1])
+        with tarfile.open(fileobj=io.BytesIO(b''.join(chunks))) as tar_data:
+            assert sorted(tar_data.getnames()) == ['a', 'b']
+
+    def test_tar_cache(self):
+        base = make_tree(['foo'], ['Dockerfile', 'foo/a.py', 'b.py', 'c.py'])
+        self.addCleanup(shutil.rmtree, base)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        def age_files():
+            # Files modified in the last second are never reused
+            mtime = time.time() - 10
+            for name in os.listdir(base) + ['foo/a.py']:
+                os.utime(os.path.join(base, name), (mtime, mtime))
+
+        def check():
+            files = sorted(exclude_paths(base, []))
+            with create_archive(base, files=files) as expected:
+                with create_cached_archive(
+                        base, cache_dir, files=files) as archive:
+                    assert archive.read() == expected.read()
+
+        age_files()
+        check()
+        with open(os.path.join(base, 'b.py'), 'w') as f:
+            f.write('changed')
+        os.remove(os.path.join(base, 'c.py'))
+        age_files()
+        check()
+        check()
+        assert sorted(os.listdir(cache_dir))[1:] == [
+            'index.json', 'index.lock'
+        ]
+
+    def test_tar_cache_not_used_with_gzip(self):
+        base = make_tree([], ['Dockerfile', 'a.py'])
+        self.addCleanup(shutil.rmtree, base)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        with tar(base, gzip=True, cache_dir=cache_dir) as archive:
+            with tarfile.open(fileobj=archive) as tar_data:
+                names = sorted(tar_data.getnames())
+                assert names == ['Dockerfile', 'a.py']
+        assert os.listdir(cache_dir) == []
+
+    def test_tar_cache_concurrent_builds(self):
+        base = make_tree([], ['Dockerfile', 'a.py'])
+        self.addCleanup(shutil.rmtree, base)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        mtime = time.time() - 10
+        for name in os.listdir(base):
+            os.utime(os.path.join(base, name), (mtime, mtime))
+        create_cached_archive(base, cache_dir).close()
+
+        add_extra_files = build_utils._add_extra_files
+        results = []
+        started = []
+
+        def other_build(*args):
+            # Another build runs while the first one is writing its archive
+            if not started:
+                started.append(True)
+                results.append(create_cached_archive(base, cache_dir))
+            return add_extra_files(*args)
+
+        with mock.patch.object(
+                build_utils, '_add_extra_files', side_effect=other_build):
+            results.append(create_cached_archive(base, cache_dir))
+        for archive in results:
+            with archive:
+                with tarfile.open(fileobj=archive) as tar_data:
+                    names = sorted(tar_data.getnames())
+                    assert names == ['Dockerfile', 'a.py']
+
+        with open(os.path.join(cache_dir, 'index.json')) as f:
+            index = json.load(f)
+        assert sorted(os.listdir(cache_dir)) == sorted([
+            index['archive'], 'index.json', 'index.lock'
+        ])
+
     def test_tar_with_empty_directory(self):
         base = tempfile.mkdtemp()
         self.addCleanup(shutil.rmtree, base)
@@ -0,0 +1,49 @@
+import gzip
+import io
+import unittest
+import zlib
+
+from docker.utils import ParallelGzipWriter, gzip_compress
+
+
+def decompress(data):
+    with gzip.GzipFile(fileobj=io.BytesIO(data)) as f:
+        return f.read()
+
+
+class ParallelGzipWriterTest(unittest.TestCase):
+    data = b''.join(
+        '{0} lorem ipsum dolor sit amet\n'.format(i).encode('ascii')
+        for i in range(20000)
+    )
+
+    def test_compress(self):
+        for workers in (1, 4):
+            out = io.BytesIO()
+            with ParallelGzipWriter(
+                    out, workers=workers, block_size=4096) as writer:
+                for i in range(0, len(self.data), 1000):
+                    writer.write(self.data[i:i + 1000])
+            assert decompress(out.getvalue()) == self.data
+
+    def test_single_gzip_member(self):
+        out = gzip_compress(self.data, workers=4)
+        # Blocks are primed with the previous one, so the whole stream
+        # compresses about as well as with a single compressor
+        assert len(out) < len(gzip_compress(self.data, workers=1)) * 1.1
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decompressor.decompress(out) == self.data
+        assert not decompressor.unused_data
+
+    def test_empty_and_block_sized_input(self):
+        size = 4096
+        for data in (b'', b'x' * size, b'x' * (size + 1)):
+            out = io.BytesIO()
+            with ParallelGzipWriter(out, workers=2, block_size=size) as w:
+                w.write(data)
+            assert decompress(out.getvalue()) == data
+
+    def test_compress_file(self):
+        assert decompress(
+            gzip_compress(io.BytesIO(self.data), compresslevel=1)
+        ) == self.data
@@ -2,7 +2,11 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
-from docker.utils.json_stream import json_splitter, stream_as_text, json_stream
+import pytest
+from docker.errors import StreamParseError
+from docker.utils.json_stream import (
+    JSONStreamDecoder, json_splitter, stream_as_text, json_stream
+)
 
 
 class TestJsonSplitter(object):
@@ -60,3 +64,38 @@ class TestJsonStream(object):
             {'three': 'four'},
             {'x': 2}
         ]
+
+    def test_with_objects_split_across_chunks(self):
+        data = '{"status": "héllo"}\r\n{"status": "world"}\r\n'.encode('utf-8')
+        stream = [data[i:i + 5] for i in range(0, len(data), 5)]
+        output = list(json_stream(stream))
+        assert output == [{'status': 'héllo'}, {'status': 'world'}]
+
+    def test_with_many_objects_in_one_chunk(self):
+        stream = [b''.join(
+            '{{"id": {0}}}\n'.format(i).encode('utf-8') for i in range(1000)
+        )]
+        output = list(json_stream(stream))
+        assert output == [{'id': i} for i in range(1000)]
+
+    def test_with_object_spanning_lines(self):
+        stream = [b'{"one":\n', b'"two"}\n{"x": 1}\n']
+        output = list(json_stream(stream))
+        assert output == [{'one': 'two'}, {'x': 1}]
+
+    def test_with_invalid_trailing_data(self):
+        stream = [b'{"one": "two"}\n{"three": ']
+        output = json_stream(stream)
+        assert next(output) == {'one': 'two'}
+        with pytest.raises(StreamParseError):
+            next(output)
+
+
+class TestJSONStreamDecoder(object):
+
+    def test_object_without_line_break_is_not_held_back(self):
+        decoder = JSONStreamDecoder()
+        assert decoder.feed(b'{"one": "two"}') == [{'one': 'two'}]
+        assert decoder.feed(b'\n{"x"') == []
+        assert decoder.feed(b': 1}\n') == [{'x': 1}]
+        assert decoder.close() == []
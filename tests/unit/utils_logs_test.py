@@ -0,0 +1,280 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+import requests
+from docker import errors
+from docker.utils.logs import (
+    LineSplitter, LogFollower, LogLine, _timestamp_to_float, iter_lines,
+    parse_timestamp
+)
+from docker.utils.socket import STDERR, STDOUT
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+TS1 = '2021-03-04T05:06:07.100000000Z'
+TS2 = '2021-03-04T05:06:07.200000000Z'
+TS3 = '2021-03-04T05:06:08.000000001Z'
+# The epoch of the second of TS1 and TS2
+SECONDS = 1614834367
+
+
+def frame(stream, timestamp, data):
+    return stream, '{0} {1}'.format(timestamp, data).encode('utf-8')
+
+
+class FakeStream(list):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ParseTimestampTest(unittest.TestCase):
+    def test_utc(self):
+        assert parse_timestamp(TS1) == (SECONDS, 100000000)
+        assert parse_timestamp(TS3) == (SECONDS + 1, 1)
+
+    def test_offset(self):
+        assert parse_timestamp('2021-03-04T07:06:07.1+02:00') == (
+            SECONDS, 100000000
+        )
+        assert parse_timestamp('2021-03-04T04:36:07-00:30') == (SECONDS, 0)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_timestamp('2021-03-04 05:06:07Z')
+
+
+class TimestampToFloatTest(unittest.TestCase):
+    def test_engine_format(self):
+        for ts in (TS1, TS3, '1969-12-31T23:59:59.500000000Z',
+                   '2000-02-29T12:00:00.000000000Z'):
+            seconds, nanoseconds = parse_timestamp(ts)
+            line = '{0} data\n'.format(ts).encode('ascii')
+            assert _timestamp_to_float(line) == (
+                seconds + nanoseconds / 1e9, 31
+            )
+
+    def test_other_formats(self):
+        assert _timestamp_to_float(
+            b'2021-03-04T07:06:07.1+02:00 data'
+        ) == (SECONDS + 0.1, 28)
+        assert _timestamp_to_float(b'data\n') == (None, 0)
+        assert _timestamp_to_float(b'2021-03-04 05:06:07Z data') == (None, 0)
+
+
+class LineSplitterTest(unittest.TestCase):
+    def test_complete_lines(self):
+        splitter = LineSplitter()
+        data = b'line\n'
+        assert splitter.feed(STDOUT, data)[0] is data
+        assert splitter.feed(STDOUT, b'a\nb\n') == [b'a\n', b'b\n']
+        assert splitter.flush() == []
+
+    def test_streams_buffered_separately(self):
+        splitter = LineSplitter()
+        assert splitter.feed(STDOUT, b'out') == []
+        assert splitter.feed(STDERR, b'err\ner') == [b'err\n']
+        assert splitter.feed(STDOUT, bytearray(b'put\nmore')) == [
+            b'output\n'
+        ]
+        assert sorted(splitter.flush()) == [(STDOUT, b'more'), (STDERR, b'er')]
+        assert splitter.flush() == []
+
+    def test_max_line_length(self):
+        splitter = LineSplitter(max_line_length=4)
+        assert splitter.feed(STDOUT, b'abcdefghij') == [b'abcd', b'efgh']
+        assert splitter.feed(STDOUT, b'k\nlmnop\n') == [
+            b'ijk\n', b'lmno', b'p\n'
+        ]
+        assert splitter.feed(STDOUT, b'1234\n') == [b'1234', b'\n']
+
+
+class IterLinesTest(unittest.TestCase):
+    def test_lines(self):
+        frames = FakeStream([
+            (STDOUT, b'a\nb'), (STDERR, b'c\n'), (STDOUT, b'\nd')
+        ])
+        assert list(iter_lines(frames)) == [
+            (STDOUT, b'a\n'), (STDERR, b'c\n'), (STDOUT, b'b\n'),
+            (STDOUT, b'd'),
+        ]
+        assert frames.closed
+
+    def test_timestamps(self):
+        frames = [frame(STDOUT, TS1, 'a\n'), (STDERR, b'no timestamp\n')]
+        assert list(iter_lines(frames, parse_timestamps=True)) == [
+            (STDOUT, SECONDS + 0.1, b'a\n'),
+            (STDERR, None, b'no timestamp\n'),
+        ]
+
+    def test_close(self):
+        frames = FakeStream([(STDOUT, b'a\n'), (STDOUT, b'b\n')])
+        lines = iter_lines(frames)
+        next(lines)
+        lines.close()
+        assert frames.closed
+
+
+class LogFollowerTest(unittest.TestCase):
+    def setUp(self):
+        self.responses = []
+        self.requests = []
+        self.running = []
+        self.streams = []
+
+    def open_stream(self, since, tail, follow):
+        self.requests.append((since, tail, follow))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        self.streams.append(FakeStream(response))
+        return self.streams[-1]
+
+    def is_running(self):
+        return self.running.pop(0)
+
+    def follower(self, **kwargs):
+        return LogFollower(self.open_stream, self.is_running, **kwargs)
+
+    def test_resume_after_disconnection(self):
+        self.responses = [
+            [frame(STDOUT, TS1, 'a\n'), frame(STDERR, TS1, 'err\n'),
+             frame(STDOUT, TS2, 'b\n')],
+            [frame(STDOUT, TS1, 'a\n'), frame(STDERR, TS1, 'err\n'),
+             frame(STDOUT, TS2, 'b\n'), frame(STDOUT, TS3, 'c\n')],
+            [frame(STDOUT, TS3, 'c\n'), frame(STDERR, TS3, 'err2\n')],
+        ]
+        self.running = [True, False]
+        follower = self.follower(since=10, tail=5)
+        assert list(follower) == [
+            LogLine(STDOUT, TS1, b'a\n'),
+            LogLine(STDERR, TS1, b'err\n'),
+            LogLine(STDOUT, TS2, b'b\n'),
+            LogLine(STDOUT, TS3, b'c\n'),
+            LogLine(STDERR, TS3, b'err2\n'),
+        ]
+        assert self.requests == [
+            (10, 5, True), (SECONDS, 'all', True),
+            (SECONDS, 'all', False),
+        ]
+        assert follower.reconnects == 1
+        assert follower.checkpoint == {
+            'stdout': {'timestamp': TS3, 'count': 1},
+            'stderr': {'timestamp': TS3, 'count': 1},
+        }
+
+    def test_lines_with_the_same_timestamp(self):
+        self.responses = [
+            [frame(STDOUT, TS1, 'a\n'), frame(STDOUT, TS1, 'b\n')],
+            [frame(STDOUT, TS1, 'a\n'), frame(STDOUT, TS1, 'b\n'),
+             frame(STDOUT, TS1, 'c\n')],
+        ]
+        self.running = [False]
+        follower = self.follower()
+        assert [line.data for line in follower] == [b'a\n', b'b\n', b'c\n']
+        assert follower.checkpoint['stdout'] == {
+            'timestamp': TS1, 'count': 3
+        }
+
+    def test_lines_split_across_frames(self):
+        first = frame(STDOUT, TS1, 'one\nmulti')[1]
+        self.responses = [
+            [(STDOUT, first[:10]), (STDOUT, first[10:]),
+             (STDOUT, b'line\nmore\n'), frame(STDOUT, TS2, 'unterminated')],
+            [frame(STDOUT, TS2, 'unterminated')],
+        ]
+        self.running = [False]
+        assert list(self.follower()) == [
+            LogLine(STDOUT, TS1, b'one\n'),
+            LogLine(STDOUT, TS1, b'multiline\n'),
+            LogLine(STDOUT, TS1, b'more\n'),
+            LogLine(STDOUT, TS2, b'unterminated'),
+        ]
+
+    @mock.patch('time.sleep')
+    def test_retry_with_backoff(self, sleep):
+        error = requests.exceptions.ConnectionError()
+        self.responses = [
+            error, error, errors.APIError('', mock.Mock(status_code=500)),
+            [frame(STDOUT, TS1, 'a\n')], [],
+        ]
+        self.running = [False]
+        lines = list(self.follower(backoff_factor=1, max_backoff=3))
+        assert [line.data for line in lines] == [b'a\n']
+        assert [c[0][0] for c in sleep.call_args_list] == [1, 2, 3]
+
+    @mock.patch('time.sleep')
+    def test_max_retries(self, sleep):
+        error = requests.exceptions.ConnectionError()
+        self.responses = [error, error, error]
+        with pytest.raises(requests.exceptions.ConnectionError):
+            list(self.follower(max_retries=2))
+        assert len(self.requests) == 3
+
+    def test_client_errors_not_retried(self):
+        self.responses = [
+            errors.NotFound('', mock.Mock(status_code=404))
+        ]
+        with pytest.raises(errors.NotFound):
+            list(self.follower())
+
+    def test_close(self):
+        self.responses = [
+            [frame(STDOUT, TS1, 'a\n'), frame(STDOUT, TS2, 'b\n')]
+        ]
+        follower = self.follower()
+        for line in follower:
+            follower.close()
+        assert line.data == b'a\n'
+        assert len(self.requests) == 1
+
+    def test_checkpoint_saved_and_resumed(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'checkpoint.json')
+        lines = [frame(STDOUT, TS1, 'a\n'), frame(STDOUT, TS2, 'b\n')]
+        self.responses = [lines, lines]
+        lines = iter(self.follower(checkpoint_path=path))
+        next(lines)
+        lines.close()
+        assert self.streams[-1].closed
+        # The line is only delivered once the iteration moves past it
+        assert not os.path.exists(path)
+
+        follower = self.follower(checkpoint_path=path)
+        lines = iter(follower)
+        next(lines)
+        next(lines)
+        lines.close()
+        with open(path) as f:
+            assert json.load(f) == {
+                'stdout': {'timestamp': TS1, 'count': 1}
+            }
+
+        self.responses = [
+            [frame(STDOUT, TS1, 'a\n'), frame(STDOUT, TS2, 'b\n')], [],
+        ]
+        self.running = [False]
+        follower = self.follower(checkpoint_path=path)
+        assert [line.data for line in follower] == [b'b\n']
+        assert self.requests[-2][0] == SECONDS
+        with open(path) as f:
+            assert json.load(f) == follower.checkpoint
+
+    def test_checkpoint_argument(self):
+        self.responses = [[frame(STDOUT, TS1, 'a\n'),
+                           frame(STDOUT, TS2, 'b\n')], []]
+        self.running = [False]
+        follower = self.follower(
+            checkpoint={'stdout': {'timestamp': TS1, 'count': 1}}
+        )
+        assert [line.data for line in follower] == [b'b\n']
@@ -0,0 +1,81 @@
+import threading
+import time
+import unittest
+
+import pytest
+from docker.utils.singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def func(self, result=None, error=None):
+        def call():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+        return call
+
+    def run_concurrently(self, key, func, n):
+        results = [None] * n
+
+        def run(i):
+            try:
+                results[i] = self.flight.do(key, func)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=run, args=(0,))]
+        threads[0].start()
+        assert self.started.wait(5)
+        for i in range(1, n):
+            threads.append(threading.Thread(target=run, args=(i,)))
+            threads[-1].start()
+        deadline = time.time() + 5
+        while self.flight.stats()['coalesced'] < n - 1:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_calls_merged(self):
+        result = object()
+        results = self.run_concurrently('key', self.func(result), 4)
+        assert results == [result] * 4
+        assert self.calls == 1
+        assert self.flight.stats() == {'calls': 1, 'coalesced': 3}
+
+    def test_exception_copied(self):
+        error = ValueError('failed')
+        results = self.run_concurrently('key', self.func(error=error), 3)
+        assert self.calls == 1
+        assert error in results
+        assert len(set(map(id, results))) == 3
+        for result in results:
+            assert isinstance(result, ValueError)
+            assert result.args == ('failed',)
+
+    def test_later_calls_run_again(self):
+        self.release.set()
+        assert self.flight.do('key', self.func(1)) == 1
+        assert self.flight.do('key', self.func(2)) == 2
+        with pytest.raises(ValueError):
+            self.flight.do('key', self.func(error=ValueError()))
+        assert self.flight.do('key', self.func(3)) == 3
+        assert self.calls == 4
+        assert self.flight.stats() == {'calls': 4, 'coalesced': 0}
+
+    def test_different_keys_not_merged(self):
+        self.release.set()
+        assert self.flight.do('a', lambda: self.flight.do('b', lambda: 2)) \
+            == 2
+        assert self.flight.stats() == {'calls': 2, 'coalesced': 0}
@@ -0,0 +1,252 @@
+import io
+import socket
+import struct
+import threading
+import unittest
+
+import pytest
+from docker.constants import IS_WINDOWS_PLATFORM
+from docker.utils.socket import (
+    STDERR, STDOUT, SocketError, consume_socket_output, frames_iter_no_tty,
+    read_chunked, read_exactly, read_frames, readinto_from_chunks,
+    readinto_from_file, write_frames
+)
+from requests.packages import urllib3
+
+
+def frame(stream, data):
+    return struct.pack('>BxxxL', stream, len(data)) + data
+
+
+def chunk(data):
+    return '{0:x}\r\n'.format(len(data)).encode('ascii') + data + b'\r\n'
+
+
+class ReadFramesTest(unittest.TestCase):
+    payload = (
+        frame(STDOUT, b'hello\n') + frame(STDERR, b'oops\n') +
+        frame(STDOUT, b'') + frame(STDOUT, b'world\n')
+    )
+
+    def frames(self, chunks, **kwargs):
+        return list(read_frames(readinto_from_chunks(chunks), **kwargs))
+
+    def test_many_frames_per_read(self):
+        assert self.frames([self.payload]) == [
+            (STDOUT, b'hello\n'), (STDERR, b'oops\n'), (STDOUT, b'world\n')
+        ]
+
+    def test_frames_split_across_reads(self):
+        payload = self.payload
+        chunks = [payload[i:i + 3] for i in range(0, len(payload), 3)]
+        assert self.frames(chunks) == [
+            (STDOUT, b'hello\n'), (STDERR, b'oops\n'), (STDOUT, b'world\n')
+        ]
+
+    def test_frame_larger_than_buffer(self):
+        data = b'x' * 100
+        result = self.frames(
+            [frame(STDERR, data) + frame(STDOUT, b'end')], buffer_size=32
+        )
+        assert b''.join(d for s, d in result if s == STDERR) == data
+        assert all(len(d) <= 32 for _, d in result)
+        assert result[-1] == (STDOUT, b'end')
+
+    def test_no_copy(self):
+        gen = read_frames(
+            readinto_from_chunks([self.payload]), copy=False
+        )
+        stream, data = next(gen)
+        assert stream == STDOUT
+        assert isinstance(data, memoryview)
+        assert data.tobytes() == b'hello\n'
+
+    def test_truncated_stream(self):
+        assert self.frames([frame(STDOUT, b'abc'), b'\x01\x00']) == [
+            (STDOUT, b'abc')
+        ]
+
+
+class RecordingFile(io.BytesIO):
+    def __init__(self):
+        super(RecordingFile, self).__init__()
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(len(data))
+        return super(RecordingFile, self).write(data)
+
+
+class WriteFramesTest(unittest.TestCase):
+    def frames(self, *frames):
+        return read_frames(
+            readinto_from_chunks([b''.join(frame(*f) for f in frames)]),
+            buffer_size=16, copy=False
+        )
+
+    def test_demultiplexed(self):
+        out, err = RecordingFile(), RecordingFile()
+        written = write_frames(self.frames(
+            (STDOUT, b'a\n'), (STDERR, b'b\n'), (STDOUT, b'c\n')
+        ), out, err)
+        assert written == (4, 2)
+        assert out.getvalue() == b'a\nc\n'
+        assert err.getvalue() == b'b\n'
+        assert out.writes == [4]
+
+    def test_same_file_keeps_order(self):
+        out = RecordingFile()
+        write_frames(self.frames(
+            (STDOUT, b'a\n'), (STDERR, b'b\n'), (STDOUT, b'c\n')
+        ), out, out)
+        assert out.getvalue() == b'a\nb\nc\n'
+        assert out.writes == [6]
+
+    def test_large_writes(self):
+        out = RecordingFile()
+        data = b'x' * 100
+        written = write_frames(self.frames(
+            (STDOUT, b'abc'), (STDOUT, data), (STDOUT, b'def')
+        ), out, None, buffer_size=32)
+        assert written == (106, 0)
+        assert out.getvalue() == b'abc' + data + b'def'
+        assert all(size <= 32 for size in out.writes)
+        assert len(out.writes) < 10
+
+    def test_discarded_stream(self):
+        out = RecordingFile()
+        assert write_frames(self.frames(
+            (STDERR, b'err'), (STDOUT, b'out')
+        ), out, None) == (3, 0)
+        assert out.getvalue() == b'out'
+
+    def test_invalid_stream(self):
+        out = RecordingFile()
+        with pytest.raises(ValueError):
+            write_frames(self.frames((STDOUT, b'out'), (3, b'x')), out, out)
+        # What was received before is written
+        assert out.getvalue() == b'out'
+
+
+class ConsumeSocketOutputTest(unittest.TestCase):
+    def test_demux(self):
+        frames = [(b'a', None), (None, b'b'), (b'c', None)]
+        assert consume_socket_output(frames, demux=True) == (b'ac', b'b')
+        assert consume_socket_output([(b'a', None)], demux=True) == (
+            b'a', None
+        )
+
+
+class ReadChunkedTest(unittest.TestCase):
+    payload = (
+        chunk(b'{"status": "a"}\n') + chunk(b'{"status": "b"}\n') +
+        b'0\r\n\r\n'
+    )
+
+    def chunks(self, data, **kwargs):
+        return list(read_chunked(readinto_from_chunks(data), **kwargs))
+
+    def test_many_chunks_per_read(self):
+        assert self.chunks([self.payload]) == [
+            b'{"status": "a"}\n', b'{"status": "b"}\n'
+        ]
+
+    def test_chunks_split_across_reads(self):
+        payload = self.payload
+        data = [payload[i:i + 3] for i in range(0, len(payload), 3)]
+        assert self.chunks(data) == [
+            b'{"status": "a"}\n', b'{"status": "b"}\n'
+        ]
+
+    def test_chunk_larger_than_buffer(self):
+        data = b'x' * 100
+        assert self.chunks(
+            [chunk(data) + chunk(b'end') + b'0\r\n\r\n'], buffer_size=32
+        ) == [data, b'end']
+
+    def test_coalesce(self):
+        assert self.chunks([self.payload], coalesce=True) == [
+            b'{"status": "a"}\n{"status": "b"}\n'
+        ]
+
+    def test_stops_after_last_chunk(self):
+        data = [
+            chunk(b'a') + b'0;ext=1\r\nTrailer: x\r\n', b'\r\n',
+            b'not read'
+        ]
+        readinto = readinto_from_chunks(data)
+        assert list(read_chunked(readinto)) == [b'a']
+        buf = bytearray(8)
+        assert readinto(buf) == 8
+
+    def test_invalid_chunk_size(self):
+        with pytest.raises(SocketError):
+            self.chunks([b'zz\r\nabc\r\n'])
+
+    def test_eof_inside_chunk(self):
+        with pytest.raises(urllib3.exceptions.ProtocolError):
+            self.chunks([b'5\r\nhel'])
+        chunks = read_chunked(readinto_from_chunks(
+            [chunk(b'first'), b'a\r\nabc']
+        ))
+        assert next(chunks) == b'first'
+        with pytest.raises(urllib3.exceptions.ProtocolError):
+            next(chunks)
+
+    def test_eof_before_last_chunk(self):
+        with pytest.raises(urllib3.exceptions.ProtocolError):
+            self.chunks([chunk(b'a') + chunk(b'b')])
+        with pytest.raises(urllib3.exceptions.ProtocolError):
+            self.chunks([b''])
+
+    def test_eof_inside_trailer(self):
+        assert self.chunks([chunk(b'a') + b'0\r\nTrailer: x\r\n']) == [
+            b'a'
+        ]
+
+
+@pytest.mark.skipif(IS_WINDOWS_PLATFORM, reason='Unix only')
+class SocketReadTest(unittest.TestCase):
+    def setUp(self):
+        self.reader, self.writer = socket.socketpair()
+        self.addCleanup(self.reader.close)
+        self.addCleanup(self.writer.close)
+
+    def test_read_exactly(self):
+        self.writer.sendall(b'abc')
+        threading.Timer(0.05, self.writer.sendall, [b'def']).start()
+        assert read_exactly(self.reader, 5) == b'abcde'
+
+    def test_read_exactly_eof(self):
+        self.writer.sendall(b'ab')
+        self.writer.close()
+        with pytest.raises(SocketError):
+            read_exactly(self.reader, 5)
+
+    def test_frames_iter_no_tty_waits_when_blocking(self):
+        self.reader.settimeout(0.01)
+        self.writer.sendall(frame(STDOUT, b'first'))
+
+        def finish():
+            self.writer.sendall(frame(STDERR, b'second'))
+            self.writer.shutdown(socket.SHUT_WR)
+
+        threading.Timer(0.1, finish).start()
+        assert list(frames_iter_no_tty(self.reader)) == [
+            (STDOUT, b'first'), (STDERR, b'second')
+        ]
+
+    def test_readinto_from_file_returns_buffered_data(self):
+        self.reader.settimeout(1)
+        fp = self.reader.makefile('rb')
+        self.addCleanup(fp.close)
+        self.writer.sendall(b'abc')
+        assert fp.read(1) == b'a'
+
+        readinto = readinto_from_file(fp)
+        buf = bytearray(16)
+        assert readinto(buf) == 2
+        assert buf[:2] == b'bc'
+        self.writer.sendall(b'def')
+        assert readinto(buf) == 3
+        assert buf[:3] == b'def'
@@ -0,0 +1,116 @@
+import unittest
+
+import pytest
+from docker.errors import DockerException
+from docker.utils import stats
+from docker.utils.stats import StatsDecoder, StatsSample, StatsWindow
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def make_sample(read='2021-03-04T05:06:07.5Z', cpu=2000, precpu=1000,
+                system=20000, presystem=10000, rx=100, tx=50, io_read=10,
+                io_write=20):
+    return {
+        'read': read,
+        'cpu_stats': {
+            'cpu_usage': {'total_usage': cpu, 'percpu_usage': [1, 2]},
+            'system_cpu_usage': system,
+            'online_cpus': 4,
+        },
+        'precpu_stats': {
+            'cpu_usage': {'total_usage': precpu},
+            'system_cpu_usage': presystem,
+        },
+        'memory_stats': {
+            'usage': 1000, 'limit': 4000,
+            'stats': {'total_inactive_file': 200},
+        },
+        'networks': {
+            'eth0': {'rx_bytes': rx, 'tx_bytes': tx},
+            'eth1': {'rx_bytes': rx, 'tx_bytes': tx},
+        },
+        'blkio_stats': {'io_service_bytes_recursive': [
+            {'major': 8, 'minor': 0, 'op': 'Read', 'value': io_read},
+            {'major': 8, 'minor': 0, 'op': 'Write', 'value': io_write},
+            {'major': 8, 'minor': 0, 'op': 'Total', 'value': 30},
+        ]},
+        'pids_stats': {'current': 3},
+    }
+
+
+class StatsDecoderTest(unittest.TestCase):
+    def test_first_sample(self):
+        sample = StatsDecoder().decode(make_sample())
+        assert sample == StatsSample(
+            timestamp=1614834367.5, cpu_percent=40.0, memory_usage=800,
+            memory_limit=4000, memory_percent=20.0, net_rx=0, net_tx=0,
+            block_read=0, block_write=0, pids=3
+        )
+
+    def test_io_deltas(self):
+        decoder = StatsDecoder()
+        decoder.decode(make_sample())
+        sample = decoder.decode(make_sample(
+            rx=150, tx=60, io_read=15, io_write=40
+        ))
+        assert sample[5:9] == (100, 20, 5, 20)
+
+    def test_counters_reset(self):
+        decoder = StatsDecoder()
+        decoder.decode(make_sample())
+        sample = decoder.decode(make_sample(rx=30))
+        assert sample.net_rx == 60
+
+    def test_cgroup_v2(self):
+        data = make_sample()
+        data['memory_stats']['stats'] = {'inactive_file': 100}
+        data['blkio_stats']['io_service_bytes_recursive'][0]['op'] = 'read'
+        del data['cpu_stats']['online_cpus']
+        sample = StatsDecoder().decode(data)
+        assert sample.memory_usage == 900
+        assert sample.cpu_percent == 20.0
+
+    def test_missing_values(self):
+        sample = StatsDecoder().decode({
+            'read': '0001-01-01T00:00:00Z', 'precpu_stats': {},
+            'memory_stats': {},
+        })
+        assert sample[1:] == (0.0, 0, 0, 0.0, 0, 0, 0, 0, 0)
+
+    def test_iter_stats(self):
+        samples = list(stats.iter_stats([make_sample(), make_sample(rx=110)]))
+        assert [s.net_rx for s in samples] == [0, 20]
+
+
+class StatsWindowTest(unittest.TestCase):
+    def test_numpy_required(self):
+        with mock.patch.object(stats, 'numpy', None):
+            with pytest.raises(DockerException):
+                StatsWindow(10)
+
+    def test_ring_order(self):
+        assert stats._ring_indices(0, 3) == []
+        assert stats._ring_indices(2, 3) == [0, 1]
+        assert stats._ring_indices(3, 3) == [0, 1, 2]
+        assert stats._ring_indices(4, 3) == [1, 2, 0]
+        assert stats._ring_indices(5, 3) == [2, 0, 1]
+        assert stats._ring_indices(6, 3) == [0, 1, 2]
+        assert stats._ring_indices(7, 1) == [0]
+
+    @pytest.mark.skipif(stats.numpy is None, reason='numpy is not installed')
+    def test_aggregates(self):
+        window = StatsWindow(3)
+        assert len(window) == 0
+        assert window.mean() is None
+        for i in range(5):
+            window.append(StatsSample(i, i * 10.0, 0, 0, 0.0, i, 0, 0, 0, 1))
+        assert len(window) == 3
+        assert window.array()[:, 0].tolist() == [2.0, 3.0, 4.0]
+        assert window.mean().cpu_percent == 30.0
+        assert window.max().timestamp == 4.0
+        assert window.min().net_rx == 2.0
+        assert window.sum().net_rx == 9.0
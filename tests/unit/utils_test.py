@@ -18,7 +18,12 @@ from docker.utils import (convert_filters, convert_volume_binds,
                           parse_devices, parse_env_file, parse_host,
                           parse_repository_tag, split_command, update_headers)
 from docker.utils.ports import build_port_bindings, split_port
-from docker.utils.utils import format_environment
+from docker.utils.utils import compare_version, format_environment
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 TEST_CERT_DIR = os.path.join(
     os.path.dirname(__file__),
@@ -56,6 +61,34 @@ class DecoratorsTest(unittest.TestCase):
             'X-Docker-Locale': 'en-US',
         }
 
+    def test_update_headers_caller_dict_untouched(self):
+        def f(self, headers=None):
+            return headers
+
+        client = APIClient(version=DEFAULT_DOCKER_API_VERSION)
+        client._general_configs = {
+            'HttpHeaders': {'X-Docker-Locale': 'en-US'}
+        }
+        headers = {'Content-type': 'application/json'}
+        g = update_headers(f)
+        assert g(client, headers=headers) == {
+            'Content-type': 'application/json',
+            'X-Docker-Locale': 'en-US',
+        }
+        assert headers == {'Content-type': 'application/json'}
+
+    def test_update_headers_merged_once(self):
+        def f(self, headers=None):
+            return headers
+
+        client = APIClient(version=DEFAULT_DOCKER_API_VERSION)
+        client._general_configs = mock.MagicMock()
+        client._general_configs.get.return_value = {'X-Test': 'yes'}
+        g = update_headers(f)
+        for _ in range(3):
+            assert g(client) == {'X-Test': 'yes'}
+        client._general_configs.get.assert_called_once_with('HttpHeaders')
+
 
 class KwargsFromEnvTest(unittest.TestCase):
     def setUp(self):
@@ -470,6 +503,15 @@ class UtilsTest(unittest.TestCase):
         decoded_data = decode_json_header(data)
         assert obj == decoded_data
 
+    def test_compare_version(self):
+        assert compare_version('1.9', '1.10') == 1
+        assert compare_version('1.10', '1.9') == -1
+        assert compare_version('1.41', '1.41') == 0
+        assert compare_version('1.9', '1.9.0') == 0
+        assert compare_version('1.9.1', '1.9') == -1
+        with pytest.raises(ValueError):
+            compare_version('1.x', '1.9')
+
 
 class SplitCommandTest(unittest.TestCase):
     def test_split_command_with_unicode(self):
@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+import docker
+import pytest
+from docker.constants import IS_WINDOWS_PLATFORM
+from docker.errors import DockerException
+from docker.utils import version_cache
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+ENDPOINT = 'http://127.0.0.1:2375'
+
+
+class VersionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'api-versions.json')
+        version_cache.clear_api_versions()
+        self.addCleanup(version_cache.clear_api_versions)
+
+    def test_in_process(self):
+        assert version_cache.get_api_version(ENDPOINT) is None
+        version_cache.set_api_version(ENDPOINT, '1.41')
+        assert version_cache.get_api_version(ENDPOINT) == '1.41'
+        assert version_cache.get_api_version('http://other:2375') is None
+        assert not os.path.exists(self.path)
+
+    def test_persisted(self):
+        version_cache.set_api_version(ENDPOINT, '1.41', self.path)
+        version_cache.clear_api_versions()
+        assert version_cache.get_api_version(ENDPOINT) is None
+        assert version_cache.get_api_version(ENDPOINT, self.path) == '1.41'
+        with open(self.path) as f:
+            assert json.load(f)[ENDPOINT]['version'] == '1.41'
+
+    def test_expired(self):
+        version_cache.set_api_version(ENDPOINT, '1.41', self.path, ttl=-1)
+        assert version_cache.get_api_version(ENDPOINT, self.path) is None
+
+    def test_invalid_file(self):
+        with open(self.path, 'w') as f:
+            f.write('{"http://127.0.0.1:2375": [')
+        assert version_cache.get_api_version(ENDPOINT, self.path) is None
+        version_cache.set_api_version(ENDPOINT, '1.41', self.path)
+        version_cache.clear_api_versions()
+        assert version_cache.get_api_version(ENDPOINT, self.path) == '1.41'
+
+    def test_unwritable_file(self):
+        path = os.path.join(self.path, 'api-versions.json')
+        open(self.path, 'w').close()
+        version_cache.set_api_version(ENDPOINT, '1.41', path)
+        assert version_cache.get_api_version(ENDPOINT, path) == '1.41'
+
+    @pytest.mark.skipif(IS_WINDOWS_PLATFORM, reason='Unix sockets only')
+    def test_daemon_restart(self):
+        socket_path = os.path.join(self.tmpdir, 'docker.sock')
+        endpoint = 'http+unix://' + socket_path
+
+        def listen():
+            sock = socket.socket(socket.AF_UNIX)
+            sock.bind(socket_path)
+            self.addCleanup(sock.close)
+
+        listen()
+        version_cache.set_api_version(endpoint, '1.41', self.path)
+        assert version_cache.get_api_version(endpoint, self.path) == '1.41'
+
+        os.remove(socket_path)
+        listen()
+        assert version_cache.get_api_version(endpoint, self.path) is None
+
+    def test_default_cache_path(self):
+        with mock.patch.dict(os.environ, {'DOCKER_CONFIG': self.tmpdir}):
+            assert version_cache.default_cache_path() == self.path
+
+
+class LazyVersionTest(unittest.TestCase):
+    def setUp(self):
+        version_cache.clear_api_versions()
+        self.addCleanup(version_cache.clear_api_versions)
+        patcher = mock.patch.object(
+            docker.APIClient, '_retrieve_server_version',
+            return_value='1.41'
+        )
+        self.retrieve_server_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_negotiated_on_first_use(self):
+        client = docker.APIClient(base_url=ENDPOINT, version='auto')
+        assert not self.retrieve_server_version.called
+        assert client._url('/info') == ENDPOINT + '/v1.41/info'
+        assert client.api_version == '1.41'
+        assert self.retrieve_server_version.call_count == 1
+
+    def test_negotiated_once_per_endpoint(self):
+        docker.APIClient(base_url=ENDPOINT).api_version
+        assert docker.APIClient(base_url=ENDPOINT).api_version == '1.41'
+        assert self.retrieve_server_version.call_count == 1
+
+        docker.APIClient(base_url='tcp://127.0.0.1:2376').api_version
+        assert self.retrieve_server_version.call_count == 2
+
+    def test_explicit_version(self):
+        client = docker.APIClient(base_url=ENDPOINT, version='1.35')
+        assert client.api_version == '1.35'
+        assert not self.retrieve_server_version.called
+
+    def test_persist_api_version(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with mock.patch.dict(os.environ, {'DOCKER_CONFIG': tmpdir}):
+            docker.APIClient(
+                base_url=ENDPOINT, persist_api_version=True
+            ).api_version
+            version_cache.clear_api_versions()
+            client = docker.APIClient(
+                base_url=ENDPOINT, persist_api_version=True
+            )
+            assert client.api_version == '1.41'
+        assert self.retrieve_server_version.call_count == 1
+
+    def test_negotiation_error(self):
+        self.retrieve_server_version.side_effect = DockerException(
+            'Error while fetching server API version'
+        )
+        client = docker.APIClient(base_url=ENDPOINT)
+        with pytest.raises(DockerException):
+            client.api_version
+        assert version_cache.get_api_version(ENDPOINT) is None